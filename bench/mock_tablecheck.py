@@ -0,0 +1,224 @@
+"""Local stand-in for the TableCheck reservation page, for benchmarks.
+
+Serves a page with the controls the checker drives: the confirmation
+checkbox, the guest count button, the date input, slot buttons fetched from
+a timetable endpoint, and the booking form shown after a slot is clicked.
+Server latency, client-side render delay and the slot counts are tunable, so
+runs are repeatable without touching the live site:
+
+    python bench/mock_tablecheck.py --port 8765 --slots 6 --full 3 --latency-ms 150
+
+The page lives at /en/shops/mock/reserve and the timetable at
+/en/shops/mock/available/timetable, matching the live URL layout.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+RESERVE_PATH = '/en/shops/mock/reserve'
+TIMETABLE_PATH = '/en/shops/mock/available/timetable'
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>Mock reservation</title>
+<style>
+  .hidden { display: none; }
+  .time-slot { margin: 4px; padding: 8px 12px; }
+  .time-slot.disabled { color: #999; }
+</style>
+</head>
+<body>
+<h1>Pizza 4P's (mock)</h1>
+<label><input type="checkbox" id="confirm" name="confirm_notice"> I have read and confirm the notice</label>
+
+<div id="widget" class="hidden">
+  <button type="button" class="guest-count-button" data-testid="guest-count-button">Guests: <span id="guests">2</span></button>
+  <div id="guest-options" class="hidden">__GUEST_OPTIONS__</div>
+  <input type="date" data-testid="date-picker-input" id="date" value="">
+  <div id="slots"></div>
+</div>
+
+<form id="booking-form" class="hidden" onsubmit="return false;">
+  <input name="firstName" placeholder="Name">
+  <input name="phone" type="tel" placeholder="Phone">
+  <input name="email" type="email" placeholder="Email">
+  <label><input type="checkbox" data-testid="terms-checkbox" name="terms"> I agree to the terms</label>
+  <button type="submit" data-testid="submit-button">Book</button>
+</form>
+
+<script>
+var RENDER_MS = __RENDER_MS__;
+var state = {guests: 2, date: ''};
+
+function loadSlots() {
+  var slots = document.getElementById('slots');
+  slots.innerHTML = '';
+  if (!state.date) { return; }
+  fetch('__TIMETABLE_PATH__?date=' + state.date + '&num_people=' + state.guests)
+    .then(function(r) { return r.json(); })
+    .then(function(data) {
+      setTimeout(function() {
+        data.slots.forEach(function(slot) {
+          var b = document.createElement('button');
+          b.type = 'button';
+          b.className = slot.available ? 'time-slot' : 'time-slot disabled';
+          b.disabled = !slot.available;
+          b.textContent = slot.available ? slot.time : 'FULL';
+          b.addEventListener('click', function() {
+            document.getElementById('widget').classList.add('hidden');
+            setTimeout(function() { document.getElementById('booking-form').classList.remove('hidden'); }, RENDER_MS);
+          });
+          slots.appendChild(b);
+        });
+      }, RENDER_MS);
+    });
+}
+
+document.getElementById('confirm').addEventListener('change', function(e) {
+  document.getElementById('widget').classList.toggle('hidden', !e.target.checked);
+});
+document.querySelector('.guest-count-button').addEventListener('click', function() {
+  document.getElementById('guest-options').classList.toggle('hidden');
+});
+Array.prototype.forEach.call(document.querySelectorAll('#guest-options button'), function(b) {
+  b.addEventListener('click', function() {
+    state.guests = parseInt(b.textContent, 10);
+    document.getElementById('guests').textContent = b.textContent;
+    document.getElementById('guest-options').classList.add('hidden');
+    loadSlots();
+  });
+});
+document.getElementById('date').addEventListener('change', function(e) {
+  state.date = e.target.value;
+  loadSlots();
+});
+</script>
+</body>
+</html>
+"""
+
+
+class MockSettings:
+    """Knobs for the replica; changed between benchmark scenarios"""
+
+    def __init__(self, slots=6, full=3, max_party=4, latency_ms=100, render_ms=50, first_slot='17:00'):
+        self.slots = slots
+        self.full = full
+        self.max_party = max_party
+        self.latency_ms = latency_ms
+        self.render_ms = render_ms
+        self.first_slot = first_slot
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def timetable(self, num_people):
+        """Slot list for a party size: bookable slots first, then full ones; none above max_party"""
+        hour, minute = map(int, self.first_slot.split(':'))
+        start = hour * 60 + minute
+        result = []
+        for i in range(self.slots + self.full):
+            minutes = start + 30 * i
+            available = i < self.slots and num_people <= self.max_party
+            result.append({'time': f"{minutes // 60 % 24:02d}:{minutes % 60:02d}", 'available': available})
+        return result
+
+
+def build_page(settings):
+    options = "".join(f'<button type="button">{n}</button>' for n in range(1, 9))
+    return (PAGE.replace('__GUEST_OPTIONS__', options)
+                .replace('__RENDER_MS__', str(settings.render_ms))
+                .replace('__TIMETABLE_PATH__', TIMETABLE_PATH))
+
+
+def make_handler(settings):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            settings.count_request()
+            time.sleep(settings.latency_ms / 1000)
+            url = urlparse(self.path)
+            if url.path == RESERVE_PATH:
+                self._send(200, 'text/html; charset=utf-8', build_page(settings).encode())
+            elif url.path == TIMETABLE_PATH:
+                query = parse_qs(url.query)
+                num_people = int(query.get('num_people', ['2'])[0])
+                body = {'date': query.get('date', [''])[0], 'slots': settings.timetable(num_people)}
+                self._send(200, 'application/json', json.dumps(body).encode())
+            else:
+                self._send(404, 'text/plain', b'not found')
+
+        def _send(self, status, content_type, body):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+class MockServer:
+    """The replica on a background thread; use as a context manager"""
+
+    def __init__(self, settings=None, host='127.0.0.1', port=0):
+        self.settings = settings or MockSettings()
+        self.httpd = ThreadingHTTPServer((host, port), make_handler(self.settings))
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def booking_url(self):
+        return self.base_url + RESERVE_PATH
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='mock-tablecheck', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local replica of the reservation page")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--slots', type=int, default=6, help="Bookable slots per date")
+    parser.add_argument('--full', type=int, default=3, help="Full slots shown after the bookable ones")
+    parser.add_argument('--max-party', type=int, default=4, help="Largest party size that gets slots")
+    parser.add_argument('--latency-ms', type=int, default=100, help="Server delay per request")
+    parser.add_argument('--render-ms', type=int, default=50, help="Client-side delay before slots and form render")
+    args = parser.parse_args()
+
+    settings = MockSettings(args.slots, args.full, args.max_party, args.latency_ms, args.render_ms)
+    server = MockServer(settings, port=args.port)
+    print(f"Serving {server.booking_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
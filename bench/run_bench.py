@@ -0,0 +1,179 @@
+"""Run the checker end-to-end against the local replica and report its cost.
+
+Each run starts the mock reservation page, points a fresh Checker at it
+(own state database, screenshots off, headless Chrome, notifications counted
+instead of sent) and runs one availability check. Reported per run: wall
+time, WebDriver commands by type, peak Python RSS, browser process-tree RSS,
+page load time and bytes transferred, and the per-step spans. Save a run set with --json and compare a later one
+against it with --baseline:
+
+    python bench/run_bench.py --runs 5 --json bench/baseline.json
+    python bench/run_bench.py --runs 5 --baseline bench/baseline.json
+"""
+import argparse
+import datetime
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import slot_checker_new as sc  # noqa: E402
+from browser_profile import driver_pid, process_tree_rss_mb, session_report  # noqa: E402
+from mock_tablecheck import MockServer, MockSettings  # noqa: E402
+from tracing import percentile  # noqa: E402
+
+
+class CountingNotifier:
+    """Stands in for EmailNotifier so benchmark runs never send mail"""
+
+    def __init__(self):
+        self.messages = []
+
+    def send(self, subject, message, recipient=None):
+        self.messages.append(subject)
+
+    @contextmanager
+    def cycle(self):
+        yield self
+
+    def close(self):
+        pass
+
+
+def count_commands(driver, counter):
+    """Count every WebDriver command the driver sends, by command name"""
+    execute = driver.execute
+
+    def counted(driver_command, params=None):
+        counter[driver_command] += 1
+        return execute(driver_command, params)
+
+    driver.execute = counted
+
+
+def peak_python_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_once(server, backend, date, workdir, profile='full', slot_source='dom'):
+    config = {
+        'target_dates': [date],
+        'time_range': {'start': '00:00', 'end': '23:59'},
+        'email': 'bench@example.com',
+        'booking_url': server.booking_url,
+        'availability_backend': backend,
+        'state_path': os.path.join(workdir, f"state-{time.monotonic_ns()}.db"),
+        'trace_level': 'off',
+        'headless': True,
+        'browser_profile': profile,
+        'slot_source': slot_source,
+        'browser_profile_dir': os.path.join(workdir, 'profiles'),
+    }
+    checker = sc.set_checker(sc.Checker(config=config))
+    checker.__dict__['notifier'] = CountingNotifier()
+    commands = Counter()
+    started = time.monotonic()
+    driver = sc.setup_driver()
+    browser_rss = None
+    page = {}
+    try:
+        count_commands(driver, commands)
+        sc.open_booking_page(driver)
+        page = session_report(driver)
+        if backend == 'http':
+            sc.check_availability_http(driver)
+        else:
+            sc.check_availability(driver)
+        browser_rss = process_tree_rss_mb(driver_pid(driver))
+    finally:
+        sc.quit_driver(driver)
+    wall = time.monotonic() - started
+    spans = {name: entry['total_ms'] for name, entry in checker.tracer.summary().items()}
+    attempts = checker.state_store.booking_attempts()
+    checker.close()
+    return {
+        'wall_seconds': wall,
+        'webdriver_commands': sum(commands.values()),
+        'commands_by_type': dict(commands.most_common()),
+        'python_peak_rss_mb': peak_python_rss_mb(),
+        'browser_rss_mb': browser_rss,
+        'page_load_ms': page.get('loadMs'),
+        'page_transferred_kb': page['transferredBytes'] / 1024 if page.get('transferredBytes') is not None else None,
+        'notifications': checker.notifier.messages,
+        'detect_to_submit_ms': [a[4] for a in attempts if a[4] is not None],
+        'spans_ms': spans,
+    }
+
+
+def summarize_runs(runs):
+    def stat(key):
+        values = [r[key] for r in runs if r[key] is not None]
+        if not values:
+            return None
+        return {'p50': percentile(values, 50), 'max': max(values)}
+
+    return {key: stat(key) for key in ('wall_seconds', 'webdriver_commands', 'python_peak_rss_mb', 'browser_rss_mb',
+                                  'page_load_ms', 'page_transferred_kb')}
+
+
+def print_summary(summary, baseline=None):
+    for key, entry in summary.items():
+        if entry is None:
+            print(f"  {key}: n/a")
+            continue
+        line = f"  {key}: p50 {entry['p50']:.1f}, max {entry['max']:.1f}"
+        base = (baseline or {}).get(key)
+        if base:
+            change = (entry['p50'] - base['p50']) / base['p50'] * 100 if base['p50'] else 0.0
+            line += f" (baseline p50 {base['p50']:.1f}, {change:+.1f}%)"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the slot checker against a local replica")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--backend', choices=['browser', 'http'], default='browser')
+    parser.add_argument('--browser-profile', choices=['full', 'lean'], default='full')
+    parser.add_argument('--slot-source', choices=['dom', 'network'], default='dom')
+    parser.add_argument('--slots', type=int, default=6)
+    parser.add_argument('--full', type=int, default=3)
+    parser.add_argument('--max-party', type=int, default=4)
+    parser.add_argument('--latency-ms', type=int, default=100)
+    parser.add_argument('--render-ms', type=int, default=50)
+    parser.add_argument('--json', help="Write the runs and their summary to this file")
+    parser.add_argument('--baseline', help="Compare against a file written with --json")
+    args = parser.parse_args()
+
+    settings = MockSettings(args.slots, args.full, args.max_party, args.latency_ms, args.render_ms)
+    date = (datetime.date.today() + datetime.timedelta(days=7)).isoformat()
+    runs = []
+    with tempfile.TemporaryDirectory() as workdir, MockServer(settings) as server:
+        for i in range(args.runs):
+            print(f"\n=== Run {i + 1}/{args.runs} against {server.booking_url} ===")
+            result = run_once(server, args.backend, date, workdir, args.browser_profile, args.slot_source)
+            runs.append(result)
+            print(f"Run {i + 1}: {result['wall_seconds']:.2f}s, {result['webdriver_commands']} WebDriver commands")
+
+    summary = summarize_runs(runs)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['summary']
+    print(f"\nSummary over {len(runs)} runs ({args.backend} backend, {args.browser_profile} profile):")
+    print_summary(summary, baseline)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'settings': vars(args), 'summary': summary, 'runs': runs}, f, indent=2)
+        print(f"Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
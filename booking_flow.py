@@ -0,0 +1,305 @@
+"""The browser booking flow as data: steps, their strategies, success checks and deadlines.
+
+Each step (tick the confirmation box, open the guest picker, pick the party
+size, set the date, click a slot) declares the strategies that can carry it
+out, best guess first, and optionally a success condition checked after a
+strategy reports success. A strategy is one attempt: normally a single
+script call that finds, clicks and arms the DOM watch at once. BookingFlow
+runs a step as follows:
+
+  * The strategy that won last time goes first (via the SelectorCache).
+  * It polls the remaining strategies until one succeeds or the step's
+    deadline passes.
+  * Then it tries the page-changing fallbacks (poll=False) once each.
+
+Strategies that lost to another one are remembered. They are skipped on
+later runs and only tried again when everything else has failed. On the
+happy path a step therefore costs one attempt plus the wait for the page to
+react.
+"""
+import datetime
+import threading
+import time
+from functools import partial
+
+from page_selectors import (CLICK_FIRST_JS, CONFIRM_CHECKBOX_SELECTORS, DATE_INPUT_SELECTOR, GUEST_BUTTON_SELECTORS,
+                            GUEST_OPTION_XPATH, SET_DATE_JS, locator)
+from readiness import ARM_MUTATION_WATCH_JS, click_and_settle, wait_for_dom_settled
+
+
+def armed(script):
+    """script (written against arguments) prefixed with arming the DOM watch on body, as one call"""
+    return """
+var arm = function() { %s };
+arm.apply(null, ['body']);
+return (function() { %s }).apply(null, arguments);
+""" % (ARM_MUTATION_WATCH_JS, script)
+
+
+ARMED_CLICK_FIRST_JS = armed(CLICK_FIRST_JS)
+
+ARMED_SET_DATE_JS = armed(SET_DATE_JS)
+
+# Last resort for the confirmation box: tick every checkbox on the page
+TICK_ALL_CHECKBOXES_JS = armed("""
+var checkboxes = document.querySelectorAll('input[type="checkbox"]');
+var clicked = false;
+for (var i = 0; i < checkboxes.length; i++) {
+    if (!checkboxes[i].checked) {
+        checkboxes[i].checked = true;
+        checkboxes[i].dispatchEvent(new Event('change', { 'bubbles': true }));
+        clicked = true;
+    }
+}
+return clicked;
+""")
+
+# Set the date on anything that looks like a date picker. arguments[0] is the date.
+SET_DATE_ANYWHERE_JS = armed("""
+var datePickers = document.querySelectorAll('input[type="date"], [data-testid*="date"], .date-picker, .calendar');
+for (var i = 0; i < datePickers.length; i++) {
+    datePickers[i].value = arguments[0];
+    datePickers[i].dispatchEvent(new Event('change', { 'bubbles': true }));
+    datePickers[i].dispatchEvent(new Event('input', { 'bubbles': true }));
+}
+return datePickers.length > 0;
+""")
+
+# The date input holds arguments[1]; pages without an input (calendar only) count as set
+DATE_IS_SET_JS = """
+var el = document.querySelector(arguments[0]);
+return el ? el.value === arguments[1] : true;
+"""
+
+
+class Strategy:
+    """One way to carry out a step.
+
+    run(driver, ctx) returns something truthy on success. when(ctx), if
+    given, says whether the strategy applies to this run at all. poll=False
+    marks fallbacks that change the page even when they miss: they are tried
+    once, after the polled strategies ran out of time.
+    """
+
+    def __init__(self, name, run, when=None, poll=True):
+        self.name = name
+        self.run = run
+        self.when = when
+        self.poll = poll
+
+
+class Step:
+    """A named step of the flow.
+
+    confirm(driver, ctx) is the success condition checked after a strategy
+    reports success; without one, the strategy's own result is the success
+    condition. timeout defaults to the WaitBudget deadline for the step's
+    name. lookup is the SelectorCache key for the winning strategy (None to
+    not remember one). A step with requires is skipped unless that step
+    succeeded in the same run.
+    """
+
+    def __init__(self, name, strategies, confirm=None, timeout=None, lookup=None, requires=None):
+        self.name = name
+        self.strategies = strategies
+        self.confirm = confirm
+        self.timeout = timeout
+        self.lookup = lookup
+        self.requires = requires
+
+
+def _click_first(driver, ctx, selector, step, unchecked_only=False):
+    """Click the first visible, enabled match of selector and wait for the page to react"""
+    if driver.execute_script(ARMED_CLICK_FIRST_JS, [selector], unchecked_only) is None:
+        return None
+    wait_for_dom_settled(driver, ctx['budget'], step)
+    return selector
+
+
+def click_strategies(selectors, step, unchecked_only=False):
+    """One strategy per candidate selector, named after the selector"""
+    return [Strategy(selector, partial(_click_first, selector=selector, step=step, unchecked_only=unchecked_only))
+            for selector in selectors]
+
+
+def _tick_all_checkboxes(driver, ctx):
+    if not driver.execute_script(TICK_ALL_CHECKBOXES_JS):
+        return False
+    wait_for_dom_settled(driver, ctx['budget'], 'checkbox')
+    return True
+
+
+def _click_guest_option(driver, ctx):
+    # A native click, so an <option> of a <select> gets selected too
+    for element in driver.find_elements(*locator(GUEST_OPTION_XPATH.format(n=ctx['num_adults']))):
+        if element.is_displayed() and element.is_enabled():
+            click_and_settle(driver, element, ctx['budget'], 'guest_option')
+            return True
+    return False
+
+
+def _set_date_input(driver, ctx):
+    if not driver.execute_script(ARMED_SET_DATE_JS, DATE_INPUT_SELECTOR, ctx['date']):
+        return False
+    wait_for_dom_settled(driver, ctx['budget'], 'date_selection')
+    return True
+
+
+def _set_date_anywhere(driver, ctx):
+    if not driver.execute_script(SET_DATE_ANYWHERE_JS, ctx['date']):
+        return False
+    wait_for_dom_settled(driver, ctx['budget'], 'date_selection')
+    return True
+
+
+def _pick_from_calendar(driver, ctx):
+    from selenium.webdriver.common.by import By
+
+    # Click any element that might open a date picker, then the day in it
+    date_elements = driver.find_elements(By.XPATH, "//button[contains(., 'Date')] | //input[contains(@placeholder, 'date')] | //div[contains(@class, 'date')]")
+    if not date_elements:
+        return False
+    click_and_settle(driver, date_elements[0], ctx['budget'], 'calendar')
+    day = datetime.datetime.strptime(ctx['date'], '%Y-%m-%d').day
+    calendar_day = driver.find_elements(By.XPATH, f"//button[contains(text(), '{day}')] | //td[contains(text(), '{day}')]")
+    if not calendar_day:
+        return False
+    click_and_settle(driver, calendar_day[0], ctx['budget'], 'date_selection')
+    return True
+
+
+def _date_is_set(driver, ctx):
+    return bool(driver.execute_script(DATE_IS_SET_JS, DATE_INPUT_SELECTOR, ctx['date']))
+
+
+def _click_slot_record(driver, ctx):
+    return _click_first(driver, ctx, ctx['slot']['selector'], 'slot_click')
+
+
+def _click_slot_text(driver, ctx):
+    return _click_first(driver, ctx, f"//button[contains(text(), '{ctx['time_slot']}')]", 'slot_click')
+
+
+STEPS = {
+    # Success: a candidate box was unticked and got clicked
+    'checkbox': Step('checkbox', click_strategies(CONFIRM_CHECKBOX_SELECTORS, 'checkbox', unchecked_only=True)
+                     + [Strategy('script', _tick_all_checkboxes, poll=False)], lookup='checkbox'),
+    # Success: the guest picker was clicked; the option step waits for what it opened
+    'guest_button': Step('guest_button', click_strategies(GUEST_BUTTON_SELECTORS, 'guest_button'),
+                         lookup='guest_button'),
+    'guest_option': Step('guest_option', [Strategy('text', _click_guest_option)], requires='guest_button'),
+    # Success: the date input holds the date
+    'date_selection': Step('date_selection', [
+        Strategy('input', _set_date_input),
+        Strategy('script', _set_date_anywhere, poll=False),
+        Strategy('calendar', _pick_from_calendar, poll=False),
+    ], confirm=_date_is_set, lookup='date_method'),
+    # Success: a button for the slot was clicked; the booking form wait follows in fill_booking_details()
+    'slot_click': Step('slot_click', [
+        Strategy('snapshot', _click_slot_record, when=lambda ctx: bool(ctx.get('slot') and ctx['slot']['selector'])),
+        Strategy('text', _click_slot_text, when=lambda ctx: bool(ctx.get('time_slot'))),
+    ], lookup='slot_click'),
+}
+
+
+class BookingFlow:
+    """Runs steps from STEPS, remembering which strategies win and which keep losing.
+
+    Shared by worker threads; the cache is a SelectorCache or None.
+    """
+
+    def __init__(self, steps=None, cache=None, poll_interval=0.1):
+        self.steps = steps or STEPS
+        self.cache = cache
+        self.poll_interval = poll_interval
+        # step name -> names of strategies that failed where another one succeeded
+        self.known_failures = {}
+        # step name -> [runs, attempts, runs won by the first attempt]
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def ranked(self, step, ctx):
+        """The step's applicable strategies, last winner first"""
+        names = [strategy.name for strategy in step.strategies]
+        if self.cache is not None and step.lookup:
+            names = self.cache.ranked(step.lookup, names)
+        by_name = {strategy.name: strategy for strategy in step.strategies}
+        return [by_name[name] for name in names if by_name[name].when is None or by_name[name].when(ctx)]
+
+    def _attempt(self, driver, step, strategies, ctx, tried):
+        """(strategy, result) for the first of strategies that succeeds and is confirmed, or None"""
+        for strategy in strategies:
+            tried.append(strategy.name)
+            try:
+                result = strategy.run(driver, ctx)
+                if result and (step.confirm is None or step.confirm(driver, ctx)):
+                    return strategy, result
+            except Exception as e:
+                print(f"{step.name}: strategy {strategy.name} failed: {str(e)}")
+        return None
+
+    def run_step(self, driver, name, ctx):
+        """The result of the first confirmed strategy for a step, or None when every strategy failed"""
+        step = self.steps[name]
+        timeout = step.timeout if step.timeout is not None else ctx['budget'].timeout_for(name)
+        ordered = self.ranked(step, ctx)
+        with self._lock:
+            known = set(self.known_failures.get(name, ()))
+        # A fallback goes first only when it is the known winner
+        leading = ordered[:1] if ordered and not ordered[0].poll else []
+        polled = [s for s in ordered if s.poll and s.name not in known]
+        fallbacks = [s for s in ordered if not s.poll and s not in leading and s.name not in known]
+        retried = [s for s in ordered if s.name in known and s not in leading]
+
+        tried = []
+        started = time.monotonic()
+        won = self._attempt(driver, step, leading, ctx, tried)
+        while won is None and polled:
+            won = self._attempt(driver, step, polled, ctx, tried)
+            if won is not None or time.monotonic() - started >= timeout:
+                break
+            time.sleep(self.poll_interval)
+        for group in (fallbacks, retried):
+            if won is None:
+                won = self._attempt(driver, step, group, ctx, tried)
+
+        with self._lock:
+            stats = self.stats.setdefault(name, [0, 0, 0])
+            stats[0] += 1
+            stats[1] += len(tried)
+            if won is None:
+                print(f"{name}: no strategy succeeded within {timeout}s ({len(tried)} attempts)")
+            else:
+                stats[2] += len(tried) == 1
+                losers = set(tried) - {won[0].name}
+                self.known_failures[name] = (known | losers) - {won[0].name}
+        if self.cache is not None and step.lookup:
+            if won is None:
+                self.cache.forget(step.lookup)
+            else:
+                self.cache.record(step.lookup, won[0].name, bool(ordered) and won[0] is ordered[0])
+        if won is None:
+            return None
+        print(f"{name}: succeeded with {won[0].name}")
+        return won[1]
+
+    def run(self, driver, names, budget, **ctx):
+        """Run steps in order; returns {step name: result or None} for the steps that ran"""
+        ctx['budget'] = budget
+        results = {}
+        for name in names:
+            requires = self.steps[name].requires
+            if requires and not results.get(requires):
+                print(f"{name}: skipped, {requires} did not succeed")
+                continue
+            results[name] = self.run_step(driver, name, ctx)
+        return results
+
+    def report(self):
+        with self._lock:
+            stats = dict(self.stats)
+        if not stats:
+            return
+        print("Booking flow attempts per step:")
+        for name, (runs, attempts, first_try) in stats.items():
+            print(f"  {name}: {attempts} attempts over {runs} runs, {first_try} won on the first attempt")
@@ -0,0 +1,217 @@
+"""Chrome launch profiles and per-session resource reporting.
+
+The "full" profile is the original visible 1920x1080 browser. The "lean"
+profile runs headless in a small viewport. It blocks images, media, fonts
+and analytics/ads hosts through CDP Network.setBlockedURLs, and keeps a
+reusable user-data-dir per concurrent session so the HTTP cache survives
+between runs. session_report() gives a session's load timing and the
+resident memory of its chromedriver/Chrome process tree, so the number of
+sessions a runner can hold can be worked out.
+"""
+import os
+import threading
+
+PROFILES = ('full', 'lean')
+
+USER_AGENT = ("Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36")
+
+# URL patterns (CDP wildcard syntax) that the lean profile never fetches
+BLOCKED_URL_PATTERNS = [
+    # Images and icons
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico', '*.bmp',
+    # Fonts
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    # Media
+    '*.mp4', '*.webm', '*.mp3', '*.m4a', '*.ogg', '*.wav',
+    # Analytics, tag managers, ads and session recording
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*', '*googleadservices.com*',
+    '*facebook.net*', '*connect.facebook.com*', '*hotjar.com*', '*clarity.ms*', '*segment.io*',
+    '*segment.com*', '*mixpanel.com*', '*amplitude.com*', '*newrelic.com*', '*nr-data.net*',
+    '*fullstory.com*', '*intercom.io*', '*tiktok.com*', '*criteo.com*', '*bing.com/bat*',
+]
+
+LEAN_ARGUMENTS = [
+    "--headless=new",
+    "--blink-settings=imagesEnabled=false",
+    "--mute-audio",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--disable-features=Translate,MediaRouter,OptimizationHints",
+]
+
+NAVIGATION_TIMING_JS = """
+var nav = performance.getEntriesByType('navigation')[0];
+var resources = performance.getEntriesByType('resource');
+var transferred = resources.reduce(function(sum, r) { return sum + (r.transferSize || 0); }, nav ? nav.transferSize || 0 : 0);
+return {
+    domContentLoadedMs: nav ? nav.domContentLoadedEventEnd : null,
+    loadMs: nav ? nav.loadEventEnd : null,
+    resources: resources.length,
+    transferredBytes: transferred,
+    jsHeapBytes: (performance.memory || {}).usedJSHeapSize || null
+};
+"""
+
+_profile_lock = threading.Lock()
+_profiles_in_use = {}
+
+
+def chrome_arguments(profile, headless=False, viewport=(1024, 768)):
+    """Command-line switches for a profile; the user agent is added for both"""
+    if profile not in PROFILES:
+        raise ValueError(f"browser profile must be one of {', '.join(PROFILES)}, not {profile!r}")
+    arguments = ["--no-sandbox", "--disable-dev-shm-usage", "--disable-gpu"]
+    if profile == 'lean':
+        arguments += LEAN_ARGUMENTS
+        arguments.append(f"--window-size={viewport[0]},{viewport[1]}")
+    else:
+        if headless:
+            arguments.append("--headless=new")
+        arguments.append("--window-size=1920,1080")
+    arguments.append(f"--user-agent={USER_AGENT}")
+    return arguments
+
+
+def claim_profile_dir(root):
+    """A user-data-dir under root that no other session of this process is using"""
+    with _profile_lock:
+        slot = 0
+        while slot in _profiles_in_use.values():
+            slot += 1
+        path = os.path.abspath(os.path.join(root, f"session-{slot}"))
+        os.makedirs(path, exist_ok=True)
+        _profiles_in_use[path] = slot
+        return path
+
+
+def release_profile_dir(path):
+    with _profile_lock:
+        _profiles_in_use.pop(path, None)
+
+
+def block_requests(driver, patterns=None):
+    """Stop the session from fetching anything matching the patterns; returns False when CDP is unavailable"""
+    from selenium.common.exceptions import WebDriverException
+
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(patterns or BLOCKED_URL_PATTERNS)})
+        return True
+    except (AttributeError, WebDriverException) as e:
+        print(f"Could not block requests: {str(e)}")
+        return False
+
+
+# Indexes into process_stat() fields, i.e. /proc/<pid>/stat fields 4, 14, 15 and 22
+STAT_PPID, STAT_UTIME, STAT_STIME, STAT_STARTTIME = 1, 11, 12, 19
+
+
+def process_stat(pid):
+    """The /proc/<pid>/stat fields after the command name, or None when the process is gone"""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # The command name may itself contain spaces or parentheses
+    return stat.rsplit(')', 1)[1].split()
+
+
+def process_start_ticks(pid):
+    """When a process started, in clock ticks since boot, or None"""
+    fields = process_stat(pid)
+    try:
+        return int(fields[STAT_STARTTIME]) if fields else None
+    except (IndexError, ValueError):
+        return None
+
+
+def process_table():
+    """{pid: (parent pid, resident pages, CPU ticks)} for every process, from /proc (Linux only)"""
+    table = {}
+    if not os.path.isdir('/proc'):
+        return table
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        fields = process_stat(entry)
+        if fields is None:
+            continue
+        try:
+            with open(f'/proc/{entry}/statm') as f:
+                rss_pages = int(f.read().split()[1])
+            table[int(entry)] = (int(fields[STAT_PPID]), rss_pages,
+                                 int(fields[STAT_UTIME]) + int(fields[STAT_STIME]))
+        except (OSError, IndexError, ValueError):
+            continue
+    return table
+
+
+def process_tree_pids(pid, table=None):
+    """A process and all its descendants, parents before children"""
+    table = process_table() if table is None else table
+    children = {}
+    for child, (ppid, _, _) in table.items():
+        children.setdefault(ppid, []).append(child)
+    tree, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        if current in table:
+            tree.append(current)
+        stack.extend(children.get(current, []))
+    return tree
+
+
+def process_tree_usage(pid, table=None):
+    """(resident MB, CPU seconds, pids) of a process tree, or None when it is gone or /proc is unavailable"""
+    if not pid:
+        return None
+    table = process_table() if table is None else table
+    pids = process_tree_pids(pid, table)
+    if not pids:
+        return None
+    rss_mb = sum(table[p][1] for p in pids) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    cpu_seconds = sum(table[p][2] for p in pids) / os.sysconf('SC_CLK_TCK')
+    return rss_mb, cpu_seconds, pids
+
+
+def process_tree_rss_mb(pid):
+    """Resident memory of a process and all its descendants, from /proc (Linux only)"""
+    usage = process_tree_usage(pid)
+    return usage[0] if usage else None
+
+
+def driver_pid(driver):
+    process = getattr(getattr(driver, 'service', None), 'process', None)
+    return process.pid if process else None
+
+
+def session_report(driver):
+    """Load timing of the current page plus the session's memory, as a dict"""
+    from selenium.common.exceptions import WebDriverException
+
+    try:
+        report = driver.execute_script(NAVIGATION_TIMING_JS) or {}
+    except WebDriverException:
+        report = {}
+    report['browserRssMb'] = process_tree_rss_mb(driver_pid(driver))
+    return report
+
+
+def format_session_report(report):
+    parts = []
+    if report.get('loadMs') is not None:
+        parts.append(f"load {report['loadMs']:.0f} ms (DOMContentLoaded {report['domContentLoadedMs']:.0f} ms)")
+    if report.get('resources') is not None:
+        parts.append(f"{report['resources']} resources, {report['transferredBytes'] / 1024:.0f} KB transferred")
+    if report.get('jsHeapBytes'):
+        parts.append(f"JS heap {report['jsHeapBytes'] / (1024 * 1024):.0f} MB")
+    if report.get('browserRssMb') is not None:
+        parts.append(f"browser RSS {report['browserRssMb']:.0f} MB")
+    return ", ".join(parts) or "no timing available"
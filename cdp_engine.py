@@ -0,0 +1,310 @@
+"""Asyncio browser engine that drives Chrome over the DevTools Protocol.
+
+One Chrome process and one websocket connection serve every page. Each tab
+is a CDP target attached in flattened session mode, so a single event loop
+can drive many probes at once without a thread and a chromedriver session
+per probe. Page scripts are the same ones the Selenium path runs
+(SLOT_SNAPSHOT_JS, RESOLVE_FIELDS_JS, READY_STATE_JS, ...). They are written
+against `arguments` and `return`, and Page.evaluate() wraps them in a
+function for Runtime.evaluate. Readiness waits use the same conditions and
+WaitBudget deadlines as readiness.py.
+
+Requires the websockets package, which is imported only when a browser is
+launched.
+"""
+import asyncio
+import itertools
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from page_selectors import (CLICK_FIRST_JS, DATE_INPUT_SELECTOR, FILL_FIELDS_JS, RESOLVE_FIELDS_JS, SET_DATE_JS,
+                            SLOT_SNAPSHOT_JS, TIME_SLOT_SELECTORS, TIME_SLOT_XPATH)
+from readiness import ARM_MUTATION_WATCH_JS, NETWORK_TRACKER_JS, READY_STATE_JS, dom_is_settled, page_is_ready
+
+# Tabs other than the focused one would otherwise have their timers throttled
+CONCURRENCY_ARGUMENTS = [
+    "--disable-background-timer-throttling",
+    "--disable-renderer-backgrounding",
+    "--disable-backgrounding-occluded-windows",
+]
+
+# Resolve the booking form fields, then fill and tick them in the same call.
+# arguments[0] is [[field, [candidates...]], ...], arguments[1] {field: value}
+# and arguments[2] the fields that must be present. Nothing is filled until
+# every required field is found; the matching selectors are always returned.
+FILL_FORM_JS = """
+var resolveFields = function() { %s };
+var fillFields = function() { %s };
+var found = resolveFields.apply(null, [arguments[0]]), values = arguments[1], required = arguments[2];
+var selectors = {};
+for (var name in found) { selectors[name] = found[name].selector; }
+for (var r = 0; r < required.length; r++) {
+    if (!found[required[r]]) { return {selectors: selectors, filled: null}; }
+}
+var pairs = [];
+for (var field in values) {
+    if (found[field]) { pairs.push([found[field].element, values[field]]); }
+}
+var filled = fillFields.apply(null, [pairs]);
+if (found.terms && !found.terms.element.checked) { found.terms.element.click(); }
+return {selectors: selectors, filled: filled};
+""" % (RESOLVE_FIELDS_JS, FILL_FIELDS_JS)
+
+
+class CDPError(Exception):
+    """A DevTools command failed or the browser went away"""
+
+
+class Connection:
+    """One websocket to the browser, shared by every page"""
+
+    def __init__(self, websocket):
+        self._ws = websocket
+        self._ids = itertools.count(1)
+        self._pending = {}
+        # (method, session id, future) for events someone is waiting for
+        self._waiters = []
+        self._reader = asyncio.get_running_loop().create_task(self._read())
+
+    @classmethod
+    async def connect(cls, url):
+        import websockets
+
+        return cls(await websockets.connect(url, max_size=None))
+
+    async def send(self, method, params=None, session_id=None):
+        """Run a command and return its result"""
+        message_id = next(self._ids)
+        message = {'id': message_id, 'method': method, 'params': params or {}}
+        if session_id:
+            message['sessionId'] = session_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[message_id] = future
+        await self._ws.send(json.dumps(message))
+        return await future
+
+    def expect(self, method, session_id=None):
+        """Future for the next event of this kind; create it before sending the command that causes it"""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((method, session_id, future))
+        return future
+
+    async def _read(self):
+        try:
+            async for raw in self._ws:
+                message = json.loads(raw)
+                if 'id' in message:
+                    future = self._pending.pop(message['id'], None)
+                    if future is None or future.done():
+                        continue
+                    if 'error' in message:
+                        future.set_exception(CDPError(message['error'].get('message', str(message['error']))))
+                    else:
+                        future.set_result(message.get('result', {}))
+                    continue
+                for waiter in list(self._waiters):
+                    method, session_id, future = waiter
+                    if method == message.get('method') and session_id == message.get('sessionId'):
+                        self._waiters.remove(waiter)
+                        if not future.done():
+                            future.set_result(message.get('params', {}))
+        except Exception as e:
+            print(f"DevTools connection lost: {str(e)}")
+        finally:
+            for future in list(self._pending.values()) + [w[2] for w in self._waiters]:
+                if not future.done():
+                    future.set_exception(CDPError("DevTools connection closed"))
+            self._pending.clear()
+            self._waiters.clear()
+
+    async def close(self):
+        await self._ws.close()
+        await self._reader
+
+
+class Page:
+    """One tab, driven through its own CDP session"""
+
+    def __init__(self, connection, target_id, session_id):
+        self.connection = connection
+        self.target_id = target_id
+        self.session_id = session_id
+
+    @classmethod
+    async def open(cls, connection, blocked_urls=None):
+        target = await connection.send('Target.createTarget', {'url': 'about:blank'})
+        attached = await connection.send('Target.attachToTarget', {'targetId': target['targetId'], 'flatten': True})
+        page = cls(connection, target['targetId'], attached['sessionId'])
+        await page.send('Page.enable')
+        # Same XHR/fetch tracker the Selenium path installs, so readiness waits behave alike
+        await page.send('Page.addScriptToEvaluateOnNewDocument', {'source': NETWORK_TRACKER_JS})
+        if blocked_urls:
+            await page.send('Network.enable')
+            await page.send('Network.setBlockedURLs', {'urls': list(blocked_urls)})
+        return page
+
+    async def send(self, method, params=None):
+        return await self.connection.send(method, params, self.session_id)
+
+    async def evaluate(self, script, *args):
+        """Run a script written for execute_script (uses arguments and return) and return its value"""
+        expression = f"(function() {{ {script}\n}}).apply(null, {json.dumps(list(args))})"
+        result = await self.send('Runtime.evaluate', {'expression': expression, 'returnByValue': True,
+                                                      'awaitPromise': True})
+        if 'exceptionDetails' in result:
+            details = result['exceptionDetails']
+            raise CDPError(details.get('exception', {}).get('description') or details.get('text', 'script failed'))
+        return result.get('result', {}).get('value')
+
+    async def _wait(self, budget, step, condition, timeout=None):
+        timeout = budget.timeout_for(step) if timeout is None else timeout
+        started = time.monotonic()
+        timed_out = False
+        while not condition(await self.evaluate(READY_STATE_JS)):
+            if time.monotonic() - started >= timeout:
+                timed_out = True
+                print(f"Readiness wait '{step}' hit its {timeout}s deadline, continuing")
+                break
+            await asyncio.sleep(0.1)
+        budget.record(step, time.monotonic() - started, timed_out)
+        return not timed_out
+
+    async def wait_ready(self, budget, step, timeout=None):
+        """Document loaded and network quiet, as wait_for_page_ready()"""
+        return await self._wait(budget, step, lambda state: page_is_ready(state, budget), timeout)
+
+    async def wait_settled(self, budget, step, timeout=None):
+        """The page reacted to an interaction and went quiet, as wait_for_dom_settled()"""
+        return await self._wait(budget, step, lambda state: dom_is_settled(state, budget), timeout)
+
+    async def goto(self, url, budget, step='initial_load'):
+        loaded = self.connection.expect('Page.loadEventFired', self.session_id)
+        result = await self.send('Page.navigate', {'url': url})
+        if result.get('errorText'):
+            loaded.cancel()
+            raise CDPError(f"Could not load {url}: {result['errorText']}")
+        try:
+            await asyncio.wait_for(loaded, budget.timeout_for(step))
+        except asyncio.TimeoutError:
+            print(f"Load event for {url} did not fire within {budget.timeout_for(step)}s, continuing")
+        return await self.wait_ready(budget, step)
+
+    async def click_first(self, candidates, budget, step, unchecked_only=False):
+        """Click the first usable match among candidates and wait for the page to react; returns the selector"""
+        await self.evaluate(ARM_MUTATION_WATCH_JS, 'body')
+        selector = await self.evaluate(CLICK_FIRST_JS, list(candidates), unchecked_only)
+        if selector is not None:
+            await self.wait_settled(budget, step)
+        return selector
+
+    async def set_date(self, date, budget):
+        await self.evaluate(ARM_MUTATION_WATCH_JS, 'body')
+        if not await self.evaluate(SET_DATE_JS, DATE_INPUT_SELECTOR, date):
+            return False
+        await self.wait_settled(budget, 'date_selection')
+        return True
+
+    async def date_value(self):
+        return await self.evaluate(
+            "var el = document.querySelector(arguments[0]); return el ? el.value : null;", DATE_INPUT_SELECTOR)
+
+    async def read_slots(self):
+        """Slot records as built by SLOT_SNAPSHOT_JS"""
+        return await self.evaluate(SLOT_SNAPSHOT_JS, TIME_SLOT_SELECTORS, TIME_SLOT_XPATH) or []
+
+    async def fill_form(self, query, values, required, budget, step='form_fields'):
+        """Poll until the required form fields exist, then fill them in one call.
+
+        Returns {'selectors': {field: selector}, 'filled': count, or None if required fields never appeared}.
+        """
+        timeout = budget.timeout_for(step)
+        started = time.monotonic()
+        while True:
+            result = await self.evaluate(FILL_FORM_JS, query, values, list(required))
+            if result['filled'] is not None or time.monotonic() - started >= timeout:
+                break
+            await asyncio.sleep(0.05)
+        budget.record(step, time.monotonic() - started, result['filled'] is None)
+        return result
+
+    async def close(self):
+        try:
+            await self.connection.send('Target.closeTarget', {'targetId': self.target_id})
+        except CDPError:
+            pass
+
+
+class Browser:
+    """A Chrome process started with remote debugging, and its connection"""
+
+    def __init__(self, process, connection, user_data_dir, remove_dir, blocked_urls=None):
+        self.process = process
+        self.connection = connection
+        self.user_data_dir = user_data_dir
+        self.remove_dir = remove_dir
+        self.blocked_urls = blocked_urls
+
+    @classmethod
+    async def launch(cls, binary, arguments, user_data_dir=None, blocked_urls=None, timeout=20):
+        """Start Chrome and connect to it; without user_data_dir a temporary profile is used and removed on close"""
+        remove_dir = user_data_dir is None
+        if remove_dir:
+            user_data_dir = tempfile.mkdtemp(prefix='slot-checker-cdp-')
+        port_file = os.path.join(user_data_dir, 'DevToolsActivePort')
+        if os.path.exists(port_file):
+            # Left behind by an earlier run on a reused profile
+            os.remove(port_file)
+        process = await asyncio.create_subprocess_exec(
+            binary, *arguments, *CONCURRENCY_ARGUMENTS, '--remote-debugging-port=0',
+            f'--user-data-dir={user_data_dir}', 'about:blank',
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+        try:
+            # Chrome writes the port it picked and the browser endpoint path here
+            deadline = time.monotonic() + timeout
+            while True:
+                if process.returncode is not None:
+                    raise CDPError(f"Chrome exited with code {process.returncode} before accepting connections")
+                try:
+                    with open(port_file) as f:
+                        port, path = f.read().split()[:2]
+                    break
+                except (OSError, ValueError):
+                    pass
+                if time.monotonic() > deadline:
+                    raise CDPError(f"Chrome did not open a DevTools port within {timeout}s")
+                await asyncio.sleep(0.05)
+            connection = await Connection.connect(f"ws://127.0.0.1:{port}{path}")
+        except BaseException:
+            process.kill()
+            await process.wait()
+            if remove_dir:
+                shutil.rmtree(user_data_dir, ignore_errors=True)
+            raise
+        return cls(process, connection, user_data_dir, remove_dir, blocked_urls)
+
+    @property
+    def pid(self):
+        return self.process.pid
+
+    async def new_page(self):
+        return await Page.open(self.connection, self.blocked_urls)
+
+    async def close(self):
+        try:
+            await asyncio.wait_for(self.connection.send('Browser.close'), 5)
+        except (CDPError, asyncio.TimeoutError):
+            pass
+        try:
+            await self.connection.close()
+        except Exception:
+            pass
+        try:
+            await asyncio.wait_for(self.process.wait(), 5)
+        except asyncio.TimeoutError:
+            self.process.kill()
+            await self.process.wait()
+        if self.remove_dir:
+            shutil.rmtree(self.user_data_dir, ignore_errors=True)
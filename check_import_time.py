@@ -0,0 +1,55 @@
+"""Check that importing the slot checker stays fast and side-effect free.
+
+Imports the module in a fresh interpreter a few times and fails if the best
+time is over budget or if a heavy dependency (Selenium, requests, ...) got
+imported eagerly. Run it from the repository root:
+
+    python check_import_time.py --module slot_checker_new --budget-ms 150
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+HEAVY_MODULES = ['selenium', 'webdriver_manager', 'requests', 'bs4', 'schedule', 'dotenv', 'smtplib']
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed_ms = (time.perf_counter() - started) * 1000
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{'ms': elapsed_ms, 'heavy': heavy}}))
+"""
+
+def measure(module, runs):
+    samples = []
+    heavy = set()
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', PROBE.format(module=module, heavy=HEAVY_MODULES)],
+                             capture_output=True, text=True, check=True)
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        samples.append(result['ms'])
+        heavy.update(result['heavy'])
+    return min(samples), sorted(heavy)
+
+def main():
+    parser = argparse.ArgumentParser(description="Check import time of the slot checker")
+    parser.add_argument('--module', default='slot_checker_new')
+    parser.add_argument('--budget-ms', type=float, default=150)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    best_ms, heavy = measure(args.module, args.runs)
+    print(f"import {args.module}: {best_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    failed = False
+    if best_ms > args.budget_ms:
+        print("Import time is over budget")
+        failed = True
+    if heavy:
+        print(f"Heavy modules imported eagerly: {', '.join(heavy)}")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
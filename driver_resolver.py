@@ -0,0 +1,154 @@
+"""Find a chromedriver that matches the installed Chrome, once, and remember it.
+
+webdriver.Chrome() without a service path runs Selenium Manager, and the
+ChromeDriverManager fallback asks the network for the latest release. Both
+can add seconds to every start. resolve_chromedriver() checks a small JSON
+cache first. The cached path is reused while the file still exists and the
+Chrome binary it was checked against has not changed (same path and mtime),
+which costs two stat calls. On a miss, it tries local candidates:
+CHROMEDRIVER_PATH, chromedriver on PATH, the usual Homebrew/apt locations
+and drivers webdriver-manager downloaded earlier. A candidate is accepted
+only when its major version matches Chrome's. The network download is the
+last resort and is skipped entirely when offline.
+"""
+import datetime
+import glob
+import json
+import os
+import re
+import shutil
+import subprocess
+
+KNOWN_DRIVER_PATHS = [
+    '/opt/homebrew/bin/chromedriver',  # Mac with Homebrew
+    '/usr/local/bin/chromedriver',
+    '/usr/bin/chromedriver',  # GitHub Actions Linux (chromium-chromedriver)
+    '/usr/lib/chromium-browser/chromedriver',
+    '/usr/lib/chromium/chromedriver',
+]
+
+BROWSER_NAMES = ['google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome']
+BROWSER_PATHS = ['/Applications/Google Chrome.app/Contents/MacOS/Google Chrome']
+
+# Where webdriver-manager keeps the drivers it has downloaded
+WDM_DRIVER_GLOB = os.path.join(os.path.expanduser('~'), '.wdm', 'drivers', 'chromedriver', '**', 'chromedriver')
+
+
+def find_browser(binary_location=None):
+    """Path of the Chrome/Chromium binary Selenium will launch, or None"""
+    if binary_location:
+        return binary_location
+    for name in BROWSER_NAMES:
+        path = shutil.which(name)
+        if path:
+            return path
+    for path in BROWSER_PATHS:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def binary_version(path):
+    """Dotted version printed by `path --version`, or None when it cannot be run"""
+    try:
+        output = subprocess.run([path, '--version'], capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = re.search(r'(\d+)\.(\d+)\.(\d+)\.(\d+)', output)
+    return match.group(0) if match else None
+
+
+def major(version):
+    return version.split('.')[0] if version else None
+
+
+def _executable(path):
+    return bool(path) and os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path) if path else None
+    except OSError:
+        return None
+
+
+def local_candidates():
+    """chromedriver binaries on this machine, most specific first"""
+    candidates = [os.environ.get('CHROMEDRIVER_PATH'), shutil.which('chromedriver')]
+    candidates += KNOWN_DRIVER_PATHS
+    # Newest webdriver-manager download first
+    candidates += sorted(glob.glob(WDM_DRIVER_GLOB, recursive=True), key=_mtime, reverse=True)
+    return [path for path in dict.fromkeys(candidates) if _executable(path)]
+
+
+class DriverCache:
+    """The resolved chromedriver, stored as JSON next to the slot state"""
+
+    def __init__(self, path='.chromedriver.json'):
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, entry):
+        entry = dict(entry, resolved_at=datetime.datetime.now().isoformat(timespec='seconds'))
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(entry, f, indent=2)
+        os.replace(tmp, self.path)
+
+    def forget(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def resolve_chromedriver(cache, binary_location=None, offline=False, use_cache=True):
+    """(chromedriver path, source) where source is 'cache', 'local' or 'download'; (None, None) if nothing fits.
+
+    A local driver whose version cannot be matched against Chrome is still
+    used when nothing better is available, rather than failing outright.
+    """
+    browser = find_browser(binary_location)
+    if use_cache:
+        entry = cache.load()
+        if (entry and _executable(entry.get('path'))
+                and entry.get('browser') == browser and entry.get('browser_mtime') == _mtime(browser)):
+            return entry['path'], 'cache'
+
+    browser_version = binary_version(browser) if browser else None
+    fallback = None
+    for path in local_candidates():
+        driver_version = binary_version(path)
+        if browser_version is None or major(driver_version) == major(browser_version):
+            return _remember(cache, path, driver_version, browser, browser_version), 'local'
+        print(f"Skipping chromedriver {driver_version} at {path}: Chrome is {browser_version}")
+        fallback = fallback or path
+
+    if not offline:
+        try:
+            from webdriver_manager.chrome import ChromeDriverManager
+            path = ChromeDriverManager().install()
+            return _remember(cache, path, binary_version(path), browser, browser_version), 'download'
+        except Exception as e:
+            print(f"Could not download chromedriver: {str(e)}")
+
+    if fallback:
+        # Not cached: the version mismatch should be looked at again next time
+        return fallback, 'local'
+    return None, None
+
+
+def _remember(cache, path, driver_version, browser, browser_version):
+    try:
+        cache.save({'path': path, 'version': driver_version, 'browser': browser,
+                    'browser_version': browser_version, 'browser_mtime': _mtime(browser)})
+    except OSError as e:
+        print(f"Could not cache chromedriver path: {str(e)}")
+    return path
@@ -0,0 +1,72 @@
+"""Booking form field lookup that races every candidate selector at once.
+
+Instead of waiting out a timeout per selector, each poll runs one DOM query
+over all candidates for all requested fields, and the whole lookup shares a
+single short deadline. The selector that found each field is remembered and
+tried first next time, across runs when a SelectorCache is given.
+"""
+import threading
+import time
+
+from page_selectors import BOOKING_FORM_SELECTORS, RESOLVE_FIELDS_JS
+
+
+class FieldResolver:
+    """Finds booking form fields and remembers which selector won for each"""
+
+    def __init__(self, selectors=None, poll_interval=0.05, cache=None):
+        self.selectors = selectors or BOOKING_FORM_SELECTORS
+        self.poll_interval = poll_interval
+        self.cache = cache
+        self.winners = {}
+        self._lock = threading.Lock()
+
+    def candidates(self, field):
+        """Candidate selectors for a field, last winner first"""
+        if self.cache is not None:
+            return self.cache.ranked(f"form_{field}", self.selectors[field])
+        ordered = list(self.selectors[field])
+        with self._lock:
+            winner = self.winners.get(field)
+        if winner in ordered:
+            ordered.remove(winner)
+            ordered.insert(0, winner)
+        return ordered
+
+    def resolve(self, driver, fields, budget, required=None, step='form_fields', timeout=None):
+        """Return {field: element or None} once every required field is found or the deadline passes.
+
+        required defaults to all fields; optional fields are picked up if they
+        are present by then but are not waited for.
+        """
+        from selenium.common.exceptions import WebDriverException
+
+        required = set(fields if required is None else required)
+        query = [[field, self.candidates(field)] for field in fields]
+        timeout = budget.timeout_for(step) if timeout is None else timeout
+        started = time.monotonic()
+        found = {}
+        while True:
+            try:
+                found = driver.execute_script(RESOLVE_FIELDS_JS, query) or {}
+            except WebDriverException as e:
+                print(f"Form field lookup failed: {str(e)}")
+                found = {}
+            if required.issubset(found) or time.monotonic() - started >= timeout:
+                break
+            time.sleep(self.poll_interval)
+
+        missing = sorted(required - set(found))
+        budget.record(step, time.monotonic() - started, bool(missing))
+        if missing:
+            print(f"Form fields not found within {timeout}s: {', '.join(missing)}")
+        with self._lock:
+            for field, match in found.items():
+                self.winners[field] = match['selector']
+        if self.cache is not None:
+            for field, candidates in query:
+                if field in found:
+                    self.cache.record(f"form_{field}", found[field]['selector'], found[field]['selector'] == candidates[0])
+                elif field in required:
+                    self.cache.forget(f"form_{field}")
+        return {field: found[field]['element'] if field in found else None for field in fields}
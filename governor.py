@@ -0,0 +1,272 @@
+"""Keeps browser sessions inside memory and time ceilings and leaves none behind.
+
+Every chromedriver (or CDP Chrome) the checker starts is tracked by its root
+process. A watchdog thread samples each session's process tree from /proc:
+resident memory, CPU time and the pids in it. A session over max_rss_mb or
+older than max_seconds is killed; the code driving it then fails its next
+command and recovers the way it does from a crashed browser. The daemon's
+warm browser is recycled between cycles before it gets that far
+(recycle_fraction of either limit).
+
+Quitting a driver kills whatever is left of its tree, so a Chrome that
+outlives chromedriver does not leak. The pids of live sessions are written
+to a pidfile with their start times. If the process is killed outright (for
+example at the workflow timeout), the next run finds the leftover browsers
+and kills them, but only those still running since the recorded start time:
+after a reboot or once a pid is reused, the pid belongs to another program.
+SIGTERM and interpreter exit kill the tracked sessions too.
+"""
+import atexit
+import json
+import os
+import signal
+import threading
+import time
+
+from browser_profile import process_start_ticks, process_table, process_tree_usage
+
+DEFAULTS = {
+    'max_rss_mb': 1500,
+    'max_seconds': 3600,
+    'recycle_fraction': 0.8,
+    'sample_seconds': 2,
+    'pidfile': '.browser-pids.json',
+}
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _is_browser(pid):
+    try:
+        with open(f'/proc/{pid}/cmdline', 'rb') as f:
+            return b'chrom' in f.read().lower()
+    except OSError:
+        return False
+
+
+def _boot_id():
+    try:
+        with open('/proc/sys/kernel/random/boot_id') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def kill_pids(pids):
+    """SIGKILL each pid that is still running; returns how many were killed"""
+    killed = 0
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGKILL)
+            killed += 1
+        except (ProcessLookupError, PermissionError):
+            pass
+    return killed
+
+
+class Session:
+    """Resource use of one tracked browser process tree"""
+
+    def __init__(self, pid, label):
+        self.pid = pid
+        self.label = label
+        self.started = time.monotonic()
+        self.ended = None
+        self.pids = {pid}
+        self.rss_mb = 0.0
+        self.peak_rss_mb = 0.0
+        self.cpu_seconds = 0.0
+        self.killed = None
+
+    @property
+    def age(self):
+        return (self.ended or time.monotonic()) - self.started
+
+
+class SessionGovernor:
+    """Tracks browser sessions, enforces their ceilings and reports what they used"""
+
+    def __init__(self, settings=None):
+        merged = dict(DEFAULTS)
+        merged.update(settings or {})
+        self.settings = merged
+        self.sessions = {}
+        self.finished = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._installed = False
+        self.reap_orphans()
+
+    def install(self):
+        """Kill tracked sessions on exit and on SIGTERM; call from the main thread"""
+        if self._installed:
+            return self
+        self._installed = True
+        atexit.register(self.shutdown)
+        if threading.current_thread() is threading.main_thread():
+            previous = signal.getsignal(signal.SIGTERM)
+
+            def on_term(signum, frame):
+                print("Terminated; closing browser sessions")
+                self.shutdown()
+                if callable(previous):
+                    previous(signum, frame)
+                raise SystemExit(128 + signum)
+
+            signal.signal(signal.SIGTERM, on_term)
+        return self
+
+    def track(self, pid, label):
+        if not pid:
+            return
+        with self._lock:
+            self.sessions[pid] = Session(pid, label)
+        self._sample()
+        if self._thread is None and os.path.isdir('/proc'):
+            self._thread = threading.Thread(target=self._watch, name='session-governor', daemon=True)
+            self._thread.start()
+
+    def release(self, pid):
+        """Stop tracking a session after its driver quit, killing anything left of its tree"""
+        with self._lock:
+            session = self.sessions.pop(pid, None)
+        if session is None:
+            return
+        with self._lock:
+            # A pid can be reused by another session's Chrome once its own process exits
+            others = {p for other in self.sessions.values() for p in other.pids}
+        leftover = [p for p in session.pids if p not in others and _alive(p) and _is_browser(p)]
+        if leftover:
+            kill_pids(leftover)
+            print(f"Killed {len(leftover)} browser processes left behind by {session.label}")
+        session.ended = time.monotonic()
+        with self._lock:
+            self.finished.append(session)
+        self._write_pidfile()
+
+    def problem(self, pid):
+        """Why a session should be recycled before it hits a ceiling, or None"""
+        with self._lock:
+            session = self.sessions.get(pid)
+        if session is None:
+            return None
+        fraction = self.settings['recycle_fraction']
+        if session.rss_mb > self.settings['max_rss_mb'] * fraction:
+            return f"browser RSS at {session.rss_mb:.0f} MB"
+        if session.age > self.settings['max_seconds'] * fraction:
+            return f"browser running for {session.age:.0f}s"
+        return None
+
+    def _sample(self):
+        table = process_table()
+        over = []
+        with self._lock:
+            for session in self.sessions.values():
+                usage = process_tree_usage(session.pid, table)
+                if usage is None:
+                    continue
+                session.rss_mb, cpu_seconds, pids = usage
+                session.cpu_seconds = max(session.cpu_seconds, cpu_seconds)
+                session.pids = set(pids)
+                session.peak_rss_mb = max(session.peak_rss_mb, session.rss_mb)
+                if session.killed:
+                    continue
+                if session.rss_mb > self.settings['max_rss_mb']:
+                    session.killed = f"RSS {session.rss_mb:.0f} MB over {self.settings['max_rss_mb']} MB"
+                elif session.age > self.settings['max_seconds']:
+                    session.killed = f"running over {self.settings['max_seconds']}s"
+                else:
+                    continue
+                over.append(session)
+        for session in over:
+            print(f"Killing {session.label}: {session.killed}")
+            kill_pids(sorted(session.pids, reverse=True))
+        self._write_pidfile()
+
+    def _watch(self):
+        while not self._stop.wait(self.settings['sample_seconds']):
+            try:
+                self._sample()
+            except Exception as e:
+                print(f"Session watchdog error: {str(e)}")
+
+    def _write_pidfile(self):
+        path = self.settings['pidfile']
+        if not path:
+            return
+        with self._lock:
+            pids = sorted(p for session in self.sessions.values() for p in session.pids)
+        started = {str(p): process_start_ticks(p) for p in pids}
+        try:
+            if pids:
+                with open(path, 'w') as f:
+                    json.dump({'owner': os.getpid(), 'boot_id': _boot_id(),
+                               'pids': {p: ticks for p, ticks in started.items() if ticks is not None}}, f)
+            elif os.path.exists(path):
+                os.remove(path)
+        except OSError as e:
+            print(f"Could not update {path}: {str(e)}")
+
+    def reap_orphans(self):
+        """Kill browsers recorded by a run that died without cleaning up.
+
+        A recorded pid is killed only when the machine has not rebooted since
+        and the process running under it started when the recorded one did;
+        anything else is some other program that got the pid.
+        """
+        path = self.settings['pidfile']
+        if not path or not os.path.exists(path):
+            return 0
+        try:
+            with open(path) as f:
+                recorded = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if recorded.get('owner') != os.getpid() and _alive(recorded.get('owner', 0)):
+            # That run is still going; its browsers are not orphans
+            return 0
+        pids = recorded.get('pids')
+        if not isinstance(pids, dict) or recorded.get('boot_id') != _boot_id():
+            # Written before a reboot (or without start times): nothing in it can be matched safely
+            pids = {}
+        killed = kill_pids([int(p) for p, ticks in pids.items()
+                            if process_start_ticks(int(p)) == ticks and _is_browser(int(p))])
+        if killed:
+            print(f"Killed {killed} browser processes orphaned by an earlier run")
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return killed
+
+    def report(self):
+        """Print peak memory, CPU time and lifetime per session, then forget finished ones"""
+        with self._lock:
+            sessions = self.finished + list(self.sessions.values())
+            self.finished = []
+        if not sessions:
+            return
+        print("Browser sessions:")
+        for session in sessions:
+            killed = f", killed: {session.killed}" if session.killed else ""
+            print(f"  {session.label}: peak RSS {session.peak_rss_mb:.0f} MB, CPU {session.cpu_seconds:.1f}s, "
+                  f"{session.age:.0f}s{killed}")
+
+    def shutdown(self):
+        """Kill every tracked session; safe to call more than once"""
+        self._stop.set()
+        with self._lock:
+            sessions = list(self.sessions.values())
+            self.sessions = {}
+        for session in sessions:
+            kill_pids(sorted(p for p in session.pids if _alive(p) and _is_browser(p)))
+        self._write_pidfile()
@@ -0,0 +1,143 @@
+"""Browser-free availability checks over plain HTTP.
+
+Fetches the reservation availability with a pooled requests.Session and
+parses it into the same list of slot texts that the Selenium scan builds in
+available_times. The endpoint may answer with JSON (the payload the booking
+page itself fetches) or with server-rendered HTML; both are handled. Point
+availability_url at a local server to run against fixtures.
+"""
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from page_selectors import TIME_SLOT_SELECTORS, UNAVAILABLE_SLOT_LABELS
+from planner import TIME_PATTERN, parse_slot_time
+
+# Keys in a JSON availability payload that mark a slot as not bookable
+UNAVAILABLE_FLAGS = ('full', 'disabled', 'unavailable', 'sold_out', 'closed')
+AVAILABLE_FLAGS = ('available', 'bookable', 'open')
+
+DEFAULT_HEADERS = {
+    'User-Agent': ("Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36"),
+    'Accept': 'application/json, text/html;q=0.9, */*;q=0.8',
+}
+
+
+def default_availability_url(booking_url):
+    """Derive the timetable endpoint from a TableCheck /reserve URL"""
+    base = booking_url.rstrip('/')
+    if base.endswith('/reserve'):
+        base = base[:-len('/reserve')]
+    return base + '/available/timetable'
+
+
+def build_session(pool_size=10, retries=2):
+    """A requests.Session with a connection pool and retries on transient errors"""
+    session = requests.Session()
+    retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=('GET',))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+
+def _slot_is_available(record):
+    for key in UNAVAILABLE_FLAGS:
+        if record.get(key):
+            return False
+    for key in AVAILABLE_FLAGS:
+        if key in record and not record[key]:
+            return False
+    return True
+
+
+def _time_text(text, match):
+    """HH:MM (24-hour) for a matched time; as written when its AM/PM is ambiguous"""
+    minutes = parse_slot_time(text[match.start():])
+    if minutes is None:
+        return match.group(0)
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _slot_time(record):
+    for key in ('time', 'start_time', 'start_at', 'label', 'name', 'text'):
+        value = record.get(key)
+        if isinstance(value, str):
+            match = TIME_PATTERN.search(value)
+            if match:
+                return _time_text(value, match)
+    return None
+
+
+def parse_slot_payload(data):
+    """Collect bookable slot times from an arbitrary JSON availability payload.
+
+    Walks the structure looking for objects that carry a time; objects flagged
+    as full/disabled/unavailable are skipped. Times are returned in order of
+    first appearance without duplicates.
+    """
+    times = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            slot_time = _slot_time(node)
+            if slot_time:
+                if _slot_is_available(node) and slot_time not in times:
+                    times.append(slot_time)
+                return
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for item in node:
+                if isinstance(item, str):
+                    match = TIME_PATTERN.fullmatch(item.strip())
+                    if match and _time_text(item.strip(), match) not in times:
+                        times.append(_time_text(item.strip(), match))
+                else:
+                    walk(item)
+
+    walk(data)
+    return times
+
+
+def parse_slot_html(html):
+    """Extract slot texts from HTML with the same selectors the browser scan uses"""
+    soup = BeautifulSoup(html, 'html.parser')
+    for selector in TIME_SLOT_SELECTORS:
+        elements = soup.select(selector)
+        if not elements:
+            continue
+        available_times = []
+        for element in elements:
+            slot_text = element.get_text(strip=True)
+            if slot_text and slot_text not in UNAVAILABLE_SLOT_LABELS:
+                available_times.append(slot_text)
+        return available_times
+    return []
+
+
+class AvailabilityClient:
+    """Checks slot availability over HTTP, reusing one pooled session"""
+
+    def __init__(self, booking_url, availability_url=None, session=None, timeout=10):
+        self.booking_url = booking_url
+        self.availability_url = availability_url or default_availability_url(booking_url)
+        self.session = session or build_session()
+        self.timeout = timeout
+
+    def fetch_available_times(self, date, num_adults):
+        """Return the bookable slot texts for one (date, adults) combination"""
+        params = {'date': date, 'num_people': num_adults}
+        response = self.session.get(self.availability_url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        content_type = response.headers.get('Content-Type', '')
+        if 'json' in content_type:
+            return parse_slot_payload(response.json())
+        return parse_slot_html(response.text)
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,108 @@
+"""Slot data read from the availability responses the booking page fetches.
+
+The reservation widget loads each (date, party size) timetable as JSON
+before it renders any slot buttons. With the performance log enabled,
+chromedriver records every network event. ResponseCapture picks out the
+finished JSON responses whose URL looks like an availability request,
+fetches the body of the one matching the probe through
+Network.getResponseBody, and parses it with the same parse_slot_payload()
+the HTTP backend uses. The bookable times then come from the payload, not
+from guessing which rendered buttons are slots.
+"""
+import base64
+import json
+import re
+from urllib.parse import parse_qsl, urlparse
+
+# URLs of XHR/fetch responses that may carry availability
+DEFAULT_RESPONSE_PATTERN = r'available|timetable|availability'
+
+
+def enable_performance_log(options):
+    """Ask chromedriver to keep the DevTools network events readable with get_log('performance')"""
+    options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
+
+def performance_entries(driver):
+    """Read (and empty) the driver's performance log.
+
+    Reading the log empties it, so this is its only reader. Every batch is
+    handed to the driver's recorder and appended to its response_backlog (when
+    it has one), so a recording snapshot does not take entries ResponseCapture
+    still needs.
+    """
+    entries = driver.get_log('performance')
+    recorder = getattr(driver, 'recorder', None)
+    if recorder is not None:
+        recorder.capture(driver, entries)
+    backlog = getattr(driver, 'response_backlog', None)
+    if backlog is not None:
+        backlog.extend(entries)
+    return entries
+
+
+class ResponseCapture:
+    """Finds availability responses in a driver's performance log"""
+
+    def __init__(self, pattern=DEFAULT_RESPONSE_PATTERN):
+        self.pattern = re.compile(pattern)
+
+    def drain(self, driver):
+        """[(request id, url), ...] of finished JSON availability responses since the last call, oldest first"""
+        from selenium.common.exceptions import WebDriverException
+
+        try:
+            entries = performance_entries(driver)
+        except WebDriverException as e:
+            print(f"Could not read the performance log: {str(e)}")
+            entries = []
+        backlog = getattr(driver, 'response_backlog', None)
+        if backlog is not None:
+            # Includes what other readers (the recorder's snapshots) took since the last call
+            entries = list(backlog)
+            backlog.clear()
+        candidates = {}
+        finished = []
+        for entry in entries:
+            try:
+                event = json.loads(entry['message'])['message']
+            except (KeyError, TypeError, ValueError):
+                continue
+            params = event.get('params', {})
+            if event.get('method') == 'Network.responseReceived':
+                response = params.get('response', {})
+                if 'json' in response.get('mimeType', '') and self.pattern.search(response.get('url', '')):
+                    candidates[params['requestId']] = response['url']
+            elif event.get('method') == 'Network.loadingFinished' and params.get('requestId') in candidates:
+                finished.append((params['requestId'], candidates[params['requestId']]))
+        return finished
+
+    def latest_times(self, driver, date, num_adults):
+        """(bookable times, url) from the response that best matches the probe, or None if none names its date.
+
+        Only responses whose URL names the date count: one for another date
+        (a prefetch, or the page's default day) would report the wrong slots,
+        and the caller is better off reading the DOM. A response naming the
+        party size wins over others; among equals the latest one does.
+        """
+        from selenium.common.exceptions import WebDriverException
+        from http_availability import parse_slot_payload
+
+        def values(url):
+            return [value for _, value in parse_qsl(urlparse(url).query)]
+
+        def score(item):
+            return (str(num_adults) in values(item[1][1]), item[0])
+
+        matching = [(index, response) for index, response in enumerate(self.drain(driver))
+                    if date in values(response[1]) or date in response[1]]
+        responses = sorted(matching, key=score, reverse=True)
+        for _, (request_id, url) in responses:
+            try:
+                body = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+                text = base64.b64decode(body['body']).decode() if body.get('base64Encoded') else body['body']
+                return parse_slot_payload(json.loads(text)), url
+            except (WebDriverException, KeyError, ValueError) as e:
+                # Evicted from the browser's buffer or not JSON after all; try the next one
+                print(f"Could not read availability response {url}: {str(e)}")
+        return None
@@ -0,0 +1,194 @@
+"""Background email notifications over a reused SMTP connection.
+
+send() only queues the message; a worker thread delivers it, keeping one
+authenticated connection open between messages and reconnecting with
+exponential backoff when it drops. Messages sent inside a cycle() block are
+merged into a single digest per recipient when the block exits, so several
+slot hits in one scan cost one email to each person. Point host/port at a local SMTP stand-in (e.g.
+`python -m aiosmtpd -n -l localhost:8025`) with starttls off to test it.
+"""
+import queue
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+_STOP = object()
+
+
+class EmailNotifier:
+    """Queues notifications and delivers them from a background thread"""
+
+    def __init__(self, sender, password, recipient, host='smtp.gmail.com', port=587,
+                 starttls=True, max_retries=3, backoff_seconds=1.0, idle_timeout=240):
+        self.sender = sender
+        self.password = password
+        self.recipient = recipient
+        self.host = host
+        self.port = port
+        self.starttls = starttls
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        # Servers drop idle sessions; reconnect instead of reusing one older than this
+        self.idle_timeout = idle_timeout
+        self.sent = 0
+        self.failed = 0
+        self._queue = queue.Queue()
+        self._server = None
+        self._last_used = 0.0
+        self._thread = None
+        self._cycle_lock = threading.Lock()
+        self._cycle_depth = 0
+        self._pending = []
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='email-notifier', daemon=True)
+            self._thread.start()
+        return self
+
+    def send(self, subject, message, recipient=None):
+        """Queue a message for recipient (default: the notifier's); inside a cycle() it is held back for the digest"""
+        recipient = recipient or self.recipient
+        with self._cycle_lock:
+            if self._cycle_depth:
+                self._pending.append((subject, message, recipient))
+                return
+        self.start()
+        self._queue.put((subject, message, recipient))
+
+    @contextmanager
+    def cycle(self):
+        """Coalesce every message sent inside the block into one digest email per recipient"""
+        with self._cycle_lock:
+            self._cycle_depth += 1
+        try:
+            yield self
+        finally:
+            with self._cycle_lock:
+                self._cycle_depth -= 1
+                pending = self._pending if self._cycle_depth == 0 else []
+                if self._cycle_depth == 0:
+                    self._pending = []
+            if pending:
+                self.start()
+                by_recipient = {}
+                for subject, message, recipient in pending:
+                    by_recipient.setdefault(recipient, []).append((subject, message))
+                for recipient, messages in by_recipient.items():
+                    self._queue.put(build_digest(messages) + (recipient,))
+
+    def flush(self, timeout=None):
+        """Block until every queued message has been delivered or given up on"""
+        if self._thread is None:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def close(self, timeout=30):
+        """Deliver what is queued, then stop the worker and log out"""
+        if self._thread is None:
+            return
+        self.flush(timeout)
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    self._disconnect()
+                    return
+                self._deliver(*item)
+            finally:
+                self._queue.task_done()
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=30)
+        # has_extn() only knows what the last EHLO advertised, and STARTTLS forgets it
+        server.ehlo()
+        if self.starttls:
+            server.starttls()
+            server.ehlo()
+        if self.password and server.has_extn('auth'):
+            server.login(self.sender, self.password)
+        return server
+
+    def _disconnect(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._server = None
+
+    def _connection(self):
+        """Reuse the open session if it is recent and still answers NOOP"""
+        if self._server is not None:
+            if time.monotonic() - self._last_used > self.idle_timeout:
+                self._disconnect()
+            else:
+                try:
+                    if self._server.noop()[0] == 250:
+                        return self._server
+                except (smtplib.SMTPException, OSError):
+                    pass
+                self._disconnect()
+        self._server = self._connect()
+        return self._server
+
+    def _deliver(self, subject, message, recipient):
+        msg = MIMEMultipart()
+        msg['From'] = self.sender
+        msg['To'] = recipient
+        msg['Subject'] = subject
+        msg.attach(MIMEText(message, 'plain'))
+
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                self._connection().send_message(msg)
+                self._last_used = time.monotonic()
+                self.sent += 1
+                print(f"Email notification sent successfully: {subject}")
+                return True
+            except (smtplib.SMTPException, OSError) as e:
+                self._disconnect()
+                if attempt == self.max_retries:
+                    break
+                delay = self.backoff_seconds * (2 ** (attempt - 1))
+                print(f"Error sending email (attempt {attempt}/{self.max_retries}), retrying in {delay:.0f}s: {str(e)}")
+                time.sleep(delay)
+        self.failed += 1
+        print(f"Error sending email: giving up on '{subject}'")
+        return False
+
+
+def build_digest(messages):
+    """Merge (subject, message) pairs into one; a single message is passed through"""
+    if len(messages) == 1:
+        return messages[0]
+    subject = f"Pizza 4P's Slot Checker - {len(messages)} notifications"
+    sections = [f"{subject_line}\n{'-' * len(subject_line)}\n{body}" for subject_line, body in messages]
+    return subject, "\n\n".join(sections)
+
+
+class PrintNotifier:
+    """Stands in for EmailNotifier on dry runs and replays: prints what would have been sent"""
+
+    def send(self, subject, message, recipient=None):
+        print(f"[dry run] Not sending '{subject}'" + (f" to {recipient}" if recipient else ""))
+
+    @contextmanager
+    def cycle(self):
+        yield self
+
+    def close(self, timeout=None):
+        pass
@@ -0,0 +1,224 @@
+"""Selectors for the TableCheck reservation page shared by the browser and HTTP checkers"""
+
+# Tried in order; the first selector that matches anything wins
+TIME_SLOT_SELECTORS = [
+    ".time-slot:not(.disabled)",
+    "[data-testid='time-slot']:not([disabled])",
+    ".available-time",
+    "button.available",
+    "button:not([disabled])",
+    "[role='button']:not([disabled])",
+    "a.time-slot",
+    "div.time-slot"
+]
+
+# Lookups that try candidates one by one start with the selector that last
+# worked (see selector_cache.py). Entries starting with "/" are XPath.
+CONFIRM_CHECKBOX_SELECTORS = [
+    "input[type='checkbox']",
+    ".checkbox",
+    "[type='checkbox']",
+    "#confirm",
+    "[name*='confirm']",
+    "//input[@type='checkbox'][ancestor::*[contains(text(), 'confirm') or contains(text(), 'read') or contains(text(), 'agree')]]",
+]
+
+GUEST_BUTTON_SELECTORS = [
+    ".guest-count-button",
+    "[data-testid='guest-count-button']",
+    "select[name='adults']",
+    "#adults",
+    "//button[contains(., 'Guest') or contains(., 'People') or contains(., 'Adult')]",
+]
+
+# The party size option shown once the guest button is open; format with n
+GUEST_OPTION_XPATH = "//button[text()='{n}'] | //option[text()='{n}'] | //div[text()='{n}']"
+
+DATE_INPUT_SELECTOR = "input[type='date'], [data-testid='date-picker-input'], input.date-input"
+
+
+def locator(selector):
+    """(By, value) for a selector from these lists, without importing selenium"""
+    if selector.startswith('/'):
+        return ('xpath', selector)
+    return ('css selector', selector)
+
+
+# Slot labels that mean the slot cannot be booked
+UNAVAILABLE_SLOT_LABELS = ['FULL', 'CLOSED', 'UNAVAILABLE']
+
+# Last resort when none of the CSS selectors match: anything clickable that might be a slot
+TIME_SLOT_XPATH = "//button[not(@disabled)] | //div[@role='button' and not(@disabled)] | //a[contains(@class, 'time') or contains(@class, 'slot')]"
+
+# Snapshot every candidate slot in one round-trip. Tries the CSS selectors in
+# order (then the XPath), tags each match with data-slot-checker-id so it can
+# be found again with a plain selector, and returns one record per slot.
+SLOT_SNAPSHOT_JS = """
+var selectors = arguments[0], xpath = arguments[1];
+var stale = document.querySelectorAll('[data-slot-checker-id]');
+for (var s = 0; s < stale.length; s++) { stale[s].removeAttribute('data-slot-checker-id'); }
+
+var elements = [], matchedBy = null;
+for (var i = 0; i < selectors.length && !elements.length; i++) {
+    try {
+        elements = Array.prototype.slice.call(document.querySelectorAll(selectors[i]));
+        matchedBy = selectors[i];
+    } catch (e) {
+        elements = [];
+    }
+}
+if (!elements.length && xpath) {
+    var snap = document.evaluate(xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    for (var j = 0; j < snap.snapshotLength; j++) { elements.push(snap.snapshotItem(j)); }
+    matchedBy = 'xpath';
+}
+
+return elements.map(function(el, idx) {
+    el.setAttribute('data-slot-checker-id', idx);
+    var label = (el.innerText || el.textContent || '').trim();
+    var match = label.match(/(^|[^0-9])([0-9]{1,2}:[0-9]{2})(?![0-9])/);
+    return {
+        index: idx,
+        label: label,
+        time: match ? match[2] : null,
+        enabled: !(el.disabled || el.getAttribute('aria-disabled') === 'true' || el.classList.contains('disabled')),
+        selector: '[data-slot-checker-id="' + idx + '"]',
+        matchedBy: matchedBy
+    };
+});
+"""
+
+# Booking form fields and their candidate selectors, best guess first. Entries
+# starting with "/" are XPath expressions.
+BOOKING_FORM_SELECTORS = {
+    'name': [
+        "input[name='firstName']",
+        "[data-testid='first-name-input']",
+        "input[placeholder*='name' i]",
+        "input[id*='name' i]",
+        "input[name*='name' i]",
+    ],
+    'phone': [
+        "input[name='phone']",
+        "[data-testid='phone-input']",
+        "input[placeholder*='phone' i]",
+        "input[id*='phone' i]",
+        "input[name*='phone' i]",
+        "input[type='tel']",
+    ],
+    'email': [
+        "input[name='email']",
+        "[data-testid='email-input']",
+        "input[placeholder*='email' i]",
+        "input[id*='email' i]",
+        "input[name*='email' i]",
+        "input[type='email']",
+    ],
+    'terms': [
+        "input[type='checkbox']",
+        "[data-testid='terms-checkbox']",
+        ".terms-checkbox",
+        "input[id*='terms' i]",
+        "input[name*='terms' i]",
+    ],
+    'submit': [
+        "button[type='submit']",
+        "[data-testid='submit-button']",
+        ".submit-button",
+        "button.primary",
+        "button.submit",
+        "input[type='submit']",
+        "//button[contains(., 'Book')]",
+        "//button[contains(., 'Reserve')]",
+        "//button[contains(., 'Submit')]",
+        "//button[contains(., 'Confirm')]",
+    ],
+}
+
+# Look up every requested field in one round-trip. arguments[0] is a list of
+# [field, [candidate selectors...]]; for each field the first candidate that
+# matches wins, and the element is returned with the selector that found it.
+RESOLVE_FIELDS_JS = """
+var fields = arguments[0], found = {};
+for (var f = 0; f < fields.length; f++) {
+    var name = fields[f][0], candidates = fields[f][1];
+    for (var c = 0; c < candidates.length; c++) {
+        var selector = candidates[c], el = null;
+        try {
+            if (selector.charAt(0) === '/') {
+                el = document.evaluate(selector, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+            } else {
+                el = document.querySelector(selector);
+            }
+        } catch (e) {
+            el = null;
+        }
+        if (el) {
+            found[name] = {element: el, selector: selector};
+            break;
+        }
+    }
+}
+return found;
+"""
+
+# Fill several inputs in one round-trip. arguments[0] is a list of
+# [element, value]. The value goes through the native setter followed by
+# input/change events so framework-controlled inputs (React) pick it up.
+FILL_FIELDS_JS = """
+var pairs = arguments[0], filled = 0;
+for (var i = 0; i < pairs.length; i++) {
+    var el = pairs[i][0], value = pairs[i][1];
+    if (!el) { continue; }
+    var proto = el instanceof HTMLTextAreaElement ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+    var setter = Object.getOwnPropertyDescriptor(proto, 'value').set;
+    el.focus();
+    setter.call(el, value);
+    el.dispatchEvent(new Event('input', {bubbles: true}));
+    el.dispatchEvent(new Event('change', {bubbles: true}));
+    el.blur();
+    filled++;
+}
+return filled;
+"""
+
+# Click the first usable element matched by any candidate, in order, for
+# callers that cannot hold element references (the CDP engine). arguments[0]
+# is the candidate list; with arguments[1] set, ticked checkboxes are skipped.
+# Hidden and disabled elements are skipped. Returns the selector that matched,
+# or null.
+CLICK_FIRST_JS = """
+var candidates = arguments[0], uncheckedOnly = arguments[1];
+for (var c = 0; c < candidates.length; c++) {
+    var selector = candidates[c], elements = [];
+    try {
+        if (selector.charAt(0) === '/') {
+            var snap = document.evaluate(selector, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            for (var i = 0; i < snap.snapshotLength; i++) { elements.push(snap.snapshotItem(i)); }
+        } else {
+            elements = Array.prototype.slice.call(document.querySelectorAll(selector));
+        }
+    } catch (e) {
+        elements = [];
+    }
+    for (var j = 0; j < elements.length; j++) {
+        var el = elements[j];
+        if (el.disabled || (uncheckedOnly && el.checked) || !el.getClientRects().length) { continue; }
+        el.click();
+        return selector;
+    }
+}
+return null;
+"""
+
+# Set the date input through the native setter so framework-controlled inputs
+# see the change. arguments[0] is DATE_INPUT_SELECTOR, arguments[1] the date.
+SET_DATE_JS = """
+var el = document.querySelector(arguments[0]);
+if (!el) { return false; }
+var setter = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
+setter.call(el, arguments[1]);
+el.dispatchEvent(new Event('input', {bubbles: true}));
+el.dispatchEvent(new Event('change', {bubbles: true}));
+return true;
+"""
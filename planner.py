@@ -0,0 +1,85 @@
+"""Builds the probe plan from config.json and trims slots to the wanted window.
+
+The plan lists, per target date, the party sizes to probe from largest to
+smallest within num_adults_range; a date is done as soon as one size has
+slots in the window, since smaller parties rank lower. Slots outside
+time_range are dropped before any notification or booking work.
+"""
+import re
+
+# HH:MM, optionally followed by AM/PM ("7:00 PM", "7:00pm", "7:00 p.m.")
+TIME_PATTERN = re.compile(r'(?<!\d)([01]?\d|2[0-3]):([0-5]\d)(?!\d)(?:\s*([AaPp])\.?[Mm]\b\.?)?')
+
+
+def party_sizes(num_adults_range, default):
+    """Party sizes to probe, largest first; default when no range is configured"""
+    if not num_adults_range:
+        return list(default)
+    low, high = int(num_adults_range['min']), int(num_adults_range['max'])
+    if low > high:
+        low, high = high, low
+    return list(range(high, low - 1, -1))
+
+
+def build_probe_plan(target_dates, sizes):
+    """[(date, [party sizes...]), ...] in rank order: config date order, larger parties first"""
+    return [(date, list(sizes)) for date in target_dates]
+
+
+def parse_slot_time(label):
+    """Minutes since midnight for the first HH:MM (24-hour, or 12-hour with AM/PM) in a slot label, or None.
+
+    Ambiguous times also give None: a 12-hour time whose hour is not 1-12
+    ("13:00 PM"), or one without AM/PM followed by one with it ("7:00 - 9:00 PM").
+    """
+    if not label:
+        return None
+    match = TIME_PATTERN.search(label)
+    if not match:
+        return None
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2)), match.group(3)
+    if not meridiem and hour <= 12 and any(later.group(3) for later in TIME_PATTERN.finditer(label, match.end())):
+        return None
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem in 'Pp' else 0)
+    return hour * 60 + minute
+
+
+def in_time_window(label, time_range):
+    """True when the slot's time falls inside time_range; labels without a time are kept"""
+    if not time_range:
+        return True
+    minutes = parse_slot_time(label)
+    if minutes is None:
+        return True
+    start = parse_slot_time(time_range.get('start', '00:00'))
+    end = parse_slot_time(time_range.get('end', '23:59'))
+    return start <= minutes <= end
+
+
+def filter_to_window(time_slots, available_times, time_range):
+    """Drop slot records and labels outside time_range.
+
+    time_slots are the records from read_time_slots() (or plain labels for the
+    HTTP backend); available_times are the bookable labels. When some slots
+    carry a readable time, the ones without one are not slots (e.g. a "Next"
+    button matched by a loose selector) and are dropped too.
+    """
+    def label_of(slot):
+        return slot['label'] if isinstance(slot, dict) else slot
+
+    def keep(labels_and_items):
+        # Labels with an ambiguous time count as timed, and in_time_window() keeps them
+        timed = [(label, item) for label, item in labels_and_items if label and TIME_PATTERN.search(label)]
+        if not timed:
+            return [item for _, item in labels_and_items]
+        return [item for label, item in timed if in_time_window(label, time_range)]
+
+    kept_slots = keep([(label_of(slot), slot) for slot in time_slots])
+    kept_times = keep([(label, label) for label in available_times])
+    dropped = len(available_times) - len(kept_times)
+    if dropped and time_range:
+        print(f"Ignoring {dropped} slots outside {time_range.get('start')}-{time_range.get('end')}")
+    return kept_slots, kept_times
@@ -0,0 +1,164 @@
+"""Adaptive poll intervals for the daemon, plus a process-wide request cap.
+
+Cancellations cluster: right after a booking window opens, the day before a
+target date, and at times of day when slots have moved before. The scheduler
+polls at burst speed for a few cycles after any slot appears or disappears,
+faster inside hot windows (configured ones and ones learned from
+slot_events) and near target dates, and backs off geometrically while
+nothing changes. Every page load and availability fetch also goes through a
+RateLimiter, so no mix of intervals and workers exceeds the request cap
+(DAEMON_MAX_REQUESTS_PER_MINUTE in the daemon unless configured; one-shot
+runs have no cap by default).
+"""
+import collections
+import datetime
+import threading
+import time
+
+from planner import parse_slot_time
+
+DEFAULTS = {
+    'min_interval_seconds': 15,
+    'max_interval_seconds': 600,
+    'hot_interval_seconds': 30,
+    'burst_interval_seconds': 15,
+    'burst_cycles': 10,
+    'backoff_factor': 1.5,
+    'near_target_days': 1,
+    'hot_windows': [],
+    'learned_window_minutes': 30,
+    'learned_min_events': 2,
+    'learn_days': 14,
+}
+
+# The daemon's request cap when config.json sets no max_requests_per_minute
+DAEMON_MAX_REQUESTS_PER_MINUTE = 30
+
+
+class RateLimiter:
+    """Blocks callers so at most max_per_minute requests start in any 60-second window"""
+
+    def __init__(self, max_per_minute=DAEMON_MAX_REQUESTS_PER_MINUTE):
+        self.max_per_minute = max_per_minute
+        # Requests started so far, capped or not
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._started = collections.deque()
+
+    def acquire(self):
+        """Wait for a free slot in the window; returns the seconds spent waiting"""
+        with self._lock:
+            self.requests += 1
+        if not self.max_per_minute:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._started and now - self._started[0] >= 60:
+                    self._started.popleft()
+                if len(self._started) < self.max_per_minute:
+                    self._started.append(now)
+                    if waited:
+                        print(f"Request rate cap reached, waited {waited:.1f}s")
+                    return waited
+                delay = 60 - (now - self._started[0])
+            time.sleep(delay)
+            waited += delay
+
+    def min_interval_for(self, requests_per_cycle):
+        """Shortest poll interval that keeps a cycle of this many requests under the cap"""
+        if not self.max_per_minute:
+            return 0.0
+        return requests_per_cycle * 60 / self.max_per_minute
+
+
+def learn_hot_windows(events, window_minutes=30, min_events=2):
+    """Time-of-day buckets (start minute, end minute) in which at least min_events slot changes were seen"""
+    counts = collections.Counter()
+    for seen_at, *_ in events:
+        try:
+            stamp = datetime.datetime.fromisoformat(seen_at)
+        except ValueError:
+            continue
+        minute = stamp.hour * 60 + stamp.minute
+        counts[minute // window_minutes] += 1
+    return sorted((bucket * window_minutes, (bucket + 1) * window_minutes)
+                  for bucket, count in counts.items() if count >= min_events)
+
+
+class AdaptiveScheduler:
+    """Chooses the delay before the next poll from recent slot changes and the calendar.
+
+    requests_per_cycle is only the first estimate of the page loads and
+    fetches a cycle makes; after each cycle the count the rate limiter saw
+    replaces it.
+    """
+
+    def __init__(self, base_interval, target_dates, settings=None, rate_limiter=None, requests_per_cycle=1):
+        merged = dict(DEFAULTS)
+        merged.update(settings or {})
+        self.settings = merged
+        self.base_interval = base_interval
+        self.target_dates = target_dates
+        self.rate_limiter = rate_limiter
+        self.requests_per_cycle = requests_per_cycle
+        self._requests_seen = rate_limiter.requests if rate_limiter is not None else 0
+        self.hot_windows = [(parse_slot_time(w['start']), parse_slot_time(w['end'])) for w in merged['hot_windows']]
+        self.learned_windows = []
+        self.burst_left = 0
+        self.quiet_cycles = 0
+
+    def learn(self, events):
+        """Replace the learned hot windows with ones derived from slot_events rows"""
+        learned = learn_hot_windows(events, self.settings['learned_window_minutes'], self.settings['learned_min_events'])
+        if learned == self.learned_windows:
+            return
+        self.learned_windows = learned
+        if learned:
+            spans = ", ".join(f"{start // 60:02d}:{start % 60:02d}-{end // 60:02d}:{end % 60:02d}"
+                              for start, end in self.learned_windows)
+            print(f"Hot windows learned from past slot changes: {spans}")
+
+    def is_hot(self, now):
+        """Inside a configured or learned hot window, or close to a target date"""
+        minute = now.hour * 60 + now.minute
+        for start, end in self.hot_windows + self.learned_windows:
+            if start <= minute < end:
+                return True
+        near = datetime.timedelta(days=self.settings['near_target_days'])
+        for date in self.target_dates:
+            try:
+                target = datetime.datetime.strptime(date, '%Y-%m-%d').date()
+            except ValueError:
+                continue
+            if target - near <= now.date() <= target:
+                return True
+        return False
+
+    def next_interval(self, changed, now=None):
+        """(seconds, reason) to wait before the next poll; changed says whether the last cycle saw slots move"""
+        now = now or datetime.datetime.now()
+        if changed:
+            self.burst_left = self.settings['burst_cycles']
+            self.quiet_cycles = 0
+        if self.burst_left:
+            self.burst_left -= 1
+            interval, reason = self.settings['burst_interval_seconds'], 'burst'
+        else:
+            interval = self.base_interval * self.settings['backoff_factor'] ** self.quiet_cycles
+            interval = min(interval, self.settings['max_interval_seconds'])
+            reason = 'backoff' if self.quiet_cycles else 'base'
+            self.quiet_cycles += 1
+            if self.is_hot(now) and interval > self.settings['hot_interval_seconds']:
+                interval, reason = self.settings['hot_interval_seconds'], 'hot'
+        floor = self.settings['min_interval_seconds']
+        if self.rate_limiter is not None:
+            made = self.rate_limiter.requests - self._requests_seen
+            self._requests_seen = self.rate_limiter.requests
+            if made:
+                self.requests_per_cycle = made
+            floor = max(floor, self.rate_limiter.min_interval_for(self.requests_per_cycle))
+        if interval < floor:
+            interval, reason = floor, reason + ', rate capped'
+        return interval, reason
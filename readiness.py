@@ -0,0 +1,238 @@
+"""Event-driven readiness waits used in place of fixed time.sleep pacing.
+
+A step is considered ready when the document has finished loading, no
+XHR/fetch requests are in flight and (for interactions) the DOM has stopped
+mutating for a short quiet period. Every wait has its own deadline and the
+time actually spent is recorded in a WaitBudget so slow steps are visible.
+"""
+import threading
+import time
+
+# Counts in-flight XHR/fetch requests and remembers when the network was last busy.
+# Installed before page scripts run so requests issued during load are tracked too.
+NETWORK_TRACKER_JS = """
+(function() {
+    if (window.__slotChecker) { return; }
+    var state = window.__slotChecker = {
+        pending: 0,
+        lastNetwork: Date.now(),
+        mutations: 0,
+        lastMutation: 0,
+        observer: null
+    };
+    function start() { state.pending++; state.lastNetwork = Date.now(); }
+    function done() { state.pending = Math.max(0, state.pending - 1); state.lastNetwork = Date.now(); }
+
+    var origSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function() {
+        start();
+        this.addEventListener('loadend', done);
+        return origSend.apply(this, arguments);
+    };
+
+    if (window.fetch) {
+        var origFetch = window.fetch;
+        window.fetch = function() {
+            start();
+            return origFetch.apply(this, arguments).then(
+                function(r) { done(); return r; },
+                function(e) { done(); throw e; }
+            );
+        };
+    }
+})();
+"""
+
+# Starts (or restarts) counting DOM mutations under the given selector
+ARM_MUTATION_WATCH_JS = """
+var state = window.__slotChecker;
+if (!state) { return false; }
+if (state.observer) { state.observer.disconnect(); }
+state.mutations = 0;
+state.lastMutation = 0;
+state.armedAt = Date.now();
+var target = document.querySelector(arguments[0]) || document.body;
+state.observer = new MutationObserver(function(records) {
+    state.mutations += records.length;
+    state.lastMutation = Date.now();
+});
+state.observer.observe(target, {childList: true, subtree: true, attributes: true, characterData: true});
+return true;
+"""
+
+READY_STATE_JS = """
+var state = window.__slotChecker;
+var now = Date.now();
+return {
+    ready: document.readyState === 'complete',
+    tracked: !!state,
+    pending: state ? state.pending : 0,
+    networkIdleMs: state ? now - state.lastNetwork : 0,
+    mutations: state ? state.mutations : 0,
+    armedMs: state && state.armedAt ? now - state.armedAt : 0,
+    domIdleMs: state && state.lastMutation ? now - state.lastMutation : 0
+};
+"""
+
+# Default per-step deadlines in seconds; config.json "wait_timeouts" overrides these
+DEFAULT_STEP_TIMEOUTS = {
+    'initial_load': 20,
+    'refresh': 15,
+    'checkbox': 3,
+    'guest_button': 3,
+    'guest_option': 3,
+    'date_selection': 3,
+    'calendar': 3,
+    'slot_click': 5,
+    'booking_form': 5,
+    'form_fields': 3,
+}
+
+
+class WaitBudget:
+    """Per-step wait deadlines plus a record of how long each step really waited"""
+
+    def __init__(self, step_timeouts=None, default_timeout=5, quiet_ms=300, no_change_ms=1000):
+        self.step_timeouts = dict(DEFAULT_STEP_TIMEOUTS)
+        self.step_timeouts.update(step_timeouts or {})
+        self.default_timeout = default_timeout
+        # How long DOM and network must stay quiet before a step counts as settled
+        self.quiet_ms = quiet_ms
+        # How long to wait for an interaction that never mutates the DOM (e.g. a plain checkbox)
+        self.no_change_ms = no_change_ms
+        self._lock = threading.Lock()
+        self._spent = {}
+
+    def timeout_for(self, step):
+        return self.step_timeouts.get(step, self.default_timeout)
+
+    def record(self, step, seconds, timed_out=False):
+        with self._lock:
+            entry = self._spent.setdefault(step, {'calls': 0, 'seconds': 0.0, 'timeouts': 0})
+            entry['calls'] += 1
+            entry['seconds'] += seconds
+            if timed_out:
+                entry['timeouts'] += 1
+
+    def reset(self):
+        with self._lock:
+            self._spent = {}
+
+    def total_seconds(self):
+        with self._lock:
+            return sum(entry['seconds'] for entry in self._spent.values())
+
+    def summary(self):
+        with self._lock:
+            return {step: dict(entry) for step, entry in self._spent.items()}
+
+    def report(self):
+        """Print time spent waiting per step, slowest first"""
+        summary = self.summary()
+        if not summary:
+            return
+        print("Wait time per step:")
+        for step, entry in sorted(summary.items(), key=lambda item: -item[1]['seconds']):
+            timeouts = f", {entry['timeouts']} timed out" if entry['timeouts'] else ""
+            print(f"  {step}: {entry['seconds']:.2f}s over {entry['calls']} waits{timeouts}")
+        print(f"  total: {self.total_seconds():.2f}s")
+
+
+def install_network_tracker(driver):
+    """Register the XHR/fetch tracker so it runs before any page script"""
+    from selenium.common.exceptions import WebDriverException
+
+    try:
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': NETWORK_TRACKER_JS})
+    except (AttributeError, WebDriverException) as e:
+        # Not a Chromium driver; the tracker is injected after each load instead
+        print(f"Could not pre-install network tracker: {str(e)}")
+
+
+def _ready_state(driver):
+    from selenium.common.exceptions import WebDriverException
+
+    try:
+        return driver.execute_script(READY_STATE_JS)
+    except WebDriverException:
+        return None
+
+
+def _wait(driver, budget, step, condition, timeout=None):
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    timeout = budget.timeout_for(step) if timeout is None else timeout
+    started = time.monotonic()
+    timed_out = False
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.1).until(lambda d: condition(_ready_state(d)))
+    except TimeoutException:
+        timed_out = True
+        print(f"Readiness wait '{step}' hit its {timeout}s deadline, continuing")
+    budget.record(step, time.monotonic() - started, timed_out)
+    return not timed_out
+
+
+def page_is_ready(state, budget):
+    """Document loaded and network quiet, from a READY_STATE_JS result"""
+    if not state:
+        return False
+    if not state['tracked']:
+        # No tracker, so no network timings: the load is all there is to go by
+        return state['ready']
+    return state['ready'] and state['pending'] == 0 and state['networkIdleMs'] >= budget.quiet_ms
+
+
+def dom_is_settled(state, budget):
+    """The armed DOM watch saw the page react (or stay still long enough) and DOM and network are quiet"""
+    if not state:
+        return False
+    if not state['tracked']:
+        return state['ready']
+    network_idle = state['pending'] == 0 and state['networkIdleMs'] >= budget.quiet_ms
+    if state['mutations'] == 0:
+        return network_idle and state['armedMs'] >= budget.no_change_ms
+    return network_idle and state['domIdleMs'] >= budget.quiet_ms
+
+
+def wait_for_page_ready(driver, budget, step, timeout=None):
+    """Wait for document ready and a quiet network after a load or refresh"""
+    from selenium.common.exceptions import WebDriverException
+
+    timeout = budget.timeout_for(step) if timeout is None else timeout
+    started = time.monotonic()
+    ok = _wait(driver, budget, step, lambda state: page_is_ready(state, budget), timeout)
+    # Fall back to a post-load injection when the tracker could not be pre-installed,
+    # then wait for the network to go quiet with the rest of the deadline
+    state = _ready_state(driver)
+    if ok and state and not state['tracked']:
+        try:
+            driver.execute_script(NETWORK_TRACKER_JS)
+        except WebDriverException:
+            return ok
+        remaining = max(0, timeout - (time.monotonic() - started))
+        ok = _wait(driver, budget, step, lambda state: page_is_ready(state, budget), remaining)
+    return ok
+
+
+def arm_dom_watch(driver, selector='body'):
+    """Start counting DOM mutations; call before the interaction being awaited"""
+    from selenium.common.exceptions import WebDriverException
+
+    try:
+        return bool(driver.execute_script(ARM_MUTATION_WATCH_JS, selector))
+    except WebDriverException:
+        return False
+
+
+def wait_for_dom_settled(driver, budget, step, timeout=None):
+    """Wait until the armed DOM watch has seen changes and both DOM and network are quiet"""
+    return _wait(driver, budget, step, lambda state: dom_is_settled(state, budget), timeout)
+
+
+def click_and_settle(driver, element, budget, step, selector='body', timeout=None):
+    """Click an element and wait for the page to react to it"""
+    arm_dom_watch(driver, selector)
+    element.click()
+    return wait_for_dom_settled(driver, budget, step, timeout)
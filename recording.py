@@ -0,0 +1,315 @@
+"""Record a check's pages and network responses, and replay them offline.
+
+While recording, the checker reads chromedriver's performance log and
+stores the body of every GET response the page loaded (documents, scripts,
+stylesheets, XHR/fetch), skipping images, fonts and media. It also stores an
+HTML snapshot at each debug screenshot point. All of this goes into one zip
+archive. Identical bodies are kept once, and a manifest lists every
+response and snapshot in order.
+
+ReplayServer serves an archive on localhost. Responses are looked up by
+origin, path and query parameters, regardless of their order and ignoring
+cache-busters (VOLATILE_PARAMS). Repeated requests for the same URL get the recorded
+responses in order, and the last one is repeated after that. Recorded
+origins are rewritten in text bodies to point at the server, so the page's
+own absolute URLs stay local too. Replaying a check runs the whole pipeline
+without the network and at local speed:
+
+    python slot_checker_new.py --record check.zip
+    python slot_checker_new.py --replay check.zip --trace-out replay.jsonl
+    python recording.py check.zip          # serve it to look at by hand
+"""
+import argparse
+import base64
+import datetime
+import hashlib
+import json
+import re
+import threading
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+# Resource types worth keeping; images, fonts and media are not needed to replay a check
+RECORDED_TYPES = ('Document', 'Script', 'Stylesheet', 'XHR', 'Fetch')
+
+TEXT_TYPES = re.compile(r'text/|javascript|json|xml')
+
+# Recorded origins are served under this prefix, except the booking page's own origin
+ORIGIN_PREFIX = '/__origin__/'
+
+# Snapshot n of the archive is served at this prefix plus its seq
+SNAPSHOT_PREFIX = '/__snapshots__/'
+
+# Query parameters that change on every request (cache-busters, timestamps); ignored when matching
+VOLATILE_PARAMS = frozenset(('_', 'cb', 'cachebuster', 'cache_buster', 'nocache', 'ts', 'timestamp', 'rand', 'random'))
+
+
+def _origin(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _resource(url):
+    parts = urlsplit(url)
+    return parts.path + ('?' + parts.query if parts.query else '')
+
+
+def _route(resource):
+    """What a path and query is matched on: the path plus its non-volatile query parameters, in any order"""
+    parts = urlsplit(resource)
+    params = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+              if name.lower() not in VOLATILE_PARAMS]
+    return parts.path, tuple(sorted(params))
+
+
+class Recorder:
+    """Collects responses and snapshots from a driver and writes them as one archive"""
+
+    def __init__(self, path):
+        self.path = path
+        self.responses = []
+        self.snapshots = []
+        self.bodies = {}
+        self.meta = {}
+        self._seq = 0
+        self._lock = threading.Lock()
+        # requestId -> (method, resource type), and responses waiting for loadingFinished
+        self._requests = {}
+        self._received = {}
+
+    def _next_seq(self):
+        self._seq += 1
+        return self._seq
+
+    def _store_body(self, body):
+        key = 'bodies/' + hashlib.sha1(body).hexdigest()
+        self.bodies[key] = body
+        return key
+
+    def capture(self, driver, entries):
+        """Take the finished GET responses out of performance log entries, with their bodies"""
+        from selenium.common.exceptions import WebDriverException
+
+        with self._lock:
+            for entry in entries:
+                try:
+                    event = json.loads(entry['message'])['message']
+                except (KeyError, TypeError, ValueError):
+                    continue
+                method, params = event.get('method'), event.get('params', {})
+                request_id = params.get('requestId')
+                if method == 'Network.requestWillBeSent':
+                    self._requests[request_id] = (params.get('request', {}).get('method'), params.get('type'))
+                elif method == 'Network.responseReceived':
+                    http_method, resource_type = self._requests.get(request_id, ('GET', params.get('type')))
+                    if (http_method == 'GET' and (resource_type or params.get('type')) in RECORDED_TYPES
+                            and params['response'].get('url', '').startswith('http')):
+                        self._received[request_id] = params['response']
+                elif method == 'Network.loadingFinished' and request_id in self._received:
+                    response = self._received.pop(request_id)
+                    try:
+                        result = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+                    except WebDriverException as e:
+                        print(f"Could not record {response.get('url')}: {str(e).splitlines()[0]}")
+                        continue
+                    if result.get('base64Encoded'):
+                        body = base64.b64decode(result['body'])
+                    else:
+                        body = result['body'].encode()
+                    self.responses.append({
+                        'seq': self._next_seq(),
+                        'url': response['url'],
+                        'status': response.get('status', 200),
+                        'content_type': response.get('mimeType') or 'application/octet-stream',
+                        'body': self._store_body(body),
+                    })
+
+    def flush(self, driver):
+        """Record whatever the performance log holds now"""
+        from selenium.common.exceptions import WebDriverException
+        from network_capture import performance_entries
+
+        try:
+            performance_entries(driver)
+        except WebDriverException as e:
+            print(f"Could not read the performance log: {str(e).splitlines()[0]}")
+
+    def snapshot(self, driver, name):
+        """Store the page's current HTML under a screenshot-style name"""
+        from selenium.common.exceptions import WebDriverException
+
+        self.flush(driver)
+        try:
+            html, url = driver.page_source, driver.current_url
+        except WebDriverException as e:
+            print(f"Could not snapshot {name}: {str(e).splitlines()[0]}")
+            return
+        with self._lock:
+            seq = self._next_seq()
+            self.snapshots.append({'seq': seq, 'name': name, 'url': url,
+                                   'body': self._store_body(html.encode())})
+
+    def save(self):
+        """Write the archive; returns its path, or None when nothing was recorded"""
+        with self._lock:
+            if not self.responses and not self.snapshots:
+                return None
+            manifest = dict(self.meta, version=1,
+                            recorded_at=datetime.datetime.now().isoformat(timespec='seconds'),
+                            responses=self.responses, snapshots=self.snapshots)
+            with zipfile.ZipFile(self.path, 'w', zipfile.ZIP_DEFLATED) as archive:
+                archive.writestr('manifest.json', json.dumps(manifest, indent=1))
+                for key, body in self.bodies.items():
+                    archive.writestr(key, body)
+        size_kb = sum(len(body) for body in self.bodies.values()) / 1024
+        print(f"Recorded {len(self.responses)} responses and {len(self.snapshots)} snapshots "
+              f"({size_kb:.0f} KB before compression) to {self.path}")
+        return self.path
+
+
+def load_archive(path):
+    """(manifest, {body key: bytes}) from an archive written by Recorder"""
+    with zipfile.ZipFile(path) as archive:
+        manifest = json.loads(archive.read('manifest.json'))
+        bodies = {name: archive.read(name) for name in archive.namelist() if name.startswith('bodies/')}
+    return manifest, bodies
+
+
+class ReplayServer:
+    """Serves a recorded archive on a background thread; use as a context manager"""
+
+    def __init__(self, path, host='127.0.0.1', port=0):
+        self.manifest, self.bodies = load_archive(path)
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.main_origin = _origin(self.manifest.get('booking_url') or self.manifest['responses'][0]['url'])
+        self.served = 0
+        self.missed = []
+        self._lock = threading.Lock()
+        self._thread = None
+        # (origin, route) -> [responses in recorded order], and how many were served
+        self._routes = {}
+        self._served_per_route = {}
+        for response in self.manifest['responses']:
+            key = (_origin(response['url']), _route(_resource(response['url'])))
+            self._routes.setdefault(key, []).append(response)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url_for(self, recorded_url):
+        """Where a recorded URL is served from"""
+        origin = _origin(recorded_url)
+        if origin == self.main_origin:
+            return self.base_url + _resource(recorded_url)
+        return self.base_url + ORIGIN_PREFIX + urlsplit(recorded_url).netloc + _resource(recorded_url)
+
+    def _rewrite(self, body):
+        text = body.decode('utf-8', errors='replace')
+        for origin in {_origin(r['url']) for r in self.manifest['responses']}:
+            replacement = self.base_url if origin == self.main_origin else self.base_url + ORIGIN_PREFIX + urlsplit(origin).netloc
+            text = text.replace(origin, replacement)
+        return text.encode()
+
+    def lookup(self, request_path):
+        """The next recorded response for a request to this server, or None"""
+        if request_path.startswith(ORIGIN_PREFIX):
+            netloc, _, rest = request_path[len(ORIGIN_PREFIX):].partition('/')
+            origin = next((_origin(r['url']) for r in self.manifest['responses']
+                           if urlsplit(r['url']).netloc == netloc), None)
+            key = (origin, _route('/' + rest))
+        else:
+            key = (self.main_origin, _route(request_path))
+        responses = self._routes.get(key)
+        if not responses:
+            return None
+        with self._lock:
+            index = self._served_per_route.get(key, 0)
+            self._served_per_route[key] = index + 1
+        return responses[min(index, len(responses) - 1)]
+
+    def snapshot(self, seq):
+        return next((s for s in self.manifest['snapshots'] if str(s['seq']) == seq), None)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith(SNAPSHOT_PREFIX):
+                    snapshot = server.snapshot(self.path[len(SNAPSHOT_PREFIX):])
+                    if snapshot is None:
+                        self._send(404, 'text/plain', b'no such snapshot')
+                    else:
+                        self._send(200, 'text/html; charset=utf-8', server._rewrite(server.bodies[snapshot['body']]))
+                    return
+                response = server.lookup(self.path)
+                with server._lock:
+                    server.served += 1
+                    if response is None:
+                        server.missed.append(self.path)
+                if response is None:
+                    self._send(404, 'text/plain', b'not recorded')
+                    return
+                body = server.bodies[response['body']]
+                if TEXT_TYPES.search(response['content_type']):
+                    body = server._rewrite(body)
+                self._send(response['status'], response['content_type'], body)
+
+            def _send(self, status, content_type, body):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='replay-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.missed:
+            print(f"Replay: {len(self.missed)} of {self.served} requests were not in the recording, "
+                  f"e.g. {self.missed[0]}")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a recorded check for inspection")
+    parser.add_argument('archive')
+    parser.add_argument('--port', type=int, default=8766)
+    args = parser.parse_args()
+
+    server = ReplayServer(args.archive, port=args.port)
+    manifest = server.manifest
+    print(f"Recorded {manifest['recorded_at']}: {len(manifest['responses'])} responses, "
+          f"{len(manifest['snapshots'])} snapshots")
+    if manifest.get('booking_url'):
+        print(f"Booking page: {server.url_for(manifest['booking_url'])}")
+    for snapshot in manifest['snapshots']:
+        print(f"  {server.base_url}{SNAPSHOT_PREFIX}{snapshot['seq']}  {snapshot['name']}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Optional debug screenshots written off the scan's critical path.
+
+The trace level decides what gets captured: "off" takes nothing, "errors"
+only failure screenshots and "full" every step. The capture call itself has
+to run on the thread that owns the driver, but decoding and writing happen on
+a background thread into a directory that is rotated to stay under a size and
+file-count cap.
+"""
+import base64
+import datetime
+import os
+import queue
+import threading
+
+TRACE_LEVELS = ('off', 'errors', 'full')
+
+_STOP = object()
+
+
+class ScreenshotRecorder:
+    """Captures screenshots according to a trace level and writes them in the background"""
+
+    def __init__(self, level='errors', directory='screenshots', max_bytes=50 * 1024 * 1024, max_files=500):
+        if level not in TRACE_LEVELS:
+            raise ValueError(f"trace level must be one of {', '.join(TRACE_LEVELS)}, not {level!r}")
+        self.level = level
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def wants(self, error=False):
+        if self.level == 'off':
+            return False
+        return error or self.level == 'full'
+
+    def capture(self, driver, name, error=False):
+        """Grab a screenshot if the trace level asks for it; the write is queued"""
+        if not self.wants(error):
+            return
+        try:
+            encoded = driver.get_screenshot_as_base64()
+        except Exception as e:
+            print(f"Could not capture screenshot {name}: {str(e)}")
+            return
+        stamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        self._start()
+        self._queue.put((f"{stamp}_{name}.png", encoded))
+
+    def close(self, timeout=30):
+        """Finish pending writes and stop the writer thread"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='screenshot-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        os.makedirs(self.directory, exist_ok=True)
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            filename, encoded = item
+            try:
+                with open(os.path.join(self.directory, filename), 'wb') as f:
+                    f.write(base64.b64decode(encoded))
+                self._rotate()
+            except OSError as e:
+                print(f"Could not write screenshot {filename}: {str(e)}")
+
+    def _rotate(self):
+        """Delete the oldest screenshots until the directory is under both caps"""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith('.png'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+        entries.sort()
+        total = sum(size for _, _, size in entries)
+        while entries and (total > self.max_bytes or len(entries) > self.max_files):
+            _, name, size = entries.pop(0)
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            total -= size
@@ -0,0 +1,84 @@
+"""Learned selector ranking kept across runs.
+
+Most lookups on the booking page try a list of candidate selectors in a
+fixed order, paying a wait for every miss. The cache records which candidate
+last succeeded for each lookup and moves it to the front of the list next
+time. Entries expire after a TTL, and an entry whose selector stopped
+matching is dropped, so a redesigned page falls back to the full list in its
+original order. It lives in the same SQLite file as the slot state.
+"""
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS selector_cache (
+    lookup TEXT PRIMARY KEY,
+    selector TEXT NOT NULL,
+    hits INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+class SelectorCache:
+    """SQLite-backed winning selector per lookup, safe to share between worker threads"""
+
+    def __init__(self, path='slot_state.db', ttl_seconds=7 * 24 * 3600):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def winner(self, lookup):
+        """The selector that last worked for a lookup, or None if unknown or expired"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT selector, updated_at FROM selector_cache WHERE lookup = ?", (lookup,)).fetchone()
+        if not row or time.time() - row[1] > self.ttl_seconds:
+            return None
+        return row[0]
+
+    def ranked(self, lookup, candidates):
+        """Candidates with the cached winner first; the original order when there is none"""
+        ordered = list(candidates)
+        winner = self.winner(lookup)
+        if winner in ordered:
+            ordered.remove(winner)
+            ordered.insert(0, winner)
+        return ordered
+
+    def record(self, lookup, selector, first_try=None):
+        """Remember the selector that worked; first_try says whether it was the first candidate"""
+        with self._lock:
+            if first_try is not None:
+                if first_try:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+            row = self._conn.execute(
+                "SELECT selector, hits FROM selector_cache WHERE lookup = ?", (lookup,)).fetchone()
+            hits = row[1] + 1 if row and row[0] == selector else 1
+            self._conn.execute(
+                "INSERT OR REPLACE INTO selector_cache (lookup, selector, hits, updated_at) VALUES (?, ?, ?, ?)",
+                (lookup, selector, hits, time.time()))
+            self._conn.commit()
+
+    def forget(self, lookup):
+        """Drop a lookup whose candidates all missed, e.g. after a site change"""
+        with self._lock:
+            self._conn.execute("DELETE FROM selector_cache WHERE lookup = ?", (lookup,))
+            self._conn.commit()
+
+    def report(self):
+        total = self.hits + self.misses
+        if total:
+            print(f"Selector cache: {self.hits}/{total} lookups hit on the first try")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,15 +1,5 @@
 import time
-import schedule
 import datetime
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.options import Options
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
@@ -42,31 +32,41 @@ def update_readme(config):
     with open('README.md', 'w') as f:
         f.write(new_content)
 
-# Load configuration
-config = load_config()
-TARGET_DATES = config['target_dates']
-TIME_RANGE = config['time_range']
-USER_EMAIL = config['email']
-
-# Update README with current configuration
-update_readme(config)
+# Configuration and credentials are loaded by init() when the script runs,
+# so importing this module does not read config.json or rewrite README.md
+TARGET_DATES = []
+TIME_RANGE = {}
+USER_EMAIL = None
+EMAIL_USER = None
+EMAIL_PASSWORD = None
 
 # Constants
 BOOKING_URL = 'https://www.tablecheck.com/en/shops/pizza-4ps-in-indiranagar/reserve'
 SMTP_SERVER = 'smtp.gmail.com'
 SMTP_PORT = 587
-# Load environment variables
-from dotenv import load_dotenv
 import os
 
-load_dotenv()
+def init():
+    # Load environment variables
+    from dotenv import load_dotenv
+
+    global TARGET_DATES, TIME_RANGE, USER_EMAIL, EMAIL_USER, EMAIL_PASSWORD
+    config = load_config()
+    TARGET_DATES = config['target_dates']
+    TIME_RANGE = config['time_range']
+    USER_EMAIL = config['email']
+
+    # Update README with current configuration
+    update_readme(config)
+
+    load_dotenv()
 
-# Get email credentials from environment variables
-EMAIL_USER = os.getenv('EMAIL_USER')
-EMAIL_PASSWORD = os.getenv('EMAIL_PASSWORD')
+    # Get email credentials from environment variables
+    EMAIL_USER = os.getenv('EMAIL_USER')
+    EMAIL_PASSWORD = os.getenv('EMAIL_PASSWORD')
 
-if not EMAIL_USER or not EMAIL_PASSWORD:
-    raise ValueError("Please set EMAIL_USER and EMAIL_PASSWORD in .env file")
+    if not EMAIL_USER or not EMAIL_PASSWORD:
+        raise ValueError("Please set EMAIL_USER and EMAIL_PASSWORD in .env file")
 
 # Booking details
 BOOKING_INFO = {
@@ -76,6 +76,9 @@ BOOKING_INFO = {
 }
 
 def setup_driver():
+    import smtplib
+    from selenium.webdriver.chrome.options import Options
+
     chrome_options = Options()
     chrome_options.add_argument('--headless=new')
     chrome_options.add_argument('--no-sandbox')
@@ -94,6 +97,9 @@ def setup_driver():
         print(f"Failed to send email: {str(e)}")
 
 def setup_driver():
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service as ChromeService
+
     chrome_options = webdriver.ChromeOptions()
     chrome_options.add_argument('--headless')
     chrome_options.add_argument('--no-sandbox')
@@ -120,6 +126,11 @@ def setup_driver():
     return driver
 
 def check_availability(driver, date, num_adults):
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException, NoSuchElementException
+
     url = f"https://pizza4ps.quandoo.jp/en/place/pizza-4ps-saigon-centre-2-le-loi-23968/calendar?date={date}"
     print(f"Checking URL: {url}")
     driver.get(url)
@@ -156,6 +167,10 @@ def check_availability(driver, date, num_adults):
         return []
 
 def try_booking(driver, date, time_slot, num_adults):
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
     try:
         # Select date
         date_input = WebDriverWait(driver, 10).until(
@@ -222,6 +237,11 @@ def try_booking(driver, date, time_slot, num_adults):
         return False
 
 def check_availability():
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException
+
     print(f"Checking availability at {datetime.datetime.now()}")
     driver = setup_driver()
     
@@ -315,6 +335,7 @@ def check_availability():
         driver.quit()
 
 def main():
+    init()
     print("Starting Pizza 4P's slot checker...")
     check_availability()
 
@@ -1,34 +1,43 @@
+"""Pizza 4P's slot checker.
+
+Importing this module has no side effects: config.json, the .env
+credentials and the Selenium stack are only loaded when a check first needs
+them. Settings live on a Checker object; main() creates one from the command
+line and the module-level helpers read it through get_checker().
+"""
 import time
 import datetime
 import json
 import os
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from selenium.webdriver.common.keys import Keys
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.options import Options
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
+import argparse
+import queue
+import threading
+from contextlib import contextmanager
+import functools
+from functools import wraps
+
+from page_selectors import (CONFIRM_CHECKBOX_SELECTORS, DATE_INPUT_SELECTOR, GUEST_BUTTON_SELECTORS,
+                            GUEST_OPTION_XPATH, FILL_FIELDS_JS, SET_DATE_JS, SLOT_SNAPSHOT_JS, TIME_SLOT_SELECTORS,
+                            TIME_SLOT_XPATH, UNAVAILABLE_SLOT_LABELS)
+from readiness import WaitBudget, install_network_tracker, wait_for_page_ready
+
+# Constants
+BOOKING_URL = 'https://www.tablecheck.com/en/shops/pizza-4ps-in-indiranagar/reserve'
+SMTP_SERVER = 'smtp.gmail.com'
+SMTP_PORT = 587
+ADULTS_TO_TRY = [4, 3, 2]  # Used when config.json has no num_adults_range
+CONFIG_PATH = 'config.json'
+README_PATH = 'README.md'
 
 # Load configuration
-def load_config():
-    with open('config.json', 'r') as f:
+def load_config(path=CONFIG_PATH):
+    with open(path, 'r') as f:
         return json.load(f)
 
 # Update README with current configuration
-def update_readme(config):
+def update_readme(config, path=README_PATH):
     try:
-        with open('README.md', 'r') as f:
+        with open(path, 'r') as f:
             content = f.read()
         
         # Find the Features section and update it
@@ -49,216 +58,557 @@ def update_readme(config):
         # Replace the section
         new_content = content[:start] + features + content[end:]
         
-        with open('README.md', 'w') as f:
+        with open(path, 'w') as f:
             f.write(new_content)
         print("README updated successfully")
     except Exception as e:
         print(f"Error updating README: {str(e)}")
 
-# Load configuration
-config = load_config()
-TARGET_DATES = config['target_dates']
-TIME_RANGE = config['time_range']
-USER_EMAIL = config['email']
+_property_lock = threading.RLock()
 
-# Update README with current configuration
-try:
-    update_readme(config)
-except Exception as e:
-    print(f"Warning: Could not update README: {str(e)}")
+class cached_property(functools.cached_property):
+    """functools.cached_property that builds each value once when worker threads race for it.
 
-# Constants
-BOOKING_URL = 'https://www.tablecheck.com/en/shops/pizza-4ps-in-indiranagar/reserve'
-SMTP_SERVER = 'smtp.gmail.com'
-SMTP_PORT = 587
+    The standard one stopped locking in Python 3.12, so two workers touching
+    e.g. selector_cache first could each build their own. Reentrant, as some
+    properties are built from others.
+    """
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        cache = instance.__dict__
+        if self.attrname not in cache:
+            with _property_lock:
+                if self.attrname not in cache:
+                    cache[self.attrname] = self.func(instance)
+        return cache[self.attrname]
+
+class Checker:
+    """Settings and credentials for a checker run, loaded on first use.
+
+    Constructing a Checker touches neither the disk nor the environment;
+    config.json is read the first time a setting is accessed and the SMTP
+    credentials the first time an email is sent.
+    """
+
+    def __init__(self, config_path=CONFIG_PATH, config=None):
+        self.config_path = config_path
+        # The watch the current thread is working for, see watching()
+        self._local = threading.local()
+        if config is not None:
+            self.__dict__['config'] = config
+
+    @cached_property
+    def config(self):
+        return load_config(self.config_path)
+
+    @cached_property
+    def watches(self):
+        """Every watch in config.json; a config without "watches" is one default watch"""
+        from watches import load_watches
+        return load_watches(self.config, BOOKING_URL, ADULTS_TO_TRY)
+
+    @property
+    def has_watches(self):
+        return bool(self.config.get('watches'))
+
+    @property
+    def active_watch(self):
+        return getattr(self._local, 'watch', None)
+
+    @contextmanager
+    def watching(self, watch):
+        """On this thread, take booking_url, time_range, contact details and the recipient from a watch"""
+        previous = self.active_watch
+        self._local.watch = watch
+        try:
+            yield watch
+        finally:
+            self._local.watch = previous
+
+    @property
+    def booking_url(self):
+        if self.active_watch is not None:
+            return self.active_watch.booking_url
+        # Point at a local replica (see bench/) to run without the live site
+        return self.config.get('booking_url', BOOKING_URL)
+
+    @property
+    def headless(self):
+        return self.config.get('headless', False)
+
+    @property
+    def browser_profile(self):
+        # "full" is the visible 1920x1080 browser; "lean" is headless, small and skips images, fonts and trackers
+        return self.config.get('browser_profile', 'full')
+
+    @property
+    def browser_profile_dir(self):
+        # Lean sessions keep their Chrome profiles (and HTTP cache) under this directory
+        return self.config.get('browser_profile_dir', '.chrome-profiles')
+
+    @property
+    def chromedriver_cache_path(self):
+        # Remembers the chromedriver matched to the installed Chrome between runs
+        return self.config.get('chromedriver_cache_path', '.chromedriver.json')
+
+    @property
+    def chromedriver_offline(self):
+        # Never download a chromedriver; only local ones are used
+        return self.config.get('chromedriver_offline', False)
+
+    @property
+    def viewport(self):
+        return tuple(self.config.get('viewport', (1024, 768)))
+
+    @property
+    def target_dates(self):
+        if self.has_watches:
+            # Every watched date, in first-seen order
+            return list(dict.fromkeys(date for watch in self.watches for date in watch.target_dates))
+        return self.config['target_dates']
+
+    @property
+    def time_range(self):
+        if self.active_watch is not None:
+            return self.active_watch.time_range
+        return self.config.get('time_range')
+
+    @property
+    def adults_to_try(self):
+        # Party sizes from num_adults_range, largest first
+        from planner import party_sizes
+        return party_sizes(self.config.get('num_adults_range'), ADULTS_TO_TRY)
+
+    @property
+    def probe_plan(self):
+        """[(date, [party sizes...]), ...] in rank order"""
+        from planner import build_probe_plan
+        return build_probe_plan(self.target_dates, self.adults_to_try)
+
+    @property
+    def user_email(self):
+        if self.active_watch is not None:
+            return self.active_watch.email
+        if 'email' not in self.config and self.has_watches:
+            return self.watches[0].email
+        return self.config['email']
+
+    @property
+    def contact_details(self):
+        """Name, phone and email entered on the booking form; config.json "contact" overrides them"""
+        if self.active_watch is not None:
+            return self.active_watch.contact
+        from watches import DEFAULT_CONTACT
+        contact = dict(DEFAULT_CONTACT, email=self.user_email)
+        contact.update(self.config.get('contact', {}))
+        return contact
+
+    @property
+    def prearmed(self):
+        # "prearmed" keeps the daemon's page on the next probe's guests and date and
+        # fills the form in one call; "standard" types into each field
+        return self.config.get('booking_mode', 'prearmed') == 'prearmed'
+
+    @property
+    def max_workers(self):
+        # Number of concurrent browser sessions; 1 keeps the original serial scan
+        return self.config.get('max_workers', 1)
+
+    @property
+    def sweep(self):
+        # "sweep" loads the page once per date and only changes the guest count
+        # between party sizes; "refresh" reloads the page for every probe
+        return self.config.get('scan_mode', 'sweep') == 'sweep'
+
+    @property
+    def availability_backend(self):
+        # "browser" scans the rendered page; "http" discovers slots without a browser;
+        # "cdp" scans several tabs of one browser from an asyncio loop
+        return self.config.get('availability_backend', 'browser')
+
+    @property
+    def cdp_max_pages(self):
+        # Tabs the CDP backend drives at once in its single browser
+        return self.config.get('cdp_max_pages', 4)
+
+    @property
+    def slot_source(self):
+        # "dom" reads the rendered slot buttons; "network" reads the availability responses the page fetches
+        return self.config.get('slot_source', 'dom')
+
+    @cached_property
+    def response_capture(self):
+        from network_capture import DEFAULT_RESPONSE_PATTERN, ResponseCapture
+        return ResponseCapture(self.config.get('availability_response_pattern', DEFAULT_RESPONSE_PATTERN))
+
+    @property
+    def availability_url(self):
+        # Defaults to the shop's timetable endpoint
+        return self.config.get('availability_url')
+
+    @property
+    def poll_interval_seconds(self):
+        return self.config.get('poll_interval_seconds', 60)
+
+    @property
+    def browser_max_heap_mb(self):
+        return self.config.get('browser_max_heap_mb', 512)
+
+    @property
+    def browser_max_cycles(self):
+        return self.config.get('browser_max_cycles', 200)
+
+    @cached_property
+    def wait_budget(self):
+        # Per-step readiness deadlines (seconds) and the record of time spent waiting
+        return WaitBudget(self.config.get('wait_timeouts'))
+
+    @cached_property
+    def form_resolver(self):
+        # Shared by all workers so a winning form selector is reused everywhere
+        from form_fields import FieldResolver
+        return FieldResolver(cache=self.selector_cache)
 
-# Get email credentials from environment variables
-EMAIL_USER = os.getenv('EMAIL_USER')
-EMAIL_PASSWORD = os.getenv('EMAIL_PASSWORD')
+    @cached_property
+    def booking_flow(self):
+        # Shared by all workers so strategies known to fail are skipped everywhere
+        from booking_flow import BookingFlow
+        return BookingFlow(cache=self.selector_cache)
 
-if not EMAIL_USER or not EMAIL_PASSWORD:
-    raise ValueError("Please set EMAIL_USER and EMAIL_PASSWORD in .env file")
+    @cached_property
+    def rate_limiter(self):
+        """Process-wide cap on page loads and availability fetches; none unless configured (the daemon sets one)"""
+        from polling import RateLimiter
+        return RateLimiter(self.config.get('max_requests_per_minute', 0))
 
+    @property
+    def adaptive_polling(self):
+        # Scheduler settings for the daemon (see polling.DEFAULTS); false keeps a fixed interval
+        return self.config.get('adaptive_polling', {})
+
+    @cached_property
+    def tracer(self):
+        """Per-step timing spans for this run"""
+        from tracing import Tracer
+        return Tracer()
+
+    @property
+    def trace_out(self):
+        # Where to export the run's spans: a .json path gets a Chrome trace, anything else JSON lines
+        return self.config.get('trace_out')
+
+    @cached_property
+    def credentials(self):
+        """(EMAIL_USER, EMAIL_PASSWORD) from the environment or .env"""
+        from dotenv import load_dotenv
+        load_dotenv()
+        email_user = os.getenv('EMAIL_USER')
+        email_password = os.getenv('EMAIL_PASSWORD')
+        if not email_user or not email_password:
+            raise ValueError("Please set EMAIL_USER and EMAIL_PASSWORD in .env file")
+        return email_user, email_password
+
+    @cached_property
+    def screenshots(self):
+        """Debug screenshots controlled by trace_level: off, errors (default) or full"""
+        from screenshots import ScreenshotRecorder
+        return ScreenshotRecorder(level=self.config.get('trace_level', 'errors'),
+                                  directory=self.config.get('screenshot_dir', 'screenshots'),
+                                  max_bytes=int(self.config.get('screenshot_max_mb', 50) * 1024 * 1024))
+
+    @cached_property
+    def state_store(self):
+        """Last-seen slots per (date, adults), used to act on changes only"""
+        from state_store import SlotStateStore
+        return SlotStateStore(self.config.get('state_path', 'slot_state.db'))
+
+    @cached_property
+    def selector_cache(self):
+        """Winning selector per page lookup, kept next to the slot state"""
+        from selector_cache import SelectorCache
+        ttl_hours = self.config.get('selector_cache_ttl_hours', 24 * 7)
+        return SelectorCache(self.config.get('state_path', 'slot_state.db'), ttl_hours * 3600)
+
+    @property
+    def dry_run(self):
+        # Print notifications instead of emailing them (set for replays)
+        return self.config.get('dry_run', False)
+
+    @cached_property
+    def recorder(self):
+        """Records pages and network responses to record_path, or None when not recording"""
+        if not self.config.get('record_path'):
+            return None
+        from recording import Recorder
+        recorder = Recorder(self.config['record_path'])
+        recorder.meta = {key: self.config.get(key) for key in ('target_dates', 'num_adults_range', 'time_range')}
+        recorder.meta['booking_url'] = self.booking_url
+        return recorder
+
+    @cached_property
+    def governor(self):
+        """Tracks browser process trees against the session_limits ceilings (see governor.DEFAULTS)"""
+        from governor import SessionGovernor
+        return SessionGovernor(self.config.get('session_limits', {}))
+
+    @cached_property
+    def notifier(self):
+        """Background email sender; config.json smtp_* keys point it at another server"""
+        if self.dry_run:
+            from notifier import PrintNotifier
+            return PrintNotifier()
+        from notifier import EmailNotifier
+        email_user, email_password = self.credentials
+        return EmailNotifier(email_user, email_password, self.user_email,
+                             host=self.config.get('smtp_host', SMTP_SERVER),
+                             port=self.config.get('smtp_port', SMTP_PORT),
+                             starttls=self.config.get('smtp_starttls', True)).start()
+
+    def update_readme(self, path=README_PATH):
+        update_readme(self.config, path)
+
+    def close(self):
+        """Deliver queued notifications, release the SMTP connection and export spans"""
+        if 'screenshots' in self.__dict__:
+            self.screenshots.close()
+        if 'notifier' in self.__dict__:
+            self.notifier.close()
+        if 'state_store' in self.__dict__:
+            self.state_store.close()
+        if 'booking_flow' in self.__dict__:
+            self.booking_flow.report()
+        if 'selector_cache' in self.__dict__:
+            self.selector_cache.report()
+            self.selector_cache.close()
+        if self.__dict__.get('recorder') is not None:
+            self.recorder.save()
+        if 'governor' in self.__dict__:
+            self.governor.report()
+        if 'tracer' in self.__dict__:
+            self.flush_trace()
+
+    def flush_trace(self):
+        """Print and export the spans collected so far, then start a new trace run"""
+        self.tracer.report()
+        if self.trace_out:
+            try:
+                self.tracer.export(self.trace_out)
+            except OSError as e:
+                print(f"Could not write spans to {self.trace_out}: {str(e)}")
+        self.tracer.restart()
+
+_checker = None
+_checker_lock = threading.Lock()
+
+def get_checker():
+    """The Checker used by the module-level helpers, created on first use"""
+    global _checker
+    with _checker_lock:
+        if _checker is None:
+            _checker = Checker()
+        return _checker
+
+def set_checker(checker):
+    global _checker
+    with _checker_lock:
+        _checker = checker
+    return checker
+
+def traced(name):
+    """Record every call of the decorated function as a span on the checker's tracer"""
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with get_checker().tracer.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+@traced('setup_driver')
 def setup_driver():
+    from selenium.webdriver.chrome.options import Options
+    from browser_profile import block_requests, chrome_arguments, claim_profile_dir, driver_pid, release_profile_dir
+
+    checker = get_checker()
+    lean = checker.browser_profile == 'lean'
     try:
-        print("Setting up Chrome driver...")
+        print(f"Setting up Chrome driver ({checker.browser_profile} profile)...")
         chrome_options = Options()
-        # Run in visible mode for better JavaScript interaction
-        # chrome_options.add_argument("--headless")  # Commented out for visible mode
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--window-size=1920,1080")
-        # Add user agent to appear more like a real browser
-        chrome_options.add_argument("--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/136.0.0.0 Safari/537.36")
-        
-        # Try direct path first (for Mac ARM)
+        # The full profile runs in visible mode for better JavaScript interaction unless config.json asks for headless
+        for argument in chrome_arguments(checker.browser_profile, checker.headless, checker.viewport):
+            chrome_options.add_argument(argument)
+        if checker.slot_source == 'network' or checker.recorder is not None:
+            from network_capture import enable_performance_log
+            enable_performance_log(chrome_options)
+        profile_dir = None
+        if lean:
+            profile_dir = claim_profile_dir(checker.browser_profile_dir)
+            chrome_options.add_argument(f"--user-data-dir={profile_dir}")
+        started = time.monotonic()
         try:
-            # For Mac ARM architecture
-            driver = webdriver.Chrome(options=chrome_options)
-            print("Successfully initialized ChromeDriver directly")
-            return driver
+            driver = _launch_chrome(chrome_options)
         except Exception as e:
-            print(f"Direct initialization failed: {str(e)}")
-            
-            # Fallback to ChromeDriverManager
-            service = ChromeService(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=chrome_options)
-            print(f"Successfully initialized ChromeDriver with ChromeDriverManager")
-            return driver
+            if profile_dir is None:
+                raise
+            # Usually the profile is locked by another process; run without the cache instead
+            print(f"Could not start Chrome with profile {profile_dir}, retrying without it: {str(e)}")
+            release_profile_dir(profile_dir)
+            profile_dir = None
+            chrome_options.arguments.remove(next(a for a in chrome_options.arguments if a.startswith('--user-data-dir=')))
+            driver = _launch_chrome(chrome_options)
+        print(f"Chrome driver ready in {time.monotonic() - started:.2f}s")
+        checker.governor.track(driver_pid(driver), threading.current_thread().name)
+        driver.profile_dir = profile_dir
+        driver.recorder = checker.recorder
+        # Performance log entries kept for ResponseCapture; see network_capture.performance_entries()
+        driver.response_backlog = [] if checker.slot_source == 'network' else None
+        if lean:
+            block_requests(driver)
+        return driver
     except Exception as e:
         print(f"Error setting up Chrome driver: {str(e)}")
         raise
 
+def _launch_chrome(chrome_options):
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service as ChromeService
+    from driver_resolver import DriverCache, find_browser, resolve_chromedriver
+
+    checker = get_checker()
+    cache = DriverCache(checker.chromedriver_cache_path)
+    use_cache = True
+    failed = None
+    while True:
+        with checker.tracer.span('driver_resolve'):
+            path, source = resolve_chromedriver(cache, chrome_options.binary_location,
+                                                checker.chromedriver_offline, use_cache)
+        if path is None:
+            break
+        try:
+            driver = webdriver.Chrome(service=ChromeService(path), options=chrome_options)
+            print(f"Initialized ChromeDriver {path} ({source})")
+            return driver
+        except Exception as e:
+            print(f"ChromeDriver at {path} failed: {str(e)}")
+            failed = path
+            stale = isinstance(e, OSError) or 'only supports Chrome version' in str(e)
+            if not stale:
+                raise
+            cache.forget()
+            if source != 'cache':
+                break
+            # Chrome was updated in place or the driver was removed; look again without the cache
+            use_cache = False
+
+    if checker.chromedriver_offline:
+        # Selenium Manager would download a driver, which offline mode rules out
+        browser = find_browser(chrome_options.binary_location) or "the installed Chrome"
+        if failed:
+            raise RuntimeError(f"chromedriver_offline is set and the chromedriver at {failed} does not work with {browser}; "
+                               "install a matching one or point CHROMEDRIVER_PATH at it")
+        raise RuntimeError(f"chromedriver_offline is set and no local chromedriver was found for {browser}; "
+                           "install one or point CHROMEDRIVER_PATH at it")
+    
+    # Nothing usable was found locally; let Selenium Manager try, as before
+    driver = webdriver.Chrome(options=chrome_options)
+    print("Successfully initialized ChromeDriver directly")
+    return driver
+
+def format_slot_message(date, num_adults, available_times, url):
+    """The notification body for slots found for one date and party size"""
+    message = f"Found {len(available_times)} available slots on {date} for {num_adults} adults:\n\n"
+    message += "\n".join(available_times)
+    message += "\n\nBook now at: " + url
+    return message
+
+@traced('send_email')
 def send_email(subject, message):
+    """Queue a notification; it is delivered by the checker's background notifier"""
     try:
         print("Sending email notification...")
-        msg = MIMEMultipart()
-        msg['From'] = EMAIL_USER
-        msg['To'] = USER_EMAIL
-        msg['Subject'] = subject
-        
-        msg.attach(MIMEText(message, 'plain'))
-        
-        server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT)
-        server.starttls()
-        server.login(EMAIL_USER, EMAIL_PASSWORD)
-        server.send_message(msg)
-        server.quit()
-        
-        print("Email notification sent successfully")
+        checker = get_checker()
+        checker.notifier.send(subject, message, checker.user_email)
     except Exception as e:
         print(f"Error sending email: {str(e)}")
 
-def fill_booking_details(driver, date, time_slot, num_adults):
-    """Helper function to fill in booking details after a time slot has been selected"""
+def capture_screenshot(driver, name, error=False):
+    """Save a debug screenshot if the trace level asks for it; written in the background.
+
+    When recording, the page's HTML is stored at every capture point.
+    """
+    checker = get_checker()
+    checker.screenshots.capture(driver, name, error)
+    recorder = getattr(driver, 'recorder', None)
+    if recorder is not None:
+        recorder.snapshot(driver, name)
+
+@contextmanager
+def notification_cycle():
+    """Merge the emails sent during one scan into a single digest"""
+    try:
+        notifier = get_checker().notifier
+    except Exception as e:
+        print(f"Notifications unavailable: {str(e)}")
+        notifier = None
+    if notifier is None:
+        yield
+        return
+    with notifier.cycle():
+        yield
+
+@traced('fill_booking_details')
+def fill_booking_details(driver, date, time_slot, num_adults, detected_at=None):
+    """Helper function to fill in booking details after a time slot has been selected.
+
+    detected_at is the time.monotonic() at which the slot was seen; the time
+    from there to a ready submit button is logged per attempt.
+    """
+    checker = get_checker()
+    budget = checker.wait_budget
+    resolver = checker.form_resolver
     print(f"Filling booking details for {date} at {time_slot} for {num_adults} adults")
     try:
         # Take screenshot before filling details
-        driver.save_screenshot(f"before_details_{date}_{time_slot.replace(':', '')}.png")
+        capture_screenshot(driver, f"before_details_{date}_{time_slot.replace(':', '')}")
         
-        # Wait for booking form to appear
-        time.sleep(3)
+        # Make sure the booking form has finished loading
+        wait_for_page_ready(driver, budget, 'booking_form')
         
-        # Name field
-        try:
-            # Try different selectors for name input
-            name_selectors = [
-                "input[name='firstName']", 
-                "[data-testid='first-name-input']",
-                "input[placeholder*='name' i]",
-                "input[id*='name' i]",
-                "input[name*='name' i]"
-            ]
-            
-            name_input = None
-            for selector in name_selectors:
-                try:
-                    name_input = WebDriverWait(driver, 5).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                    )
-                    if name_input:
-                        break
-                except:
-                    continue
-            
-            if name_input:
-                name_input.clear()
-                name_input.send_keys("Aadarsh Gupta")
-                print("Filled in name")
-            else:
-                print("Could not find name input field")
-        except Exception as e:
-            print(f"Error filling in name: {str(e)}")
-        
-        # Phone field
-        try:
-            # Try different selectors for phone input
-            phone_selectors = [
-                "input[name='phone']", 
-                "[data-testid='phone-input']",
-                "input[placeholder*='phone' i]",
-                "input[id*='phone' i]",
-                "input[name*='phone' i]",
-                "input[type='tel']"
-            ]
-            
-            phone_input = None
-            for selector in phone_selectors:
-                try:
-                    phone_input = WebDriverWait(driver, 5).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                    )
-                    if phone_input:
-                        break
-                except:
-                    continue
-            
-            if phone_input:
-                phone_input.clear()
-                phone_input.send_keys("917879974479")
-                print("Filled in phone")
-            else:
-                print("Could not find phone input field")
-        except Exception as e:
-            print(f"Error filling in phone: {str(e)}")
+        # Find all contact inputs in one racing lookup instead of one selector at a time
+        inputs = resolver.resolve(driver, ['name', 'phone', 'email'], budget)
         
-        # Email field
-        try:
-            # Try different selectors for email input
-            email_selectors = [
-                "input[name='email']", 
-                "[data-testid='email-input']",
-                "input[placeholder*='email' i]",
-                "input[id*='email' i]",
-                "input[name*='email' i]",
-                "input[type='email']"
-            ]
-            
-            email_input = None
-            for selector in email_selectors:
+        contact = checker.contact_details
+        if checker.prearmed and all(inputs.values()):
+            # The values are ready up front, so all fields are set in one call
+            try:
+                driver.execute_script(FILL_FIELDS_JS, [[inputs[field], contact[field]] for field in ('name', 'phone', 'email')])
+                print("Filled in name, phone and email")
+            except Exception as e:
+                print(f"Error filling in contact details: {str(e)}")
+        else:
+            for field in ('name', 'phone', 'email'):
                 try:
-                    email_input = WebDriverWait(driver, 5).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, selector))
-                    )
-                    if email_input:
-                        break
-                except:
-                    continue
-            
-            if email_input:
-                email_input.clear()
-                email_input.send_keys(USER_EMAIL)
-                print("Filled in email")
-            else:
-                print("Could not find email input field")
-        except Exception as e:
-            print(f"Error filling in email: {str(e)}")
+                    field_input = inputs[field]
+                    if field_input:
+                        field_input.clear()
+                        field_input.send_keys(contact[field])
+                        print(f"Filled in {field}")
+                    else:
+                        print(f"Could not find {field} input field")
+                except Exception as e:
+                    print(f"Error filling in {field}: {str(e)}")
         
         # Take screenshot after filling details
-        driver.save_screenshot(f"filled_details_{date}_{time_slot.replace(':', '')}.png")
+        capture_screenshot(driver, f"filled_details_{date}_{time_slot.replace(':', '')}")
+        
+        # Looked up after filling in case the form re-rendered; terms are optional
+        controls = resolver.resolve(driver, ['terms', 'submit'], budget, required=['submit'])
         
         # Accept terms (if present)
         try:
-            # Try different selectors for terms checkbox
-            terms_selectors = [
-                "input[type='checkbox']", 
-                "[data-testid='terms-checkbox']",
-                ".terms-checkbox",
-                "input[id*='terms' i]",
-                "input[name*='terms' i]"
-            ]
-            
-            terms_checkbox = None
-            for selector in terms_selectors:
-                try:
-                    checkboxes = driver.find_elements(By.CSS_SELECTOR, selector)
-                    if checkboxes:
-                        terms_checkbox = checkboxes[0]
-                        break
-                except:
-                    continue
-            
+            terms_checkbox = controls['terms']
             if terms_checkbox and not terms_checkbox.is_selected():
                 terms_checkbox.click()
                 print("Accepted terms")
@@ -268,127 +618,55 @@ def fill_booking_details(driver, date, time_slot, num_adults):
         # Submit booking
         print("Attempting to submit booking...")
         try:
-            # Try different selectors for submit button
-            submit_selectors = [
-                "button[type='submit']", 
-                "[data-testid='submit-button']",
-                ".submit-button",
-                "button:contains('Book')",
-                "button:contains('Reserve')",
-                "button.primary",
-                "button.submit",
-                "input[type='submit']"
-            ]
-            
-            submit_button = None
-            for selector in submit_selectors:
-                try:
-                    buttons = driver.find_elements(By.CSS_SELECTOR, selector)
-                    if buttons:
-                        submit_button = buttons[0]
-                        break
-                except:
-                    continue
-            
-            if not submit_button:
-                # Try XPath approach
-                xpath_patterns = [
-                    "//button[contains(., 'Book')]",
-                    "//button[contains(., 'Reserve')]",
-                    "//button[contains(., 'Submit')]",
-                    "//button[contains(., 'Confirm')]"
-                ]
-                
-                for xpath in xpath_patterns:
-                    try:
-                        buttons = driver.find_elements(By.XPATH, xpath)
-                        if buttons:
-                            submit_button = buttons[0]
-                            break
-                    except:
-                        continue
-            
+            submit_button = controls['submit']
             if submit_button:
                 # Uncomment the line below to actually submit the booking
                 # submit_button.click()
                 print("Found submit button but NOT clicking it (safety measure)")
                 print("To actually submit the booking, uncomment the submit_button.click() line in the code")
+                record_booking_attempt(date, num_adults, time_slot, detected_at)
                 # Take screenshot of submit button
-                driver.save_screenshot(f"submit_button_{date}_{time_slot.replace(':', '')}.png")
+                capture_screenshot(driver, f"submit_button_{date}_{time_slot.replace(':', '')}")
             else:
                 print("Could not find submit button")
+                record_booking_attempt(date, num_adults, time_slot, None)
         except Exception as e:
             print(f"Error finding submit button: {str(e)}")
         
         # Take final screenshot
-        driver.save_screenshot(f"booking_final_{date}_{time_slot.replace(':', '')}.png")
+        capture_screenshot(driver, f"booking_final_{date}_{time_slot.replace(':', '')}")
         
         print("Booking details filled successfully")
         return True
     except Exception as e:
         print(f"Error filling booking details: {str(e)}")
-        driver.save_screenshot(f"details_error_{date}_{time_slot.replace(':', '')}.png")
+        capture_screenshot(driver, f"details_error_{date}_{time_slot.replace(':', '')}", error=True)
         return False
 
+def record_booking_attempt(date, num_adults, time_slot, detected_at, submitted=False):
+    """Log a booking attempt with its detection-to-submit time (None when submit was never reached)"""
+    elapsed = None if detected_at is None else time.monotonic() - detected_at
+    if elapsed is not None:
+        print(f"Detection to submit for {date} at {time_slot}: {elapsed:.2f}s")
+    try:
+        get_checker().state_store.record_booking(date, num_adults, time_slot, elapsed, submitted)
+    except Exception as e:
+        print(f"Could not record booking attempt: {str(e)}")
+
+@traced('try_booking')
 def try_booking(driver, date, time_slot, num_adults):
+    budget = get_checker().wait_budget
     try:
         print(f"Attempting to book: {date} at {time_slot} for {num_adults} adults")
         # Take screenshot before booking attempt
-        driver.save_screenshot(f"booking_attempt_{date}_{time_slot.replace(':', '')}.png")
+        capture_screenshot(driver, f"booking_attempt_{date}_{time_slot.replace(':', '')}")
         
         # 1. Click on the time slot button
         print(f"Clicking on time slot: {time_slot}")
-        try:
-            # Try different ways to find the time slot button
-            time_slot_found = False
-            
-            # Method 1: Direct text match
-            try:
-                slot_button = WebDriverWait(driver, 5).until(
-                    EC.element_to_be_clickable((By.XPATH, f"//button[contains(text(), '{time_slot}')]")),
-                )
-                slot_button.click()
-                time_slot_found = True
-                print(f"Clicked time slot using direct text match: {time_slot}")
-            except Exception as e:
-                print(f"Could not click time slot using direct text match: {str(e)}")
-            
-            # Method 2: Find by class and text
-            if not time_slot_found:
-                try:
-                    slot_button = WebDriverWait(driver, 5).until(
-                        EC.element_to_be_clickable((By.XPATH, f"//button[contains(@class, 'time-slot') and contains(text(), '{time_slot}')]")),
-                    )
-                    slot_button.click()
-                    time_slot_found = True
-                    print(f"Clicked time slot using class and text: {time_slot}")
-                except Exception as e:
-                    print(f"Could not click time slot using class and text: {str(e)}")
-            
-            # Method 3: Find any available time slot
-            if not time_slot_found:
-                try:
-                    available_slots = driver.find_elements(By.CSS_SELECTOR, ".time-slot:not(.disabled), [data-testid='time-slot']:not([disabled]), .available-time")
-                    if available_slots:
-                        available_slots[0].click()
-                        time_slot_found = True
-                        print(f"Clicked first available time slot")
-                    else:
-                        print("No available time slots found")
-                except Exception as e:
-                    print(f"Could not click any available time slot: {str(e)}")
-            
-            if not time_slot_found:
-                raise Exception("Could not find or click any time slot")
-                
-            # Wait for booking form to appear
-            time.sleep(3)
-            driver.save_screenshot(f"after_time_slot_{date}_{time_slot.replace(':', '')}.png")
-            
-        except Exception as e:
-            print(f"Error selecting time slot: {str(e)}")
-            driver.save_screenshot(f"time_slot_error_{date}_{time_slot.replace(':', '')}.png")
-            raise
+        if not get_checker().booking_flow.run(driver, ['slot_click'], budget, time_slot=time_slot)['slot_click']:
+            capture_screenshot(driver, f"time_slot_error_{date}_{time_slot.replace(':', '')}", error=True)
+            raise Exception("Could not find or click the time slot")
+        capture_screenshot(driver, f"after_time_slot_{date}_{time_slot.replace(':', '')}")
         
         # 2. Fill in booking details
         fill_booking_details(driver, date, time_slot, num_adults)
@@ -397,427 +675,1290 @@ def try_booking(driver, date, time_slot, num_adults):
         return True
     except Exception as e:
         print(f"Booking failed: {str(e)}")
-        driver.save_screenshot(f"booking_error_{date}_{time_slot.replace(':', '')}.png")
+        capture_screenshot(driver, f"booking_error_{date}_{time_slot.replace(':', '')}", error=True)
         return False
 
-def check_availability():
-    print(f"Checking availability at {datetime.datetime.now()}")
-    driver = setup_driver()
+@traced('page_load')
+def open_booking_page(driver):
+    """Load the booking page on a fresh driver and wait for it to settle"""
+    checker = get_checker()
+    budget = checker.wait_budget
+    print("Opening booking URL...")
+    install_network_tracker(driver)
+    checker.rate_limiter.acquire()
+    driver.get(checker.booking_url)
+    wait_for_page_ready(driver, budget, 'initial_load')
+    
+    # Take screenshot of initial page
+    capture_screenshot(driver, "initial_page")
+    
+    # Print page information for debugging
+    print(f"Page title: {driver.title}")
+    print(f"Current URL: {driver.current_url}")
+    from browser_profile import format_session_report, session_report
+    print(f"Session: {format_session_report(session_report(driver))}")
+
+@traced('page_reload')
+def reset_booking_page(driver, date, num_adults):
+    """Reload the booking page and tick the confirmation checkbox"""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
+    budget = get_checker().wait_budget
+
+    # Take screenshot before each attempt
+    capture_screenshot(driver, f"before_{date}_{num_adults}")
+
+    # Wait for page to be interactive
+    print("Waiting for page to be interactive...")
+    WebDriverWait(driver, 20).until(
+        EC.presence_of_element_located((By.TAG_NAME, "body"))
+    )
+
+    # Refresh page for each attempt to ensure clean state
+    get_checker().rate_limiter.acquire()
+    driver.refresh()
+    wait_for_page_ready(driver, budget, 'refresh')
+
+    # Take screenshot after refresh
+    capture_screenshot(driver, f"after_refresh_{date}_{num_adults}")
+
+    # IMPORTANT: Check the confirmation checkbox first
+    tick_confirmation_checkbox(driver)
+
+    # Take screenshot after checkbox attempt
+    capture_screenshot(driver, f"after_checkbox_{date}_{num_adults}")
+
+@traced('checkbox')
+def tick_confirmation_checkbox(driver):
+    """Tick the confirmation checkbox that gates the booking widget"""
+    checker = get_checker()
+    print("Looking for confirmation checkbox...")
+    if not checker.booking_flow.run(driver, ['checkbox'], checker.wait_budget)['checkbox']:
+        print("WARNING: Could not find or check confirmation checkbox")
+
+@traced('guest_selection')
+def select_guests(driver, num_adults):
+    """Open the guest selector and pick the party size"""
+    checker = get_checker()
+    print(f"Selecting {num_adults} adults...")
+    results = checker.booking_flow.run(driver, ['guest_button', 'guest_option'], checker.wait_budget,
+                                       num_adults=num_adults)
+    if results.get('guest_option'):
+        print(f"Selected {num_adults} adults")
+    else:
+        print(f"Could not select {num_adults} adults")
+
+@traced('date_selection')
+def select_date(driver, date, num_adults):
+    """Set the reservation date with the input field, JS injection or the calendar (see booking_flow.STEPS)"""
+    checker = get_checker()
+    print(f"Selecting date: {date}")
+    selected = checker.booking_flow.run(driver, ['date_selection'], checker.wait_budget, date=date)['date_selection']
+    
+    # Take screenshot after date selection attempt
+    capture_screenshot(driver, f"date_selection_{date}_{num_adults}")
+    
+    if not selected:
+        # The site might have a default date selected, so carry on
+        print("WARNING: Could not set date, but continuing anyway")
+
+@traced('slot_extraction')
+def read_time_slots(driver, date, num_adults):
+    """Snapshot the slots currently shown in one script call.
+
+    Returns (time_slots, available_times): one record per candidate slot
+    (label, time, enabled state and a selector to click it by) and the labels
+    of the enabled ones that look bookable.
+    """
+    checker = get_checker()
+    if checker.slot_source == 'network':
+        captured = checker.response_capture.latest_times(driver, date, num_adults)
+        if captured is not None:
+            return slots_from_response(driver, *captured)
+        print("No availability response captured; reading the rendered slots")
     
+    # Step 3: Look for available time slots with enhanced detection
+    print("Looking for available time slots...")
+    time_slots = []
+    available_times = []
     try:
-        print("Opening booking URL...")
-        driver.get(BOOKING_URL)
-        time.sleep(10)  # Wait for initial page load
+        # First take a screenshot of the current state
+        capture_screenshot(driver, f"before_time_slots_{date}_{num_adults}")
         
-        # Take screenshot of initial page
-        driver.save_screenshot("initial_page.png")
-        print("Saved screenshot of initial page")
+        time_slots = driver.execute_script(SLOT_SNAPSHOT_JS, TIME_SLOT_SELECTORS, TIME_SLOT_XPATH) or []
         
-        # Print page information for debugging
-        print(f"Page title: {driver.title}")
-        print(f"Current URL: {driver.current_url}")
+        # Take screenshot of available slots
+        capture_screenshot(driver, f"time_slots_{date}_{num_adults}")
         
-        for date in TARGET_DATES:
-            print(f"\nChecking date: {date}")
-            for num_adults in [4, 3, 2]:  # Try with different numbers of adults
-                try:
-                    print(f"Trying with {num_adults} adults...")
-                    
-                    # Take screenshot before each attempt
-                    driver.save_screenshot(f"before_{date}_{num_adults}.png")
-                    
-                    # Wait for page to be interactive
-                    print("Waiting for page to be interactive...")
-                    WebDriverWait(driver, 20).until(
-                        EC.presence_of_element_located((By.TAG_NAME, "body"))
-                    )
-                    
-                    # Print page source for debugging
-                    print(f"Page source length: {len(driver.page_source)}")
-                    
-                    # Refresh page for each attempt to ensure clean state
-                    driver.refresh()
-                    time.sleep(5)
+        if time_slots:
+            print(f"Found {len(time_slots)} potential time slots with selector: {time_slots[0]['matchedBy']}")
+            for slot in time_slots:
+                slot_text = slot['label']
+                if slot['enabled'] and slot_text and slot_text not in UNAVAILABLE_SLOT_LABELS:
+                    available_times.append(slot_text)
+                    print(f"Found available time: {slot_text}")
+        else:
+            print("No available time slots found")
+    except Exception as e:
+        print(f"Error looking for time slots: {str(e)}")
+    
+    return time_slots, available_times
+
+def slots_from_response(driver, times, url):
+    """(time_slots, available_times) for the times an availability response lists as bookable.
+
+    The rendered slots are only snapshotted when there is something to book,
+    to find the buttons for those times. A time with no button yet gets a
+    record without a selector, so it is still reported.
+    """
+    print(f"Availability response {url} lists {len(times)} bookable times")
+    if not times:
+        return [], []
+    rendered = driver.execute_script(SLOT_SNAPSHOT_JS, TIME_SLOT_SELECTORS, TIME_SLOT_XPATH) or []
+    by_time = {slot['time'].zfill(5): slot for slot in rendered if slot['enabled'] and slot['time']}
+    time_slots = []
+    for slot_time in times:
+        slot = by_time.get(slot_time)
+        if slot is None:
+            print(f"Found available time: {slot_time} (no button shown for it)")
+            slot = {'index': None, 'label': slot_time, 'time': slot_time, 'enabled': True, 'selector': None,
+                    'matchedBy': 'response'}
+        else:
+            print(f"Found available time: {slot['label']}")
+        time_slots.append(slot)
+    return time_slots, [slot['label'] for slot in time_slots]
+
+def click_slot(driver, slot, budget):
+    """Click a slot record from read_time_slots() and wait for the page to react"""
+    results = get_checker().booking_flow.run(driver, ['slot_click'], budget, slot=slot, time_slot=slot['time'])
+    if not results['slot_click']:
+        raise Exception(f"Could not click the slot {slot['label']}")
+
+def scan_for_slots(driver, date, num_adults):
+    """Run a single (date, adults) probe on an open booking page.
+
+    Returns (time_slots, available_times): the matched slot elements and the
+    slot texts that look bookable.
+    """
+    print(f"Trying with {num_adults} adults...")
+    reset_booking_page(driver, date, num_adults)
+    select_guests(driver, num_adults)
+    select_date(driver, date, num_adults)
+    return read_time_slots(driver, date, num_adults)
+
+def date_is_selected(driver, date):
+    """Whether the date widget still holds the given date after another control changed"""
+    try:
+        value = driver.execute_script(
+            "var el = document.querySelector(arguments[0]); return el ? el.value : null;", DATE_INPUT_SELECTOR)
+    except Exception:
+        return False
+    return value == date
+
+def iter_probes(driver, date, adults_list, sweep=True, filter_window=True):
+    """Yield (num_adults, time_slots, available_times) for each party size on a date.
+
+    In sweep mode the page is reloaded once per date: later probes only change
+    the guest count (and the date again if the widget lost it), then re-read
+    the slots. Otherwise every probe starts from a refresh. A failed probe is
+    logged and the next one falls back to a full reset. Slots outside the
+    configured time_range are dropped before they are yielded, unless
+    filter_window is off (several watches with their own windows share the scan).
+    """
+    from selenium.common.exceptions import TimeoutException
+    from planner import filter_to_window
+
+    time_range = get_checker().time_range if filter_window else None
+
+    needs_reset = True
+    for num_adults in adults_list:
+        try:
+            if not sweep:
+                yield (num_adults,) + filter_to_window(*scan_for_slots(driver, date, num_adults), time_range)
+                continue
+            
+            print(f"Trying with {num_adults} adults...")
+            if needs_reset:
+                reset_booking_page(driver, date, num_adults)
+                select_guests(driver, num_adults)
+                select_date(driver, date, num_adults)
+                needs_reset = False
+            else:
+                select_guests(driver, num_adults)
+                if not date_is_selected(driver, date):
+                    select_date(driver, date, num_adults)
+            yield (num_adults,) + filter_to_window(*read_time_slots(driver, date, num_adults), time_range)
+        except TimeoutException as e:
+            print(f"Timeout while checking {date} with {num_adults} adults: {str(e)}")
+            capture_screenshot(driver, f"error_{date}_{num_adults}", error=True)
+            needs_reset = True
+        except Exception as e:
+            print(f"Error while checking {date} with {num_adults} adults: {str(e)}")
+            capture_screenshot(driver, f"error_{date}_{num_adults}", error=True)
+            needs_reset = True
+
+
+@traced('booking')
+def book_found_slots(driver, date, num_adults, time_slots, available_times, notify=True, detected_at=None):
+    """Notify about found slots and attempt to book the first one.
+
+    Returns True once the booking form was filled. detected_at defaults to
+    now, for callers that book straight after reading the slots.
+    """
+    if detected_at is None:
+        detected_at = time.monotonic()
+    budget = get_checker().wait_budget
+    # If we couldn't extract any text, just use the slots themselves
+    if not available_times and time_slots:
+        print("Could not extract text from slots, using slots directly")
+        # Just use the first slot
+        first_slot = time_slots[0]
+        
+        # Send email notification
+        if notify:
+            subject = f"Pizza 4P's Slots Available - {date} for {num_adults} adults"
+            message = f"Found available slots on {date} for {num_adults} adults!\n\n"
+            message += "Time text could not be extracted, but slots are available.\n"
+            message += "\n\nBook now at: " + get_checker().booking_url
+            send_email(subject, message)
+        
+        # Try to book by directly clicking the slot
+        print("Attempting to book by directly clicking the slot...")
+        try:
+            # Click the slot
+            click_slot(driver, first_slot, budget)
+            capture_screenshot(driver, f"clicked_slot_{date}_{num_adults}")
+            
+            # Now fill in the booking details
+            return fill_booking_details(driver, date, "Unknown Time", num_adults, detected_at)
+        except Exception as e:
+            print(f"Error clicking slot: {str(e)}")
+    elif available_times:
+        # Send email notification
+        if notify:
+            subject = f"Pizza 4P's Slots Available - {date} for {num_adults} adults"
+            message = format_slot_message(date, num_adults, available_times, get_checker().booking_url)
+            send_email(subject, message)
+        
+        # Try to book the first available slot
+        print(f"Attempting to book slot: {available_times[0]}")
+        try:
+            # Pick the slot with this text from the snapshot
+            slot_to_book = next((slot for slot in time_slots if slot['label'] == available_times[0]), None)
+            
+            if slot_to_book:
+                click_slot(driver, slot_to_book, budget)
+                capture_screenshot(driver, f"clicked_slot_{date}_{num_adults}")
+                
+                # Now fill in the booking details
+                return fill_booking_details(driver, date, available_times[0], num_adults, detected_at)
+            else:
+                print(f"Could not find slot with text: {available_times[0]}")
+        except Exception as e:
+            print(f"Error booking slot: {str(e)}")
+    else:
+        print("Found time slots but couldn't extract any valid times")
+    return False
+
+def record_slot_change(date, num_adults, time_slots, available_times):
+    """Store what a probe saw and return the SlotChange since the previous check.
+
+    Slots that disappeared are reported straight away. When the state store
+    cannot be used every slot counts as new, which matches stateless runs.
+    """
+    from state_store import SlotChange
+
+    checker = get_checker()
+    slots = available_times or (["Unknown Time"] if time_slots else [])
+    # Each watch keeps its own slot history
+    key = checker.active_watch.state_key(date) if checker.active_watch is not None else date
+    try:
+        change = checker.state_store.record(key, num_adults, slots)
+    except Exception as e:
+        print(f"Could not update slot state: {str(e)}")
+        return SlotChange([], slots, slots, [], bool(slots))
+    
+    if change.disappeared:
+        subject = f"Pizza 4P's Slots Gone - {date} for {num_adults} adults"
+        message = f"These slots on {date} for {num_adults} adults are no longer available:\n\n"
+        message += "\n".join(change.disappeared)
+        print(message)
+        send_email(subject, message)
+    return change
+
+def mark_slots_booked(date, num_adults):
+    """Stop retrying the booking for the slots record_slot_change() last stored"""
+    checker = get_checker()
+    key = checker.active_watch.state_key(date) if checker.active_watch is not None else date
+    try:
+        checker.state_store.mark_booked(key, num_adults)
+    except Exception as e:
+        print(f"Could not update slot state: {str(e)}")
+
+def quit_driver(driver, label=""):
+    from browser_profile import driver_pid, release_profile_dir
+
+    recorder = getattr(driver, 'recorder', None)
+    if recorder is not None:
+        recorder.flush(driver)
+    pid = driver_pid(driver)
+    try:
+        driver.quit()
+        print(f"{label}Browser closed")
+    except:
+        print(f"{label}Error closing browser")
+    finally:
+        # Kills whatever chromedriver left running
+        get_checker().governor.release(pid)
+        release_profile_dir(getattr(driver, 'profile_dir', None))
+
+def check_availability(driver=None):
+    """Scan every date and party size in one browser.
+
+    With no driver a fresh one is started and closed afterwards; a driver
+    passed in (e.g. the daemon's warm browser) is expected to have the booking
+    page open already and is left running.
+    """
+    checker = get_checker()
+    budget = checker.wait_budget
+    print(f"Checking availability at {datetime.datetime.now()}")
+    owns_driver = driver is None
+    if owns_driver:
+        driver = setup_driver()
+    
+    try:
+        if owns_driver:
+            open_booking_page(driver)
+        
+        with notification_cycle():
+            for date, adults_to_try in checker.probe_plan:
+                print(f"\nChecking date: {date}")
+                # Try with different numbers of adults, largest first
+                for num_adults, time_slots, available_times in iter_probes(driver, date, adults_to_try, checker.sweep):
+                    change = record_slot_change(date, num_adults, time_slots, available_times)
+                    if time_slots and not change.unbooked:
+                        print(f"Slots for {date} with {num_adults} adults unchanged since last check; not notifying or booking again")
+                    elif time_slots:
+                        if not change.appeared:
+                            print(f"Slots for {date} with {num_adults} adults unchanged, but the last booking did not go through; retrying it")
+                        if book_found_slots(driver, date, num_adults, time_slots, available_times, notify=bool(change.appeared)):
+                            mark_slots_booked(date, num_adults)
+                            return  # Exit after finding and booking
                     
-                    # Take screenshot after refresh
-                    driver.save_screenshot(f"after_refresh_{date}_{num_adults}.png")
+                    # Take screenshot of final state
+                    capture_screenshot(driver, f"final_{date}_{num_adults}")
                     
-                    # IMPORTANT: Check the confirmation checkbox first
-                    print("Looking for confirmation checkbox...")
+                    print(f"Completed check for {date} with {num_adults} adults")
+                    if time_slots:
+                        # Smaller parties rank lower than one that already has slots in the window
+                        print(f"Skipping smaller party sizes for {date}")
+                        break
+    except Exception as e:
+        print(f"Error during availability check: {str(e)}")
+    finally:
+        budget.report()
+        if owns_driver:
+            quit_driver(driver)
+
+def _pool_worker(worker_id, jobs, results, booking_lock, booking_done, sweep):
+    """Drain (date, party sizes) jobs from the shared queue with a dedicated driver"""
+    try:
+        driver = setup_driver()
+    except Exception as e:
+        print(f"[worker {worker_id}] Could not start browser: {str(e)}")
+        return
+    
+    try:
+        open_booking_page(driver)
+        while not booking_done.is_set():
+            try:
+                date, adults_list = jobs.get_nowait()
+            except queue.Empty:
+                break
+            
+            print(f"[worker {worker_id}] Checking {date} with {', '.join(map(str, adults_list))} adults")
+            try:
+                for num_adults, time_slots, available_times in iter_probes(driver, date, adults_list, sweep):
+                    result = {'date': date, 'adults': num_adults, 'times': [], 'booked': False}
+                    results.append(result)
+                    change = record_slot_change(date, num_adults, time_slots, available_times)
+                    # Only newly appeared slots are reported and booked
+                    if change.appeared:
+                        result['times'] = available_times
+                    if time_slots and change.unbooked:
+                        # One session books at a time; once a booking goes through the rest stop.
+                        # A failed one leaves booking_done unset so another worker can still book.
+                        with booking_lock:
+                            should_book = not booking_done.is_set()
+                            if should_book:
+                                result['booked'] = book_found_slots(driver, date, num_adults, time_slots, available_times, notify=False)
+                                if result['booked']:
+                                    mark_slots_booked(date, num_adults)
+                                    booking_done.set()
+                        if should_book:
+                            break
+                    capture_screenshot(driver, f"final_{date}_{num_adults}")
+                    if time_slots:
+                        # Smaller parties rank lower than one that already has slots in the window
+                        break
+            finally:
+                jobs.task_done()
+    except Exception as e:
+        print(f"[worker {worker_id}] Error during availability check: {str(e)}")
+    finally:
+        quit_driver(driver, f"[worker {worker_id}] ")
+
+def format_pool_report(results):
+    """Merge per-job results into a single notification body"""
+    target_dates = get_checker().target_dates
+    ordered = sorted(results, key=lambda r: (target_dates.index(r['date']), -r['adults']))
+    lines = []
+    for r in ordered:
+        if r.get('skipped'):
+            lines.append(f"{r['date']} for {r['adults']} adults: not checked, a booking already went through")
+        elif r['times']:
+            booked = " (booking attempted)" if r['booked'] else ""
+            lines.append(f"{r['date']} for {r['adults']} adults{booked}:")
+            lines.extend(f"  {t}" for t in r['times'])
+        elif r['booked']:
+            lines.append(f"{r['date']} for {r['adults']} adults: slots found, booking attempted")
+    return "\n".join(lines)
+
+def check_availability_pool(max_workers):
+    """Scan every (date, adults) combination with a pool of browser sessions.
+
+    Each worker owns one driver from setup_driver() and pulls jobs from a shared
+    queue, so wall-clock time scales with jobs / max_workers. In sweep mode a
+    job is a whole date (one page load for every party size); otherwise it is a
+    single (date, adults) pair. The first worker to see slots attempts the
+    booking; results are merged into a single email.
+    """
+    checker = get_checker()
+    print(f"Checking availability at {datetime.datetime.now()} with {max_workers} workers")
+    jobs = queue.Queue()
+    for date, adults_to_try in checker.probe_plan:
+        if checker.sweep:
+            jobs.put((date, adults_to_try))
+        else:
+            for num_adults in adults_to_try:
+                jobs.put((date, [num_adults]))
+    
+    num_workers = max(1, min(max_workers, jobs.qsize()))
+    results = []
+    booking_lock = threading.Lock()
+    booking_done = threading.Event()
+    started = time.monotonic()
+    
+    with notification_cycle():
+        threads = [
+            threading.Thread(target=_pool_worker, args=(i, jobs, results, booking_lock, booking_done, checker.sweep), daemon=True)
+            for i in range(num_workers)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        
+        # Jobs left once a booking went through (or every browser failed to start)
+        while not jobs.empty():
+            date, adults_list = jobs.get_nowait()
+            results.extend({'date': date, 'adults': num_adults, 'times': [], 'booked': False, 'skipped': True}
+                           for num_adults in adults_list)
+        
+        print(f"Pool finished {sum(not r.get('skipped') for r in results)} checks in {time.monotonic() - started:.1f}s")
+        checker.wait_budget.report()
+        send_pool_report(results)
+    return results
+
+def send_pool_report(results):
+    """Email the merged results of a concurrent scan, if any probe saw new slots"""
+    report = format_pool_report(results)
+    if report:
+        subject = "Pizza 4P's Slots Available"
+        message = "Found available slots:\n\n" + report + "\n\nBook now at: " + get_checker().booking_url
+        print(message)
+        send_email(subject, message)
+    else:
+        print("No new time slots found for any date")
+
+def book_with_browser(date, num_adults, driver=None, detected_at=None, prepared=None):
+    """Book slots that were already discovered, starting a browser only if none is given.
+
+    prepared is the (date, adults) the given driver's page is already set to,
+    if any; a matching page skips the reload and form setup.
+    """
+    from planner import filter_to_window
+
+    budget = get_checker().wait_budget
+    owns_driver = driver is None
+    if owns_driver:
+        driver = setup_driver()
+    try:
+        if owns_driver or not driver.current_url.startswith(get_checker().booking_url):
+            # A fresh driver, or a shared one that is on another shop's page
+            open_booking_page(driver)
+            prepared = None
+        if prepared == (date, num_adults):
+            # Parked a cycle ago, so its slots are stale. Clearing the date first makes
+            # setting it again fetch the timetable even on inputs that ignore same-value changes.
+            print(f"Page already set to {date} for {num_adults} adults; reloading its slots")
+            driver.execute_script(SET_DATE_JS, DATE_INPUT_SELECTOR, '')
+            select_date(driver, date, num_adults)
+            probe = read_time_slots(driver, date, num_adults)
+        elif prepared and prepared[0] == date:
+            select_guests(driver, num_adults)
+            if not date_is_selected(driver, date):
+                select_date(driver, date, num_adults)
+            probe = read_time_slots(driver, date, num_adults)
+        else:
+            probe = scan_for_slots(driver, date, num_adults)
+        time_slots, available_times = filter_to_window(*probe, get_checker().time_range)
+        if time_slots:
+            return book_found_slots(driver, date, num_adults, time_slots, available_times, notify=False,
+                                    detected_at=detected_at)
+        print(f"Slots found over HTTP for {date} with {num_adults} adults are not visible in the browser")
+        return False
+    finally:
+        budget.report()
+        if owns_driver:
+            quit_driver(driver)
+
+def check_availability_http(driver=None, prepared=None):
+    """Discover slots over plain HTTP; Selenium only starts when there is something to book.
+
+    prepared is passed on to book_with_browser() for a pre-armed driver.
+    Returns whether a booking was attempted in the browser, i.e. whether a
+    given driver's page may have moved.
+    """
+    import requests
+    from http_availability import AvailabilityClient
+    from planner import filter_to_window
+
+    checker = get_checker()
+    print(f"Checking availability over HTTP at {datetime.datetime.now()}")
+    client = AvailabilityClient(checker.booking_url, checker.availability_url)
+    attempted = False
+    try:
+        with notification_cycle():
+            for date, adults_to_try in checker.probe_plan:
+                print(f"\nChecking date: {date}")
+                for num_adults in adults_to_try:
                     try:
-                        # Try different selectors for the confirmation checkbox
-                        checkbox_selectors = [
-                            "input[type='checkbox']",
-                            ".checkbox",
-                            "[type='checkbox']",
-                            "#confirm",
-                            "[name*='confirm']"
-                        ]
-                        
-                        checkbox_found = False
-                        for selector in checkbox_selectors:
-                            try:
-                                checkboxes = driver.find_elements(By.CSS_SELECTOR, selector)
-                                if checkboxes:
-                                    for checkbox in checkboxes:
-                                        try:
-                                            if not checkbox.is_selected():
-                                                checkbox.click()
-                                                print(f"Clicked confirmation checkbox with selector: {selector}")
-                                                checkbox_found = True
-                                                time.sleep(2)
-                                                break
-                                        except:
-                                            continue
-                                if checkbox_found:
-                                    break
-                            except Exception as e:
-                                print(f"Could not click checkbox with selector {selector}: {str(e)}")
-                        
-                        # If no checkbox found using CSS selectors, try XPath
-                        if not checkbox_found:
-                            try:
-                                # Look for checkboxes with nearby text about confirmation
-                                checkbox_xpath = "//input[@type='checkbox'][ancestor::*[contains(text(), 'confirm') or contains(text(), 'read') or contains(text(), 'agree')]]" 
-                                checkboxes = driver.find_elements(By.XPATH, checkbox_xpath)
-                                if checkboxes:
-                                    for checkbox in checkboxes:
-                                        try:
-                                            if not checkbox.is_selected():
-                                                checkbox.click()
-                                                print("Clicked confirmation checkbox using XPath")
-                                                checkbox_found = True
-                                                time.sleep(2)
-                                                break
-                                        except:
-                                            continue
-                            except Exception as e:
-                                print(f"Could not click checkbox using XPath: {str(e)}")
-                        
-                        # If still no checkbox found, try a more aggressive approach with JavaScript
-                        if not checkbox_found:
-                            try:
-                                # Use JavaScript to check all checkboxes on the page
-                                js_script = """
-                                var checkboxes = document.querySelectorAll('input[type="checkbox"]');
-                                var clicked = false;
-                                for (var i = 0; i < checkboxes.length; i++) {
-                                    if (!checkboxes[i].checked) {
-                                        checkboxes[i].checked = true;
-                                        checkboxes[i].dispatchEvent(new Event('change', { 'bubbles': true }));
-                                        clicked = true;
-                                    }
-                                }
-                                return clicked;
-                                """
-                                result = driver.execute_script(js_script)
-                                if result:
-                                    print("Checked confirmation checkbox using JavaScript")
-                                    checkbox_found = True
-                                    time.sleep(2)
-                            except Exception as e:
-                                print(f"Could not check checkbox using JavaScript: {str(e)}")
-                        
-                        if not checkbox_found:
-                            print("WARNING: Could not find or check confirmation checkbox")
-                    except Exception as e:
-                        print(f"Error handling confirmation checkbox: {str(e)}")
+                        checker.rate_limiter.acquire()
+                        with checker.tracer.span('http_fetch'):
+                            available_times = client.fetch_available_times(date, num_adults)
+                        detected_at = time.monotonic()
+                    except requests.RequestException as e:
+                        print(f"HTTP check failed for {date} with {num_adults} adults: {str(e)}")
+                        continue
                     
-                    # Take screenshot after checkbox attempt
-                    driver.save_screenshot(f"after_checkbox_{date}_{num_adults}.png")
+                    _, available_times = filter_to_window([], available_times, checker.time_range)
+                    change = record_slot_change(date, num_adults, available_times, available_times)
+                    if not available_times:
+                        print(f"No available slots for {date} with {num_adults} adults")
+                        continue
+                    if not change.unbooked:
+                        print(f"Slots for {date} with {num_adults} adults unchanged since last check; not notifying or booking again")
+                        break  # Smaller parties rank lower than this one
                     
-                    # Step 1: Select number of adults
-                    print(f"Selecting {num_adults} adults...")
-                    try:
-                        # Try different selectors for the guest count button
-                        guest_selectors = [
-                            ".guest-count-button",
-                            "[data-testid='guest-count-button']",
-                            "button:contains('Guest')",
-                            "button:contains('People')",
-                            "select[name='adults']",
-                            "#adults"
-                        ]
-                        
-                        guest_button_found = False
-                        for selector in guest_selectors:
-                            try:
-                                guest_button = WebDriverWait(driver, 5).until(
-                                    EC.element_to_be_clickable((By.CSS_SELECTOR, selector))
-                                )
-                                guest_button.click()
-                                guest_button_found = True
-                                print(f"Clicked guest button with selector: {selector}")
-                                time.sleep(2)
-                                break
-                            except Exception as e:
-                                print(f"Could not click guest button with selector {selector}: {str(e)}")
-                        
-                        # If no button found, try XPath
-                        if not guest_button_found:
-                            try:
-                                guest_button = WebDriverWait(driver, 5).until(
-                                    EC.element_to_be_clickable((By.XPATH, "//button[contains(., 'Guest') or contains(., 'People') or contains(., 'Adult')]"))
-                                )
-                                guest_button.click()
-                                guest_button_found = True
-                                print("Clicked guest button using XPath")
-                                time.sleep(2)
-                            except Exception as e:
-                                print(f"Could not click guest button using XPath: {str(e)}")
-                        
-                        # Now select the number of adults
-                        if guest_button_found:
-                            try:
-                                # Try to find the adult option by text
-                                adult_option = WebDriverWait(driver, 5).until(
-                                    EC.element_to_be_clickable((By.XPATH, f"//button[text()='{num_adults}'] | //option[text()='{num_adults}'] | //div[text()='{num_adults}']")),
-                                )
-                                adult_option.click()
-                                print(f"Selected {num_adults} adults")
-                                time.sleep(2)
-                            except Exception as e:
-                                print(f"Could not select {num_adults} adults: {str(e)}")
-                    except Exception as e:
-                        print(f"Error selecting number of adults: {str(e)}")
+                    if change.appeared:
+                        subject = f"Pizza 4P's Slots Available - {date} for {num_adults} adults"
+                        message = format_slot_message(date, num_adults, available_times, checker.booking_url)
+                        print(message)
+                        send_email(subject, message)
+                    else:
+                        print(f"Slots for {date} with {num_adults} adults unchanged, but the last booking did not go through; retrying it")
                     
-                    # Step 2: Select date using direct JavaScript injection
-                    print(f"Selecting date: {date}")
+                    attempted = True
+                    booked = False
                     try:
-                        # Try to find any date input field
-                        date_input_found = False
-                        
-                        # Method 1: Try to find a date input field
-                        try:
-                            date_input = WebDriverWait(driver, 5).until(
-                                EC.presence_of_element_located((By.CSS_SELECTOR, "input[type='date'], [data-testid='date-picker-input'], input.date-input"))
-                            )
-                            # Clear and set the date directly
-                            driver.execute_script("arguments[0].value = arguments[1]", date_input, date)
-                            # Trigger change event
-                            driver.execute_script("arguments[0].dispatchEvent(new Event('change', { 'bubbles': true }))", date_input)
-                            date_input_found = True
-                            print(f"Set date {date} directly on input field")
-                            time.sleep(2)
-                        except Exception as e:
-                            print(f"Could not set date directly on input: {str(e)}")
-                        
-                        # Method 2: Try to use JavaScript to set the date in the application's state
-                        if not date_input_found:
-                            try:
-                                # This is a more aggressive approach - inject a date value directly into the page
-                                js_script = f"""
-                                // Try to find any date picker or input
-                                var datePickers = document.querySelectorAll('input[type="date"], [data-testid*="date"], .date-picker, .calendar');
-                                if (datePickers.length > 0) {{                                    
-                                    // Set value and dispatch events
-                                    datePickers.forEach(function(el) {{
-                                        el.value = '{date}';
-                                        el.dispatchEvent(new Event('change', {{ 'bubbles': true }}));
-                                        el.dispatchEvent(new Event('input', {{ 'bubbles': true }}));
-                                        console.log('Set date on element:', el);
-                                    }});
-                                    return true;
-                                }}
-                                return false;
-                                """
-                                result = driver.execute_script(js_script)
-                                if result:
-                                    date_input_found = True
-                                    print(f"Set date {date} using JavaScript injection")
-                                    time.sleep(2)
-                            except Exception as e:
-                                print(f"Could not set date using JavaScript: {str(e)}")
-                        
-                        # Method 3: Try clicking on the date field and then selecting from calendar
-                        if not date_input_found:
-                            try:
-                                # Click any element that might open a date picker
-                                date_elements = driver.find_elements(By.XPATH, "//button[contains(., 'Date')] | //input[contains(@placeholder, 'date')] | //div[contains(@class, 'date')]")
-                                if date_elements:
-                                    date_elements[0].click()
-                                    print("Clicked on potential date element")
-                                    time.sleep(2)
-                                    
-                                    # Now try to select the date from calendar
-                                    date_obj = datetime.datetime.strptime(date, '%Y-%m-%d')
-                                    day = date_obj.day
-                                    month = date_obj.month
-                                    year = date_obj.year
-                                    
-                                    # Try to find the date in the calendar
-                                    calendar_day = driver.find_elements(By.XPATH, f"//button[contains(text(), '{day}')] | //td[contains(text(), '{day}')]")
-                                    if calendar_day:
-                                        calendar_day[0].click()
-                                        date_input_found = True
-                                        print(f"Selected date {date} from calendar")
-                                        time.sleep(2)
-                            except Exception as e:
-                                print(f"Could not select date from calendar: {str(e)}")
-                        
-                        # Take screenshot after date selection attempt
-                        driver.save_screenshot(f"date_selection_{date}_{num_adults}.png")
-                        
-                        if not date_input_found:
-                            print("WARNING: Could not set date, but continuing anyway")
-                            # We'll continue anyway as the site might have a default date selected
+                        booked = book_with_browser(date, num_adults, driver, detected_at, prepared)
+                        if booked:
+                            mark_slots_booked(date, num_adults)
                     except Exception as e:
-                        print(f"Error selecting date: {str(e)}")
-                        # Continue anyway
-                    
-                    # Step 3: Look for available time slots with enhanced detection
-                    print("Looking for available time slots...")
-                    time_slots = []
+                        # e.g. the browser crashed; the slots were still reported above
+                        print(f"Booking {date} for {num_adults} adults in the browser failed: {str(e)}")
+                    if booked:
+                        return attempted  # Exit after finding and booking
+                    # Smaller parties rank lower than this one; the other dates still get checked
+                    break
+    finally:
+        client.close()
+    return attempted
+
+async def open_booking_tab(page):
+    """Load the booking page in a CDP tab and tick the confirmation checkbox"""
+    import asyncio
+
+    checker = get_checker()
+    budget = checker.wait_budget
+    cache = checker.selector_cache
+    await asyncio.to_thread(checker.rate_limiter.acquire)
+    with checker.tracer.span('page_load', engine='cdp'):
+        await page.goto(checker.booking_url, budget)
+    with checker.tracer.span('checkbox', engine='cdp'):
+        candidates = cache.ranked('checkbox', CONFIRM_CHECKBOX_SELECTORS)
+        selector = await page.click_first(candidates, budget, 'checkbox', unchecked_only=True)
+        if selector is None:
+            cache.forget('checkbox')
+            print("WARNING: Could not find or check confirmation checkbox")
+        else:
+            cache.record('checkbox', selector, selector == candidates[0])
+
+async def select_guests_async(page, num_adults):
+    """Open the guest selector in a CDP tab and pick the party size"""
+    checker = get_checker()
+    budget = checker.wait_budget
+    cache = checker.selector_cache
+    with checker.tracer.span('guest_selection', engine='cdp'):
+        candidates = cache.ranked('guest_button', GUEST_BUTTON_SELECTORS)
+        selector = await page.click_first(candidates, budget, 'guest_button')
+        if selector is None:
+            cache.forget('guest_button')
+            print("Could not find the guest button")
+            return False
+        cache.record('guest_button', selector, selector == candidates[0])
+        if await page.click_first([GUEST_OPTION_XPATH.format(n=num_adults)], budget, 'guest_option') is None:
+            print(f"Could not select {num_adults} adults")
+            return False
+        return True
+
+async def select_date_async(page, date):
+    """Set the date input in a CDP tab; only the input method is used, as it is the one the page reacts to"""
+    checker = get_checker()
+    with checker.tracer.span('date_selection', engine='cdp'):
+        if await page.set_date(date, checker.wait_budget):
+            return True
+        print(f"WARNING: Could not set date {date}, but continuing anyway")
+        return False
+
+async def read_time_slots_async(page):
+    """(time_slots, available_times) from a CDP tab, as read_time_slots() returns them"""
+    checker = get_checker()
+    with checker.tracer.span('slot_extraction', engine='cdp'):
+        time_slots = await page.read_slots()
+    available_times = [slot['label'] for slot in time_slots
+                       if slot['enabled'] and slot['label'] and slot['label'] not in UNAVAILABLE_SLOT_LABELS]
+    return time_slots, available_times
+
+async def try_booking_async(page, date, slot, num_adults, detected_at=None):
+    """Click a slot record from a CDP tab's snapshot and fill the booking form.
+
+    The form is filled in one call once name, phone, email and submit are all
+    present. As in fill_booking_details(), the submit button is never clicked.
+    """
+    checker = get_checker()
+    budget = checker.wait_budget
+    resolver = checker.form_resolver
+    time_slot = slot['label'] or "Unknown Time"
+    with checker.tracer.span('booking', engine='cdp'):
+        print(f"Attempting to book: {date} at {time_slot} for {num_adults} adults")
+        if await page.click_first([slot['selector']], budget, 'slot_click') is None:
+            print(f"Could not click time slot: {time_slot}")
+            return False
+        await page.wait_ready(budget, 'booking_form')
+        
+        fields = ['name', 'phone', 'email', 'terms', 'submit']
+        query = [[field, resolver.candidates(field)] for field in fields]
+        contact = checker.contact_details
+        values = {field: contact[field] for field in ('name', 'phone', 'email')}
+        required = ['name', 'phone', 'email', 'submit']
+        result = await page.fill_form(query, values, required, budget)
+        for field, candidates in query:
+            selector = result['selectors'].get(field)
+            if selector:
+                checker.selector_cache.record(f"form_{field}", selector, selector == candidates[0])
+        
+        if result['filled'] is None:
+            missing = [field for field in required if field not in result['selectors']]
+            print(f"Form fields not found: {', '.join(missing)}")
+            record_booking_attempt(date, num_adults, time_slot, None)
+            return False
+        print(f"Filled in {result['filled']} fields")
+        print("Found submit button but NOT clicking it (safety measure)")
+        record_booking_attempt(date, num_adults, time_slot, detected_at)
+        return True
+
+async def _cdp_scan(browser, date, adults_list, results, booking):
+    """Run one job's probes in its own tab; the first tab to see new slots books"""
+    import asyncio
+    from cdp_engine import CDPError
+    from planner import filter_to_window
+
+    checker = get_checker()
+    page = await browser.new_page()
+    try:
+        needs_reset = True
+        for num_adults in adults_list:
+            print(f"[{date}] Trying with {num_adults} adults...")
+            try:
+                if needs_reset:
+                    await open_booking_tab(page)
+                    needs_reset = False
+                    date_set = False
+                await select_guests_async(page, num_adults)
+                if not date_set or await page.date_value() != date:
+                    date_set = await select_date_async(page, date)
+                time_slots, available_times = filter_to_window(*await read_time_slots_async(page), checker.time_range)
+                detected_at = time.monotonic()
+            except (CDPError, asyncio.TimeoutError) as e:
+                print(f"Error while checking {date} with {num_adults} adults: {str(e)}")
+                needs_reset = True
+                continue
+            
+            result = {'date': date, 'adults': num_adults, 'times': [], 'booked': False}
+            results.append(result)
+            change = record_slot_change(date, num_adults, time_slots, available_times)
+            # Only newly appeared slots are reported and booked
+            if change.appeared:
+                result['times'] = available_times
+            if time_slots and change.unbooked and not booking['done']:
+                # No await between the check and the claim, so only one tab books
+                booking['done'] = True
+                slot = next((s for s in time_slots if available_times and s['label'] == available_times[0]), time_slots[0])
+                result['booked'] = await try_booking_async(page, date, slot, num_adults, detected_at)
+                if result['booked']:
+                    mark_slots_booked(date, num_adults)
+                else:
+                    # Let another tab book what it finds
+                    booking['done'] = False
+                break
+            if time_slots:
+                # Smaller parties rank lower than one that already has slots in the window
+                break
+    finally:
+        await page.close()
+
+async def check_availability_async(max_pages=4):
+    """Scan the probe plan in one Chrome driven over CDP, with up to max_pages tabs at once.
+
+    Jobs are split as in check_availability_pool(): a whole date per tab in
+    sweep mode, otherwise one (date, adults) pair. Returns the per-probe results.
+    """
+    import asyncio
+    from browser_profile import BLOCKED_URL_PATTERNS, chrome_arguments, claim_profile_dir, release_profile_dir
+    from cdp_engine import Browser
+    from driver_resolver import find_browser
+
+    checker = get_checker()
+    jobs = []
+    for date, adults_to_try in checker.probe_plan:
+        if checker.sweep:
+            jobs.append((date, adults_to_try))
+        else:
+            jobs.extend((date, [num_adults]) for num_adults in adults_to_try)
+    
+    binary = find_browser()
+    if binary is None:
+        raise RuntimeError("Could not find a Chrome or Chromium binary")
+    lean = checker.browser_profile == 'lean'
+    profile_dir = claim_profile_dir(checker.browser_profile_dir) if lean else None
+    arguments = chrome_arguments(checker.browser_profile, checker.headless, checker.viewport)
+    try:
+        with checker.tracer.span('setup_driver', engine='cdp'):
+            browser = await Browser.launch(binary, arguments, profile_dir, BLOCKED_URL_PATTERNS if lean else None)
+    except BaseException:
+        release_profile_dir(profile_dir)
+        raise
+    print(f"Chrome {binary} (pid {browser.pid}) ready for {len(jobs)} jobs")
+    checker.governor.track(browser.pid, 'cdp')
+    
+    results = []
+    booking = {'done': False}
+    tabs = asyncio.Semaphore(max(1, max_pages))
+    
+    async def run(job):
+        async with tabs:
+            try:
+                await _cdp_scan(browser, job[0], job[1], results, booking)
+            except Exception as e:
+                print(f"Error during availability check for {job[0]}: {str(e)}")
+    
+    try:
+        await asyncio.gather(*(run(job) for job in jobs))
+    finally:
+        await browser.close()
+        checker.governor.release(browser.pid)
+        release_profile_dir(profile_dir)
+    return results
+
+def check_availability_cdp(max_pages=4):
+    """Run check_availability_async() to completion and email the merged results"""
+    import asyncio
+
+    checker = get_checker()
+    print(f"Checking availability over CDP at {datetime.datetime.now()} with up to {max_pages} tabs")
+    started = time.monotonic()
+    with notification_cycle():
+        results = asyncio.run(check_availability_async(max_pages))
+        print(f"CDP engine finished {len(results)} checks in {time.monotonic() - started:.1f}s")
+        checker.wait_budget.report()
+        send_pool_report(results)
+    return results
+
+def distribute_probes(date, probes, subscribers, booked, booking_lock):
+    """Hand one shop/date scan to every watch subscribed to it.
+
+    probes maps party size to (time_slots, available_times) for the whole
+    union of sizes. Each watch sees only its own sizes (largest first,
+    stopping at the first with slots) and its own window; new slots are
+    emailed to it. Returns [(watch, num_adults), ...] to book, at most one
+    per watch per run.
+    """
+    from planner import filter_to_window
+
+    checker = get_checker()
+    to_book = []
+    for watch in subscribers:
+        with checker.watching(watch):
+            for num_adults in watch.adults_to_try:
+                if num_adults not in probes:
+                    continue
+                time_slots, available_times = filter_to_window(*probes[num_adults], watch.time_range)
+                change = record_slot_change(date, num_adults, time_slots, available_times)
+                if not time_slots:
+                    continue
+                if change.appeared:
+                    subject = f"Pizza 4P's Slots Available - {date} for {num_adults} adults"
+                    message = format_slot_message(date, num_adults, available_times, watch.booking_url)
+                    print(f"[{watch.name}] {message}")
+                    send_email(subject, message)
+                if change.unbooked:
+                    if not change.appeared:
+                        print(f"[{watch.name}] Slots for {date} with {num_adults} adults unchanged, but the last booking did not go through; retrying it")
+                    with booking_lock:
+                        claim = watch.name not in booked
+                        booked.add(watch.name)
+                    if claim:
+                        to_book.append((watch, num_adults))
+                else:
+                    print(f"[{watch.name}] Slots for {date} with {num_adults} adults unchanged since last check")
+                # Smaller parties rank lower than one that already has slots in the window
+                break
+    return to_book
+
+def _check_watch_group(driver, group, booked, booking_lock):
+    """Scan one shop/date for all its watches on one driver, then book for the watches that asked"""
+    booking_url, date, sizes, subscribers = group
+    checker = get_checker()
+    print(f"\nChecking {date} at {booking_url} for {', '.join(w.name for w in subscribers)}")
+    with checker.watching(subscribers[0]):
+        if not driver.current_url.startswith(booking_url):
+            open_booking_page(driver)
+    probes = {}
+    last_size = None
+    for num_adults, time_slots, available_times in iter_probes(driver, date, sizes, checker.sweep, filter_window=False):
+        probes[num_adults] = (time_slots, available_times)
+        last_size = num_adults
+    detected_at = time.monotonic()
+    
+    for i, (watch, num_adults) in enumerate(distribute_probes(date, probes, subscribers, booked, booking_lock)):
+        with checker.watching(watch):
+            if i:
+                # The previous booking attempt left the page on its form
+                open_booking_page(driver)
+            prepared = (date, last_size) if i == 0 and last_size is not None else None
+            if book_with_browser(date, num_adults, driver, detected_at, prepared):
+                mark_slots_booked(date, num_adults)
+
+def _watch_worker(worker_id, jobs, booked, booking_lock, driver=None):
+    """Drain shop/date groups from the shared queue; starts its own driver unless one is given"""
+    owns_driver = driver is None
+    if owns_driver:
+        try:
+            driver = setup_driver()
+        except Exception as e:
+            print(f"[worker {worker_id}] Could not start browser: {str(e)}")
+            return
+    try:
+        while True:
+            try:
+                group = jobs.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                _check_watch_group(driver, group, booked, booking_lock)
+            except Exception as e:
+                print(f"[worker {worker_id}] Error checking {group[1]} at {group[0]}: {str(e)}")
+            finally:
+                jobs.task_done()
+    finally:
+        if owns_driver:
+            quit_driver(driver)
+
+def check_watches(max_workers=1, driver=None):
+    """Check every watch in config.json on a shared browser pool.
+
+    Watches on the same shop and date are merged, so each page is loaded and
+    each party size probed once for all of them. With a driver (the daemon's
+    warm browser) the groups run on it in turn.
+    """
+    from watches import group_probes
+
+    checker = get_checker()
+    groups = group_probes(checker.watches)
+    print(f"Checking {len(checker.watches)} watches as {len(groups)} shop/date scans at {datetime.datetime.now()}")
+    jobs = queue.Queue()
+    for group in groups:
+        jobs.put(group)
+    booked = set()
+    booking_lock = threading.Lock()
+    budget = checker.wait_budget
+    
+    with notification_cycle():
+        if driver is not None or max_workers <= 1:
+            _watch_worker(0, jobs, booked, booking_lock, driver)
+        else:
+            threads = [
+                threading.Thread(target=_watch_worker, args=(i, jobs, booked, booking_lock), daemon=True)
+                for i in range(max(1, min(max_workers, len(groups))))
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+    budget.report()
+
+def check_watches_http(driver=None):
+    """HTTP discovery for every watch: one fetch per shop, date and party size, shared by its subscribers"""
+    import requests
+    from http_availability import AvailabilityClient
+    from watches import group_probes
+
+    checker = get_checker()
+    groups = group_probes(checker.watches)
+    print(f"Checking {len(checker.watches)} watches over HTTP at {datetime.datetime.now()}")
+    clients = {}
+    booked = set()
+    booking_lock = threading.Lock()
+    try:
+        with notification_cycle():
+            for booking_url, date, sizes, subscribers in groups:
+                if booking_url not in clients:
+                    with checker.watching(subscribers[0]):
+                        clients[booking_url] = AvailabilityClient(booking_url, checker.availability_url)
+                probes = {}
+                for num_adults in sizes:
                     try:
-                        # First take a screenshot of the current state
-                        driver.save_screenshot(f"before_time_slots_{date}_{num_adults}.png")
-                        
-                        # Try different selectors for time slots
-                        time_slot_selectors = [
-                            ".time-slot:not(.disabled)",
-                            "[data-testid='time-slot']:not([disabled])",
-                            ".available-time",
-                            "button.available",
-                            "button:not([disabled])",
-                            "[role='button']:not([disabled])",
-                            "a.time-slot",
-                            "div.time-slot"
-                        ]
-                        
-                        for selector in time_slot_selectors:
-                            try:
-                                slots = driver.find_elements(By.CSS_SELECTOR, selector)
-                                if slots:
-                                    time_slots = slots
-                                    print(f"Found {len(slots)} time slots with selector: {selector}")
-                                    break
-                            except Exception as e:
-                                print(f"Could not find time slots with selector {selector}: {str(e)}")
-                        
-                        # If no slots found, try XPath approach
-                        if not time_slots:
-                            try:
-                                # Look for any clickable elements that might be time slots
-                                time_slots = driver.find_elements(By.XPATH, "//button[not(@disabled)] | //div[@role='button' and not(@disabled)] | //a[contains(@class, 'time') or contains(@class, 'slot')]")
-                                if time_slots:
-                                    print(f"Found {len(time_slots)} potential time slots using XPath")
-                            except Exception as e:
-                                print(f"Could not find time slots using XPath: {str(e)}")
-                        
-                        # Take screenshot of available slots
-                        driver.save_screenshot(f"time_slots_{date}_{num_adults}.png")
-                        
-                        if time_slots:
-                            print(f"Found {len(time_slots)} potential time slots!")
-                            
-                            # Try to extract text from the slots
-                            available_times = []
-                            for slot in time_slots:
-                                try:
-                                    # Try to get text using different methods
-                                    slot_text = slot.text.strip()
-                                    if not slot_text:
-                                        # Try to get text using JavaScript
-                                        slot_text = driver.execute_script("return arguments[0].textContent", slot).strip()
-                                    
-                                    if slot_text and slot_text not in ['FULL', 'CLOSED', 'UNAVAILABLE']:
-                                        available_times.append(slot_text)
-                                        print(f"Found available time: {slot_text}")
-                                except Exception as e:
-                                    print(f"Error extracting text from slot: {str(e)}")
-                            
-                            # If we couldn't extract any text, just use the slots themselves
-                            if not available_times and time_slots:
-                                print("Could not extract text from slots, using slots directly")
-                                # Just use the first slot
-                                first_slot = time_slots[0]
-                                
-                                # Send email notification
-                                subject = f"Pizza 4P's Slots Available - {date} for {num_adults} adults"
-                                message = f"Found available slots on {date} for {num_adults} adults!\n\n"
-                                message += "Time text could not be extracted, but slots are available.\n"
-                                message += "\n\nBook now at: " + BOOKING_URL
-                                send_email(subject, message)
-                                
-                                # Try to book by directly clicking the slot
-                                print("Attempting to book by directly clicking the slot...")
-                                try:
-                                    # Click the slot
-                                    first_slot.click()
-                                    time.sleep(2)
-                                    driver.save_screenshot(f"clicked_slot_{date}_{num_adults}.png")
-                                    
-                                    # Now fill in the booking details
-                                    fill_booking_details(driver, date, "Unknown Time", num_adults)
-                                    return  # Exit after finding and attempting to book
-                                except Exception as e:
-                                    print(f"Error clicking slot: {str(e)}")
-                            elif available_times:
-                                # Send email notification
-                                subject = f"Pizza 4P's Slots Available - {date} for {num_adults} adults"
-                                message = f"Found {len(available_times)} available slots on {date} for {num_adults} adults:\n\n"
-                                message += "\n".join(available_times)
-                                message += "\n\nBook now at: " + BOOKING_URL
-                                send_email(subject, message)
-                                
-                                # Try to book the first available slot
-                                print(f"Attempting to book slot: {available_times[0]}")
-                                try:
-                                    # Find and click the slot with this text
-                                    slot_to_book = None
-                                    for slot in time_slots:
-                                        if slot.text.strip() == available_times[0] or driver.execute_script("return arguments[0].textContent", slot).strip() == available_times[0]:
-                                            slot_to_book = slot
-                                            break
-                                    
-                                    if slot_to_book:
-                                        slot_to_book.click()
-                                        time.sleep(2)
-                                        driver.save_screenshot(f"clicked_slot_{date}_{num_adults}.png")
-                                        
-                                        # Now fill in the booking details
-                                        fill_booking_details(driver, date, available_times[0], num_adults)
-                                        return  # Exit after finding and attempting to book
-                                    else:
-                                        print(f"Could not find slot with text: {available_times[0]}")
-                                except Exception as e:
-                                    print(f"Error booking slot: {str(e)}")
-                            else:
-                                print("Found time slots but couldn't extract any valid times")
-                        else:
-                            print("No available time slots found")
-                    except Exception as e:
-                        print(f"Error looking for time slots: {str(e)}")
-                    
-                    # Take screenshot of final state
-                    driver.save_screenshot(f"final_{date}_{num_adults}.png")
-                    
-                    print(f"Completed check for {date} with {num_adults} adults")
-                    
-                    # In a real implementation, you would:
-                    # 1. Find and select the date
-                    # 2. Find and select the number of guests
-                    # 3. Look for available time slots
-                    # 4. Send notification if slots are found
-                    
-                except TimeoutException as e:
-                    print(f"Timeout while checking {date} with {num_adults} adults: {str(e)}")
-                    driver.save_screenshot(f"error_{date}_{num_adults}.png")
-                except Exception as e:
-                    print(f"Error while checking {date} with {num_adults} adults: {str(e)}")
-                    driver.save_screenshot(f"error_{date}_{num_adults}.png")
-    except Exception as e:
-        print(f"Error during availability check: {str(e)}")
+                        checker.rate_limiter.acquire()
+                        with checker.tracer.span('http_fetch'):
+                            available_times = clients[booking_url].fetch_available_times(date, num_adults)
+                    except requests.RequestException as e:
+                        print(f"HTTP check failed for {date} at {booking_url} with {num_adults} adults: {str(e)}")
+                        continue
+                    probes[num_adults] = (available_times, available_times)
+                detected_at = time.monotonic()
+                for watch, num_adults in distribute_probes(date, probes, subscribers, booked, booking_lock):
+                    with checker.watching(watch):
+                        if book_with_browser(date, num_adults, driver, detected_at):
+                            mark_slots_booked(date, num_adults)
     finally:
+        for client in clients.values():
+            client.close()
+
+class WarmBrowser:
+    """One driver kept on the booking page across polling cycles.
+
+    Before each cycle the driver is health-checked and restarted if it has
+    crashed, its JS heap has grown past max_heap_mb, it has served
+    max_cycles cycles, or its process tree is nearing a session_limits ceiling.
+    """
+
+    def __init__(self, max_heap_mb=None, max_cycles=None):
+        checker = get_checker()
+        self.max_heap_mb = max_heap_mb if max_heap_mb is not None else checker.browser_max_heap_mb
+        self.max_cycles = max_cycles if max_cycles is not None else checker.browser_max_cycles
+        self.driver = None
+        self.cycles = 0
+        self.restarts = 0
+        # (date, adults) the page is currently set to by prepare(), if any
+        self.prepared = None
+        # Why the last cycle left the driver unusable, if it did
+        self.broken = None
+
+    def start(self):
+        started = time.monotonic()
+        self.driver = setup_driver()
+        open_booking_page(self.driver)
+        self.cycles = 0
+        self.prepared = None
+        self.broken = None
+        print(f"Warm browser ready in {time.monotonic() - started:.1f}s")
+
+    def quit(self):
+        if self.driver is not None:
+            quit_driver(self.driver)
+            self.driver = None
+
+    def restart(self, reason):
+        print(f"Restarting browser: {reason}")
+        self.restarts += 1
+        self.quit()
+        self.start()
+
+    def mark_broken(self, reason):
+        """Have the next acquire() restart the driver"""
+        self.broken = reason
+        self.prepared = None
+
+    def health_problem(self):
+        """Return why the driver needs replacing, or None if it is fine to reuse"""
+        from selenium.common.exceptions import WebDriverException
+        from browser_profile import driver_pid
+
+        if self.broken:
+            return f"last cycle failed ({self.broken})"
+        if self.cycles >= self.max_cycles:
+            return f"served {self.cycles} cycles"
+        problem = get_checker().governor.problem(driver_pid(self.driver))
+        if problem:
+            return problem
+        try:
+            heap = self.driver.execute_script(
+                "return window.performance && performance.memory ? performance.memory.usedJSHeapSize : 0")
+        except WebDriverException as e:
+            return f"driver not responding ({str(e).splitlines()[0]})"
+        heap_mb = (heap or 0) / (1024 * 1024)
+        if heap_mb > self.max_heap_mb:
+            return f"JS heap at {heap_mb:.0f} MB"
+        return None
+
+    def prepare(self, date, num_adults):
+        """Set the page to a probe's date and guest count ahead of the next poll"""
+        if self.prepared == (date, num_adults):
+            # Still parked there; the booking fast path refreshes its slots when it is used
+            return
+        try:
+            reset_booking_page(self.driver, date, num_adults)
+            select_guests(self.driver, num_adults)
+            select_date(self.driver, date, num_adults)
+            self.prepared = (date, num_adults)
+        except Exception as e:
+            print(f"Could not prepare the booking page: {str(e)}")
+            self.prepared = None
+
+    def acquire(self):
+        """Return a healthy driver with the booking page loaded"""
+        if self.driver is None:
+            self.start()
+        else:
+            problem = self.health_problem()
+            if problem:
+                self.restart(problem)
+            elif not self.driver.current_url.startswith(get_checker().booking_url):
+                # A previous booking attempt left the page on the booking form
+                open_booking_page(self.driver)
+                self.prepared = None
+        self.cycles += 1
+        return self.driver
+
+def run_daemon(interval_seconds, backend):
+    """Poll forever with one warm browser instead of a cold start per run.
+
+    Unless adaptive_polling is false, interval_seconds is only the base
+    interval: the AdaptiveScheduler bursts after slot changes, speeds up in
+    hot windows and near target dates, and backs off while nothing changes.
+    """
+    import schedule
+
+    from polling import DAEMON_MAX_REQUESTS_PER_MINUTE
+
+    checker = get_checker()
+    # Polling forever is what can hammer the site; one-shot runs are uncapped unless configured
+    checker.config.setdefault('max_requests_per_minute', DAEMON_MAX_REQUESTS_PER_MINUTE)
+    budget = checker.wait_budget
+    print(f"Starting daemon: polling every {interval_seconds}s with the {backend} backend")
+    browser = WarmBrowser()
+    scheduler = None
+    if checker.adaptive_polling is not False:
+        from polling import AdaptiveScheduler
+        if checker.has_watches:
+            from watches import group_probes
+            groups = [sizes for _, _, sizes, _ in group_probes(checker.watches)]
+        else:
+            groups = [adults_to_try for _, adults_to_try in checker.probe_plan]
+        # First guess at the page loads or fetches per cycle (a sweep loads each date once);
+        # after that the scheduler counts them on the rate limiter
+        if checker.sweep and backend != 'http':
+            per_cycle = len(groups)
+        else:
+            per_cycle = sum(len(sizes) for sizes in groups)
+        scheduler = AdaptiveScheduler(interval_seconds, checker.target_dates, checker.adaptive_polling or {},
+                                      checker.rate_limiter, per_cycle)
+    
+    def cycle():
+        since = datetime.datetime.now().isoformat(timespec='seconds')
+        try:
+            driver = browser.acquire()
+        except Exception as e:
+            print(f"Could not start browser, retrying next cycle: {str(e)}")
+            browser.quit()
+            return
+        budget.reset()
+        started = time.monotonic()
         try:
-            driver.quit()
-            print("Browser closed")
-        except:
-            print("Error closing browser")
+            if checker.has_watches:
+                if backend == 'http':
+                    check_watches_http(driver)
+                else:
+                    check_watches(1, driver)
+            elif backend == 'http':
+                if check_availability_http(driver, browser.prepared):
+                    # A booking attempt moved the page off the parked probe
+                    browser.prepared = None
+                if checker.prearmed and checker.probe_plan:
+                    # Park the page on the top-ranked probe so a hit there goes straight to the slot click
+                    date, adults_to_try = checker.probe_plan[0]
+                    browser.prepare(date, adults_to_try[0])
+            else:
+                check_availability(driver)
+        except Exception as e:
+            # Keep polling; the browser is replaced before the next cycle
+            print(f"Cycle {browser.cycles} failed: {str(e)}")
+            browser.mark_broken(str(e).splitlines()[0] if str(e) else type(e).__name__)
+        print(f"Cycle {browser.cycles} finished in {time.monotonic() - started:.1f}s")
+        checker.governor.report()
+        # One trace run per cycle, so a long-running daemon does not keep every span
+        checker.flush_trace()
+        if scheduler is not None:
+            reschedule(since)
+    
+    def reschedule(since):
+        try:
+            store = checker.state_store
+            changed = bool(store.events(since))
+            learn_from = datetime.datetime.now() - datetime.timedelta(days=scheduler.settings['learn_days'])
+            scheduler.learn(store.events(learn_from.isoformat(timespec='seconds')))
+        except Exception as e:
+            print(f"Could not read slot events: {str(e)}")
+            changed = False
+        interval, reason = scheduler.next_interval(changed)
+        print(f"Next poll in {interval:.0f}s ({reason})")
+        schedule.clear('poll')
+        schedule.every(max(1, round(interval))).seconds.do(cycle).tag('poll')
+    
+    schedule.every(interval_seconds).seconds.do(cycle).tag('poll')
+    try:
+        cycle()
+        while True:
+            schedule.run_pending()
+            time.sleep(min(1, max(0, schedule.idle_seconds() or 0)))
+    except KeyboardInterrupt:
+        print("Daemon stopped")
+    finally:
+        browser.quit()
+        schedule.clear()
+
+def start_replay(checker, path):
+    """Serve a recorded check locally and point the checker at it, with fresh state and no email"""
+    import tempfile
+    from recording import ReplayServer
 
-def main():
+    server = ReplayServer(path).start()
+    manifest = server.manifest
+    # Probe what was probed when recording, so the page asks for the recorded URLs
+    for key in ('target_dates', 'num_adults_range', 'time_range'):
+        if manifest.get(key) is not None:
+            checker.config[key] = manifest[key]
+    checker.config.pop('watches', None)
+    checker.config.update({
+        'booking_url': server.url_for(manifest['booking_url']),
+        'state_path': os.path.join(tempfile.mkdtemp(prefix='slot-checker-replay-'), 'slot_state.db'),
+        'dry_run': True,
+        'max_requests_per_minute': 0,
+    })
+    print(f"Replaying {path} (recorded {manifest['recorded_at']}) from {checker.booking_url}")
+    return server
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Pizza 4P's slot checker")
+    parser.add_argument('--config', default=CONFIG_PATH,
+                        help="Path to the configuration file (default: config.json)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Number of concurrent browser sessions, or tabs with --backend cdp (default: max_workers or cdp_max_pages in config.json)")
+    parser.add_argument('--backend', choices=['browser', 'http', 'cdp'], default=None,
+                        help="How to discover slots (default: availability_backend in config.json, or browser)")
+    parser.add_argument('--trace-level', choices=['off', 'errors', 'full'], default=None,
+                        help="Which debug screenshots to save (default: trace_level in config.json, or errors)")
+    parser.add_argument('--trace-out', default=None,
+                        help="Export per-step timing spans: a .json path gets a Chrome trace, anything else JSON lines (default: trace_out in config.json)")
+    parser.add_argument('--browser-profile', choices=['full', 'lean'], default=None,
+                        help="Chrome launch profile (default: browser_profile in config.json, or full)")
+    parser.add_argument('--record', metavar='ARCHIVE', default=None,
+                        help="Record the pages and network responses of this run to a zip archive")
+    parser.add_argument('--replay', metavar='ARCHIVE', default=None,
+                        help="Re-run a recorded check against a local server, without the network or email")
+    parser.add_argument('--daemon', action='store_true',
+                        help="Keep running and poll with one warm browser")
+    parser.add_argument('--interval', type=int, default=None,
+                        help="Seconds between polls in daemon mode (default: poll_interval_seconds in config.json, or 60)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    checker = set_checker(Checker(args.config))
+    if args.trace_level:
+        checker.config['trace_level'] = args.trace_level
+    if args.trace_out:
+        checker.config['trace_out'] = args.trace_out
+    if args.browser_profile:
+        checker.config['browser_profile'] = args.browser_profile
+    if args.record:
+        checker.config['record_path'] = args.record
+    workers = args.workers if args.workers is not None else checker.max_workers
+    backend = args.backend or checker.availability_backend
+    interval = args.interval if args.interval is not None else checker.poll_interval_seconds
+    
+    replay = None
+    if args.replay:
+        replay = start_replay(checker, args.replay)
+        if backend != 'browser':
+            print("Replays drive the Selenium browser; using the browser backend")
+            backend = 'browser'
+        if args.daemon:
+            print("A recording is replayed once; ignoring --daemon")
+            args.daemon = False
+    
+    if not checker.dry_run:
+        # Fail fast on missing credentials rather than at the first notification
+        checker.credentials
+    
+    if replay is None:
+        # Update README with current configuration
+        checker.update_readme()
+    
     print("Starting Pizza 4P's slot checker...")
-    check_availability()
+    # Kills browsers left by a run that was killed, and this run's on SIGTERM or exit
+    checker.governor.install()
+    try:
+        if args.daemon:
+            if workers > 1:
+                print("Daemon mode keeps a single warm browser; ignoring --workers")
+            if backend == 'cdp':
+                print("Daemon mode keeps a warm Selenium browser; using the browser backend")
+                backend = 'browser'
+            run_daemon(interval, backend)
+        elif checker.has_watches:
+            if backend == 'cdp':
+                print("The CDP backend does not handle watches yet; using the browser backend")
+            if backend == 'http':
+                check_watches_http()
+            else:
+                check_watches(workers)
+        elif backend == 'http':
+            check_availability_http()
+        elif backend == 'cdp':
+            check_availability_cdp(args.workers if args.workers is not None else checker.cdp_max_pages)
+        elif workers > 1:
+            check_availability_pool(workers)
+        else:
+            check_availability()
+    finally:
+        checker.close()
+        if replay is not None:
+            replay.stop()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,129 @@
+"""On-disk record of the last slot set seen per (date, adults).
+
+Lets the checker act on transitions only: notify and book when new slots
+appear, note when they disappear, and stay quiet when nothing changed since
+the previous run. A slot set stays unbooked until mark_booked() is called, so
+a booking that failed is retried on the next run without a second email. Every transition is also appended to slot_events, and
+every booking attempt to booking_attempts with its detection-to-submit time.
+"""
+import datetime
+import json
+import sqlite3
+import threading
+from collections import namedtuple
+
+# unbooked: there are current slots and no booking went through since they appeared
+SlotChange = namedtuple('SlotChange', ['previous', 'current', 'appeared', 'disappeared', 'unbooked'])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS slot_state (
+    date TEXT NOT NULL,
+    adults INTEGER NOT NULL,
+    slots TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    booked INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (date, adults)
+);
+CREATE TABLE IF NOT EXISTS slot_events (
+    seen_at TEXT NOT NULL,
+    date TEXT NOT NULL,
+    adults INTEGER NOT NULL,
+    appeared TEXT NOT NULL,
+    disappeared TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS booking_attempts (
+    attempted_at TEXT NOT NULL,
+    date TEXT NOT NULL,
+    adults INTEGER NOT NULL,
+    slot TEXT NOT NULL,
+    detect_to_submit_ms INTEGER,
+    submitted INTEGER NOT NULL
+);
+"""
+
+
+class SlotStateStore:
+    """SQLite-backed last-seen slot sets, safe to share between worker threads"""
+
+    def __init__(self, path='slot_state.db'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(slot_state)")]
+        if 'booked' not in columns:
+            # Databases from before booked was tracked
+            self._conn.execute("ALTER TABLE slot_state ADD COLUMN booked INTEGER NOT NULL DEFAULT 1")
+        self._conn.commit()
+
+    def last_seen(self, date, adults):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT slots FROM slot_state WHERE date = ? AND adults = ?", (date, adults)).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def record(self, date, adults, slots):
+        """Store the current slot set and return how it differs from the last one"""
+        current = list(dict.fromkeys(slots))
+        now = datetime.datetime.now().isoformat(timespec='seconds')
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT slots, booked FROM slot_state WHERE date = ? AND adults = ?", (date, adults)).fetchone()
+            previous = json.loads(row[0]) if row else []
+            appeared = [s for s in current if s not in previous]
+            disappeared = [s for s in previous if s not in current]
+            # New slots need a booking; with no slots there is nothing left to book
+            booked = not current or (not appeared and bool(row[1]))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO slot_state (date, adults, slots, updated_at, booked) VALUES (?, ?, ?, ?, ?)",
+                (date, adults, json.dumps(current), now, int(booked)))
+            if appeared or disappeared:
+                self._conn.execute(
+                    "INSERT INTO slot_events (seen_at, date, adults, appeared, disappeared) VALUES (?, ?, ?, ?, ?)",
+                    (now, date, adults, json.dumps(appeared), json.dumps(disappeared)))
+            self._conn.commit()
+        return SlotChange(previous, current, appeared, disappeared, not booked)
+
+    def mark_booked(self, date, adults):
+        """Record that a booking went through for the current slot set, so it is not retried"""
+        with self._lock:
+            self._conn.execute("UPDATE slot_state SET booked = 1 WHERE date = ? AND adults = ?", (date, adults))
+            self._conn.commit()
+
+    def events(self, since=None):
+        """Transitions recorded so far, oldest first, as (seen_at, date, adults, appeared, disappeared)"""
+        query = "SELECT seen_at, date, adults, appeared, disappeared FROM slot_events"
+        params = ()
+        if since is not None:
+            query += " WHERE seen_at >= ?"
+            params = (since,)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY seen_at", params).fetchall()
+        return [(seen_at, date, adults, json.loads(appeared), json.loads(disappeared))
+                for seen_at, date, adults, appeared, disappeared in rows]
+
+    def record_booking(self, date, adults, slot, detect_to_submit, submitted=False):
+        """Log a booking attempt; detect_to_submit is seconds from slot detection to a ready submit, or None"""
+        now = datetime.datetime.now().isoformat(timespec='seconds')
+        ms = None if detect_to_submit is None else int(detect_to_submit * 1000)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO booking_attempts (attempted_at, date, adults, slot, detect_to_submit_ms, submitted) "
+                "VALUES (?, ?, ?, ?, ?, ?)", (now, date, adults, slot, ms, int(submitted)))
+            self._conn.commit()
+
+    def booking_attempts(self, since=None):
+        """Booking attempts so far, oldest first, as (attempted_at, date, adults, slot, detect_to_submit_ms, submitted)"""
+        query = "SELECT attempted_at, date, adults, slot, detect_to_submit_ms, submitted FROM booking_attempts"
+        params = ()
+        if since is not None:
+            query += " WHERE attempted_at >= ?"
+            params = (since,)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY attempted_at", params).fetchall()
+        return [(attempted_at, date, adults, slot, ms, bool(submitted))
+                for attempted_at, date, adults, slot, ms, submitted in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,66 @@
+"""Availability parsing and fetching, against the local TableCheck replica in bench/"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'bench'))
+
+pytest.importorskip('bs4')
+from http_availability import AvailabilityClient, default_availability_url, parse_slot_html, parse_slot_payload
+from mock_tablecheck import TIMETABLE_PATH, MockServer, MockSettings
+
+
+def test_replica_timetable_payload():
+    settings = MockSettings(slots=3, full=2, first_slot='17:30')
+    payload = {'date': '2030-05-20', 'slots': settings.timetable(2)}
+    assert parse_slot_payload(payload) == ['17:30', '18:00', '18:30']
+    # Above max_party every slot is full
+    assert parse_slot_payload({'slots': settings.timetable(settings.max_party + 1)}) == []
+
+
+def test_payload_flags_keys_and_duplicates():
+    payload = {'data': {'timetable': [
+        {'start_at': '2030-05-20T18:00:00+07:00', 'bookable': True},
+        {'start_time': '18:30', 'sold_out': True},
+        {'label': '7:00 PM', 'available': True},
+        {'time': '19:30', 'available': False},
+        {'time': '18:00'},
+    ]}, 'times': ['20:00', '8:30 pm', 'not a time']}
+    assert parse_slot_payload(payload) == ['18:00', '19:00', '20:00', '20:30']
+
+
+def test_html_uses_the_browser_selectors():
+    html = """
+    <div id="slots">
+      <button class="time-slot">18:00</button>
+      <button class="time-slot disabled" disabled>FULL</button>
+      <button class="time-slot">18:30</button>
+      <button class="time-slot">FULL</button>
+    </div>
+    """
+    assert parse_slot_html(html) == ['18:00', '18:30']
+    assert parse_slot_html('<p>No tables</p>') == []
+
+
+def test_default_availability_url():
+    assert default_availability_url('https://example.com/en/shops/x/reserve/') == \
+        'https://example.com/en/shops/x/available/timetable'
+
+
+@pytest.fixture
+def server():
+    with MockServer(MockSettings(slots=2, full=1, max_party=3, latency_ms=0, render_ms=0)) as server:
+        yield server
+
+
+def test_client_fetches_from_the_replica(server):
+    client = AvailabilityClient(server.booking_url)
+    try:
+        assert client.availability_url == server.base_url + TIMETABLE_PATH
+        assert client.fetch_available_times('2030-05-20', 2) == ['17:00', '17:30']
+        assert client.fetch_available_times('2030-05-20', 4) == []
+    finally:
+        client.close()
@@ -0,0 +1,100 @@
+"""check_availability_http against the local TableCheck replica in bench/"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'bench'))
+
+import slot_checker_new as sc
+from mock_tablecheck import MockServer, MockSettings
+
+DATES = ['2030-05-20', '2030-05-21']
+
+
+@pytest.fixture
+def server():
+    with MockServer(MockSettings(latency_ms=0, render_ms=0)) as server:
+        yield server
+
+
+@pytest.fixture
+def checker(server, tmp_path):
+    checker = sc.set_checker(sc.Checker(config={
+        'target_dates': DATES,
+        'time_range': {'start': '12:00', 'end': '21:00'},
+        'num_adults_range': {'min': 2, 'max': 4},
+        'email': 'me@example.com',
+        'booking_url': server.booking_url,
+        'state_path': str(tmp_path / 'slot_state.db'),
+        'dry_run': True,
+    }))
+    yield checker
+    sc.set_checker(None)
+
+
+def fetched_dates(monkeypatch):
+    """Record the dates the HTTP client asks for"""
+    from http_availability import AvailabilityClient
+
+    dates = []
+    fetch = AvailabilityClient.fetch_available_times
+
+    def recording_fetch(self, date, num_adults):
+        dates.append(date)
+        return fetch(self, date, num_adults)
+
+    monkeypatch.setattr(AvailabilityClient, 'fetch_available_times', recording_fetch)
+    return dates
+
+
+def test_failed_booking_is_retried_without_skipping_other_dates(checker, monkeypatch):
+    attempts = []
+    monkeypatch.setattr(sc, 'book_with_browser', lambda date, num_adults, *args: attempts.append((date, num_adults)))
+    dates = fetched_dates(monkeypatch)
+
+    sc.check_availability_http()
+    assert attempts == [(DATES[0], 4), (DATES[1], 4)]
+
+    # Nothing was booked, so the next run retries both and still checks every date
+    del attempts[:], dates[:]
+    sc.check_availability_http()
+    assert attempts == [(DATES[0], 4), (DATES[1], 4)]
+    assert sorted(set(dates)) == DATES
+
+
+def test_successful_booking_stops_the_scan(checker, monkeypatch):
+    attempts = []
+
+    def book(date, num_adults, *args):
+        attempts.append((date, num_adults))
+        return True
+
+    monkeypatch.setattr(sc, 'book_with_browser', book)
+    sc.check_availability_http()
+    assert attempts == [(DATES[0], 4)]
+
+    # Booked slots are not booked again; the next run moves on to the other date
+    sc.check_availability_http()
+    assert attempts == [(DATES[0], 4), (DATES[1], 4)]
+
+
+
+def test_parked_page_is_only_set_up_again_after_a_booking_attempt(checker, monkeypatch):
+    setups = []
+    monkeypatch.setattr(sc, 'reset_booking_page', lambda driver, date, num_adults: setups.append((date, num_adults)))
+    monkeypatch.setattr(sc, 'select_guests', lambda *args: None)
+    monkeypatch.setattr(sc, 'select_date', lambda *args: None)
+    browser = sc.WarmBrowser()
+    browser.prepare(DATES[0], 4)
+    browser.prepare(DATES[0], 4)
+    assert setups == [(DATES[0], 4)]
+
+    # Booking moves the page; a run with nothing new to book leaves it parked
+    monkeypatch.setattr(sc, 'book_with_browser', lambda *args: True)
+    for _ in DATES:
+        assert sc.check_availability_http(browser.driver, browser.prepared) is True
+    monkeypatch.setattr(sc, 'book_with_browser', lambda *args: pytest.fail("nothing to book"))
+    assert sc.check_availability_http(browser.driver, browser.prepared) is False
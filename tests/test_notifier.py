@@ -0,0 +1,59 @@
+"""EmailNotifier against a local SMTP server that requires authentication"""
+import os
+import socket
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notifier import EmailNotifier
+
+aiosmtpd = pytest.importorskip('aiosmtpd')
+from aiosmtpd.controller import Controller
+from aiosmtpd.handlers import Sink
+from aiosmtpd.smtp import AuthResult, LoginPassword
+
+
+class Recorder(Sink):
+    def __init__(self):
+        self.envelopes = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.envelopes.append(envelope)
+        return '250 OK'
+
+
+def authenticator(server, session, envelope, mechanism, auth_data):
+    ok = isinstance(auth_data, LoginPassword) and auth_data.login == b'bot@example.com' and auth_data.password == b'secret'
+    return AuthResult(success=ok)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    handler = Recorder()
+    controller = Controller(handler, hostname='127.0.0.1', port=free_port(), authenticator=authenticator,
+                            auth_required=True, auth_require_tls=False)
+    controller.start()
+    try:
+        yield controller, handler
+    finally:
+        controller.stop()
+
+
+def test_logs_in_before_sending(smtp_server):
+    controller, handler = smtp_server
+    notifier = EmailNotifier('bot@example.com', 'secret', 'me@example.com', host='127.0.0.1',
+                             port=controller.port, starttls=False,
+                             backoff_seconds=0)
+    notifier.send("Slots", "18:00")
+    notifier.close(timeout=10)
+    assert (notifier.sent, notifier.failed) == (1, 0)
+    assert handler.envelopes[0].rcpt_tos == ['me@example.com']
+
@@ -0,0 +1,67 @@
+"""Probe plan and time-window filtering"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from planner import build_probe_plan, filter_to_window, in_time_window, parse_slot_time, party_sizes
+
+EVENING = {'start': '18:00', 'end': '21:00'}
+
+
+def test_party_sizes_largest_first():
+    assert party_sizes({'min': 2, 'max': 4}, [9]) == [4, 3, 2]
+    assert party_sizes({'min': 4, 'max': 2}, [9]) == [4, 3, 2]
+    assert party_sizes({'min': 3, 'max': 3}, [9]) == [3]
+    assert party_sizes(None, (4, 2)) == [4, 2]
+
+
+def test_probe_plan_keeps_date_order():
+    assert build_probe_plan(['2030-05-21', '2030-05-20'], [3, 2]) == [('2030-05-21', [3, 2]), ('2030-05-20', [3, 2])]
+
+
+@pytest.mark.parametrize('label, minutes', [
+    ('18:30', 18 * 60 + 30),
+    ('7:05', 7 * 60 + 5),
+    ('18:00 Available', 18 * 60),
+    ('7:00 PM', 19 * 60),
+    ('7:00pm', 19 * 60),
+    ('7:00 p.m.', 19 * 60),
+    ('11:30 AM', 11 * 60 + 30),
+    ('12:00 PM', 12 * 60),
+    ('12:15 AM', 15),
+    ('7:00 Paid', 7 * 60),
+    ('13:00 PM', None),
+    ('0:30 AM', None),
+    ('7:00 - 9:00 PM', None),
+    ('FULL', None),
+    ('', None),
+])
+def test_parse_slot_time(label, minutes):
+    assert parse_slot_time(label) == minutes
+
+
+def test_in_time_window():
+    assert in_time_window('18:00', EVENING)
+    assert in_time_window('21:00', EVENING)
+    assert not in_time_window('21:30', EVENING)
+    assert not in_time_window('17:59', EVENING)
+    assert in_time_window('Book', EVENING)
+    assert in_time_window('17:00', None)
+
+
+def test_pm_labels_are_not_dropped_from_an_evening_window():
+    assert in_time_window('7:00 PM', EVENING)
+    assert not in_time_window('7:00 AM', EVENING)
+    slots = [{'label': '7:00 PM'}, {'label': '11:00 AM'}]
+    assert filter_to_window(slots, ['7:00 PM', '11:00 AM'], EVENING) == ([{'label': '7:00 PM'}], ['7:00 PM'])
+
+
+def test_filter_to_window_drops_untimed_labels_next_to_timed_ones():
+    assert filter_to_window([], ['18:00', 'Next', '22:00'], EVENING) == ([], ['18:00'])
+    # Nothing carries a time: keep everything rather than guess
+    assert filter_to_window([], ['Book', 'Next'], EVENING) == ([], ['Book', 'Next'])
+    # An ambiguous time is still a slot, and is kept
+    assert filter_to_window([], ['7:00 - 9:00 PM', '11:00'], EVENING) == ([], ['7:00 - 9:00 PM'])
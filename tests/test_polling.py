@@ -0,0 +1,41 @@
+"""Adaptive poll intervals and the request cap"""
+import datetime
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from polling import AdaptiveScheduler, RateLimiter
+
+NOON = datetime.datetime(2030, 1, 1, 12, 0)
+
+
+def scheduler(limiter, per_cycle):
+    return AdaptiveScheduler(15, [], {'min_interval_seconds': 1, 'max_interval_seconds': 600}, limiter, per_cycle)
+
+
+def test_uncapped_limiter_still_counts_requests():
+    limiter = RateLimiter(0)
+    for _ in range(3):
+        assert limiter.acquire() == 0.0
+    assert limiter.requests == 3
+
+
+def test_interval_floor_follows_the_requests_a_cycle_really_made():
+    limiter = RateLimiter(30)
+    # Estimated from probes: 4 party sizes on each of 5 dates
+    polls = scheduler(limiter, 20)
+    assert polls.next_interval(False, NOON) == (40, 'base, rate capped')
+
+    # A sweep loaded each date once
+    for _ in range(5):
+        limiter.acquire()
+    assert polls.next_interval(False, NOON) == (22.5, 'backoff')
+    assert polls.requests_per_cycle == 5
+
+
+def test_estimate_is_kept_for_a_cycle_without_requests():
+    limiter = RateLimiter(30)
+    polls = scheduler(limiter, 20)
+    polls.next_interval(False, NOON)
+    assert polls.requests_per_cycle == 20
@@ -0,0 +1,55 @@
+"""check_availability_pool with the browser stubbed out"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import slot_checker_new as sc
+
+DATES = ['2030-05-20', '2030-05-21', '2030-05-22']
+
+
+@pytest.fixture
+def checker(tmp_path, monkeypatch):
+    checker = sc.set_checker(sc.Checker(config={
+        'target_dates': DATES,
+        'time_range': {'start': '12:00', 'end': '21:00'},
+        'num_adults_range': {'min': 2, 'max': 2},
+        'email': 'me@example.com',
+        'state_path': str(tmp_path / 'slot_state.db'),
+        'dry_run': True,
+    }))
+    slot = {'label': '18:00', 'time': '18:00', 'enabled': True, 'selector': None}
+    monkeypatch.setattr(sc, 'setup_driver', lambda *args, **kwargs: object())
+    monkeypatch.setattr(sc, 'open_booking_page', lambda driver: None)
+    monkeypatch.setattr(sc, 'quit_driver', lambda *args: None)
+    monkeypatch.setattr(sc, 'capture_screenshot', lambda *args, **kwargs: None)
+    monkeypatch.setattr(sc, 'iter_probes',
+                        lambda driver, date, adults, sweep: iter([(n, [slot], ['18:00']) for n in adults]))
+    yield checker
+    sc.set_checker(None)
+
+
+def test_failed_booking_lets_the_scan_and_other_bookings_continue(checker, monkeypatch):
+    attempts = []
+
+    def book(driver, date, num_adults, *args, **kwargs):
+        attempts.append(date)
+        return False
+
+    monkeypatch.setattr(sc, 'book_found_slots', book)
+    results = sc.check_availability_pool(1)
+    assert attempts == DATES
+    assert [r['date'] for r in results] == DATES
+    assert not any(r.get('skipped') for r in results)
+
+
+def test_jobs_left_after_a_booking_are_reported(checker, monkeypatch):
+    monkeypatch.setattr(sc, 'book_found_slots', lambda *args, **kwargs: True)
+    results = sc.check_availability_pool(1)
+    assert [(r['date'], r['booked'], bool(r.get('skipped'))) for r in results] == [
+        (DATES[0], True, False), (DATES[1], False, True), (DATES[2], False, True)]
+    report = sc.format_pool_report(results)
+    assert f"{DATES[2]} for 2 adults: not checked" in report
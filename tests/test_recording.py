@@ -0,0 +1,50 @@
+"""ReplayServer request matching"""
+import os
+import sys
+import urllib.request
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recording import Recorder, ReplayServer
+
+SHOP = 'https://www.tablecheck.com/en/shops/mock'
+
+
+@pytest.fixture
+def server(tmp_path):
+    recorder = Recorder(str(tmp_path / 'check.zip'))
+    recorder.meta['booking_url'] = SHOP + '/reserve'
+    for url, body in [
+        (SHOP + '/reserve', b'<html>page</html>'),
+        (SHOP + '/available/timetable?date=2030-05-20&num_people=2&_=1700000000000', b'{"slots": ["first"]}'),
+        (SHOP + '/available/timetable?date=2030-05-20&num_people=2&_=1700000000500', b'{"slots": ["second"]}'),
+        (SHOP + '/available/timetable?date=2030-05-20&num_people=3', b'{"slots": ["three"]}'),
+    ]:
+        recorder.responses.append({'seq': len(recorder.responses) + 1, 'url': url, 'status': 200,
+                                   'content_type': 'application/json', 'body': recorder._store_body(body)})
+    with ReplayServer(recorder.save()) as server:
+        yield server
+
+
+def fetch(server, resource):
+    with urllib.request.urlopen(server.base_url + resource) as response:
+        return response.read().decode()
+
+
+def test_query_order_and_cache_busters_do_not_matter(server):
+    timetable = '/en/shops/mock/available/timetable'
+    assert fetch(server, timetable + '?num_people=2&date=2030-05-20&_=1800000000000') == '{"slots": ["first"]}'
+    assert fetch(server, timetable + '?date=2030-05-20&num_people=2') == '{"slots": ["second"]}'
+    # The last recorded response repeats
+    assert fetch(server, timetable + '?_=1&num_people=2&date=2030-05-20') == '{"slots": ["second"]}'
+    assert fetch(server, timetable + '?num_people=3&date=2030-05-20&cb=x') == '{"slots": ["three"]}'
+    assert server.missed == []
+
+
+def test_other_parameters_still_have_to_match(server):
+    timetable = '/en/shops/mock/available/timetable'
+    assert server.lookup(timetable + '?date=2030-05-21&num_people=2') is None
+    assert server.lookup(timetable + '?date=2030-05-20&num_people=2&extra=1') is None
+    assert server.lookup('/en/shops/mock/reserve') is not None
@@ -0,0 +1,110 @@
+"""Slot set transitions and booking state in SlotStateStore"""
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from state_store import SlotStateStore
+
+DATE = '2030-05-20'
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SlotStateStore(str(tmp_path / 'slot_state.db'))
+    yield store
+    store.close()
+
+
+def test_first_slots_appear_and_need_booking(store):
+    change = store.record(DATE, 4, ['18:00', '18:30', '18:00'])
+    assert change.previous == []
+    assert change.current == ['18:00', '18:30']
+    assert change.appeared == ['18:00', '18:30']
+    assert change.disappeared == []
+    assert change.unbooked
+
+
+def test_no_slots_need_no_booking(store):
+    change = store.record(DATE, 4, [])
+    assert (change.appeared, change.disappeared, change.unbooked) == ([], [], False)
+
+
+def test_failed_booking_is_retried_without_appearing_again(store):
+    store.record(DATE, 4, ['18:00'])
+    # No mark_booked(): the booking did not go through
+    change = store.record(DATE, 4, ['18:00'])
+    assert change.appeared == []
+    assert change.unbooked
+
+
+def test_mark_booked_stops_retries_until_new_slots_appear(store):
+    store.record(DATE, 4, ['18:00'])
+    store.mark_booked(DATE, 4)
+    assert not store.record(DATE, 4, ['18:00']).unbooked
+
+    change = store.record(DATE, 4, ['18:00', '19:00'])
+    assert change.appeared == ['19:00']
+    assert change.unbooked
+
+
+def test_mark_booked_is_per_date_and_party_size(store):
+    store.record(DATE, 4, ['18:00'])
+    store.record(DATE, 3, ['18:00'])
+    store.mark_booked(DATE, 4)
+    assert not store.record(DATE, 4, ['18:00']).unbooked
+    assert store.record(DATE, 3, ['18:00']).unbooked
+
+
+def test_disappearing_slots_are_logged_and_clear_the_booking(store):
+    store.record(DATE, 4, ['18:00', '18:30'])
+    change = store.record(DATE, 4, ['18:30'])
+    assert (change.appeared, change.disappeared) == ([], ['18:00'])
+    assert change.unbooked
+
+    change = store.record(DATE, 4, [])
+    assert change.disappeared == ['18:30']
+    assert not change.unbooked
+    # Reappearing slots are new again
+    assert store.record(DATE, 4, ['18:30']).appeared == ['18:30']
+
+    events = store.events()
+    assert [(appeared, disappeared) for _, _, _, appeared, disappeared in events] == [
+        (['18:00', '18:30'], []), ([], ['18:00']), ([], ['18:30']), (['18:30'], [])]
+
+
+def test_unchanged_slots_are_not_logged(store):
+    store.record(DATE, 4, ['18:00'])
+    store.record(DATE, 4, ['18:00'])
+    assert len(store.events()) == 1
+
+
+def test_database_from_before_booked_column_is_migrated(tmp_path):
+    path = str(tmp_path / 'slot_state.db')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE slot_state (date TEXT NOT NULL, adults INTEGER NOT NULL, slots TEXT NOT NULL, "
+                 "updated_at TEXT NOT NULL, PRIMARY KEY (date, adults))")
+    conn.execute("INSERT INTO slot_state VALUES (?, 4, '[\"18:00\"]', '2030-05-01T10:00:00')", (DATE,))
+    conn.commit()
+    conn.close()
+
+    store = SlotStateStore(path)
+    try:
+        assert store.last_seen(DATE, 4) == ['18:00']
+        # Slots seen before the migration were acted on back then; they are not retried
+        change = store.record(DATE, 4, ['18:00'])
+        assert change.appeared == []
+        assert not change.unbooked
+    finally:
+        store.close()
+
+
+def test_booking_attempts_are_logged(store):
+    store.record_booking(DATE, 4, '18:00', 1.2345, submitted=False)
+    store.record_booking(DATE, 4, '18:30', None)
+    attempts = store.booking_attempts()
+    assert [(date, adults, slot, ms, submitted) for _, date, adults, slot, ms, submitted in attempts] == [
+        (DATE, 4, '18:00', 1234, False), (DATE, 4, '18:30', None, False)]
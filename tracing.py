@@ -0,0 +1,174 @@
+"""Per-step timing spans for a checker run, exportable for later comparison.
+
+Each instrumented step (driver start, page load, checkbox, guest and date
+selection, slot extraction, booking, email) becomes a span with its start,
+duration, thread and outcome. A run's spans can be appended to a JSON lines
+file, one span per line tagged with the run id, or written as a Chrome trace
+(open it in chrome://tracing or Perfetto). Run this module on a JSON lines
+file to see per-step percentiles across every run it holds:
+
+    python tracing.py spans.jsonl --last 50
+"""
+import argparse
+import datetime
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+
+class Tracer:
+    """Collects spans from any thread for one run"""
+
+    def __init__(self, run_id=None):
+        self._lock = threading.Lock()
+        self.restart(run_id)
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """Time the block as one span; an exception marks the span as failed and is re-raised"""
+        started = time.perf_counter()
+        error = None
+        try:
+            yield attrs
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            ended = time.perf_counter()
+            record = {
+                'name': name,
+                'start_ms': (started - self._origin) * 1000,
+                'duration_ms': (ended - started) * 1000,
+                'thread': threading.current_thread().name,
+                'error': error,
+                'attrs': attrs,
+            }
+            with self._lock:
+                self._spans.append(record)
+
+    def restart(self, run_id=None):
+        """Drop the collected spans and start a new run, e.g. for the next daemon cycle"""
+        with self._lock:
+            self.run_id = run_id or datetime.datetime.now().strftime('%Y%m%d-%H%M%S-') + uuid.uuid4().hex[:6]
+            self.started_at = datetime.datetime.now().isoformat(timespec='seconds')
+            self._origin = time.perf_counter()
+            self._spans = []
+
+    def spans(self):
+        with self._lock:
+            return list(self._spans)
+
+    def summary(self):
+        """{name: {'calls', 'total_ms', 'p50_ms', 'p95_ms', 'max_ms'}} for this run"""
+        return summarize(self.spans())
+
+    def report(self):
+        """Print time per step for this run, slowest total first"""
+        summary = self.summary()
+        if not summary:
+            return
+        print("Time per step:")
+        for name, entry in sorted(summary.items(), key=lambda item: -item[1]['total_ms']):
+            print(f"  {name}: {entry['total_ms'] / 1000:.2f}s over {entry['calls']} calls "
+                  f"(p50 {entry['p50_ms']:.0f} ms, p95 {entry['p95_ms']:.0f} ms)")
+
+    def write_jsonl(self, path):
+        """Append this run's spans to a JSON lines file"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'a') as f:
+            for record in self.spans():
+                f.write(json.dumps(dict(record, run_id=self.run_id, run_started_at=self.started_at)) + "\n")
+
+    def write_chrome_trace(self, path):
+        """Write this run's spans in the Chrome trace event format"""
+        threads = {}
+        events = []
+        for record in self.spans():
+            tid = threads.setdefault(record['thread'], len(threads) + 1)
+            args = dict(record['attrs'])
+            if record['error']:
+                args['error'] = record['error']
+            events.append({
+                'name': record['name'], 'ph': 'X', 'pid': 1, 'tid': tid,
+                'ts': record['start_ms'] * 1000, 'dur': record['duration_ms'] * 1000, 'args': args,
+            })
+        for thread, tid in threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': tid, 'args': {'name': thread}})
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'otherData': {'run_id': self.run_id}}, f)
+
+    def export(self, path):
+        """Chrome trace for a .json path, JSON lines otherwise"""
+        if path.endswith('.json'):
+            self.write_chrome_trace(path)
+        else:
+            self.write_jsonl(path)
+        print(f"Wrote {len(self.spans())} spans to {path}")
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(spans):
+    durations = {}
+    for record in spans:
+        durations.setdefault(record['name'], []).append(record['duration_ms'])
+    return {
+        name: {
+            'calls': len(values),
+            'total_ms': sum(values),
+            'p50_ms': percentile(values, 50),
+            'p95_ms': percentile(values, 95),
+            'max_ms': max(values),
+        }
+        for name, values in durations.items()
+    }
+
+
+def load_runs(path, last=None):
+    """Spans from a JSON lines file grouped by run id, oldest run first"""
+    runs = {}
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                record = json.loads(line)
+                runs.setdefault(record['run_id'], []).append(record)
+    ordered = list(runs.items())
+    return ordered[-last:] if last else ordered
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-step percentiles across checker runs")
+    parser.add_argument('path', help="JSON lines file written with --trace-out")
+    parser.add_argument('--last', type=int, default=None, help="Only look at the most recent N runs")
+    args = parser.parse_args()
+
+    runs = load_runs(args.path, args.last)
+    if not runs:
+        print("No spans recorded")
+        return
+    # Per-run totals per step, so a step called several times in one run counts once
+    per_run = {}
+    for _, spans in runs:
+        for name, entry in summarize(spans).items():
+            per_run.setdefault(name, []).append(entry['total_ms'])
+    print(f"{len(runs)} runs")
+    print(f"{'step':<20} {'runs':>5} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, values in sorted(per_run.items(), key=lambda item: -percentile(item[1], 50)):
+        print(f"{name:<20} {len(values):>5} {percentile(values, 50):>9.0f} {percentile(values, 90):>9.0f} "
+              f"{percentile(values, 99):>9.0f} {max(values):>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Watches: who wants which shop, on which dates, in which window.
+
+config.json can list several watches, each with its own booking_url,
+target_dates, time_range, num_adults_range, email and contact details. Keys
+missing from a watch fall back to the top-level ones, so a config without a
+"watches" list is one watch named "default" and behaves as before. Watches
+on the same shop and date are grouped so the page is loaded and each party
+size is probed once for all of them.
+"""
+from collections import OrderedDict
+
+from planner import party_sizes
+
+DEFAULT_CONTACT = {'name': "Aadarsh Gupta", 'phone': "917879974479"}
+
+
+class Watch:
+    """One subscriber's view of one shop"""
+
+    def __init__(self, name, booking_url, target_dates, time_range, adults_to_try, email, contact):
+        self.name = name
+        self.booking_url = booking_url
+        self.target_dates = target_dates
+        self.time_range = time_range
+        self.adults_to_try = adults_to_try
+        self.email = email
+        self.contact = contact
+
+    def state_key(self, date):
+        """Key for the slot state store; the default watch keeps the plain date used before watches"""
+        return date if self.name == 'default' else f"{self.name}:{date}"
+
+    def __repr__(self):
+        return f"Watch({self.name!r}, {self.booking_url!r})"
+
+
+def load_watches(config, default_url, default_sizes):
+    """Watch objects for every entry under "watches", or the single default watch"""
+    base = {key: value for key, value in config.items() if key != 'watches'}
+    entries = config.get('watches') or [{'name': 'default'}]
+    watches = []
+    for i, entry in enumerate(entries):
+        merged = dict(base)
+        merged.update(entry)
+        contact = dict(DEFAULT_CONTACT, email=merged['email'])
+        contact.update(merged.get('contact', {}))
+        watches.append(Watch(
+            name=entry.get('name') or f"watch-{i + 1}",
+            booking_url=merged.get('booking_url', default_url),
+            target_dates=merged['target_dates'],
+            time_range=merged.get('time_range'),
+            adults_to_try=party_sizes(merged.get('num_adults_range'), default_sizes),
+            email=merged['email'],
+            contact=contact,
+        ))
+    return watches
+
+
+def group_probes(watches):
+    """[(booking_url, date, party sizes largest first, [watches...]), ...] with one entry per shop and date.
+
+    Groups keep the order in which the watches list their dates; each group
+    probes the union of its subscribers' party sizes.
+    """
+    groups = OrderedDict()
+    for watch in watches:
+        for date in watch.target_dates:
+            sizes, subscribers = groups.setdefault((watch.booking_url, date), (set(), []))
+            sizes.update(watch.adults_to_try)
+            subscribers.append(watch)
+    return [(booking_url, date, sorted(sizes, reverse=True), subscribers)
+            for (booking_url, date), (sizes, subscribers) in groups.items()]